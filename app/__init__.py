@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 
 from dotenv import load_dotenv
@@ -80,4 +81,16 @@ def create_app(config_name="development"):
     return app
 
 
-app = create_app()
+# Los procesos hijos de multiprocessing (p. ej. los workers del pool de parseo, con spawn)
+# importan módulos de ``app`` pero no necesitan la aplicación: en ellos no se crea al importar
+if multiprocessing.current_process().name == "MainProcess":
+    app = create_app()
+
+
+def __getattr__(name):
+    # Si un proceso hijo la pide (``app:app``), se crea entonces
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -15,7 +15,15 @@ dataset_fields = {
 
 dataset_serializer = Serializer(dataset_fields, related_serializers={"files": file_serializer})
 
-DataSetResource = create_resource(BaseDataset, dataset_serializer)
+
+class DataSetResource(create_resource(BaseDataset, dataset_serializer)):
+    def delete(self, id):
+        # Como el genérico, pero soltando las referencias a blobs del dataset
+        from app.modules.dataset.services import DataSetService
+
+        if not DataSetService().delete(id):
+            return {"message": f"{self.model_name} not found"}, 404
+        return {"message": f"{self.model_name} deleted successfully"}, 204
 
 
 def init_blueprint_api(api):
@@ -0,0 +1,191 @@
+"""
+Caché en disco de los ZIP de datasets y versiones.
+
+Un dataset publicado se descarga muchas veces y su ZIP solo cambia cuando
+cambian sus archivos. Los ZIP se guardan en ``<WORKING_DIR>/cache/archives``:
+
+- datasets: ``dataset_<id>/<fingerprint>.zip`` (huella del contenido, ver
+  ``DataSetService.archive_fingerprint``); al publicar uno nuevo se borran los
+  de huellas anteriores.
+- versiones: ``version_<id>/archive.zip`` (la instantánea de una versión no cambia).
+
+La primera descarga envía el ZIP según se genera y a la vez lo escribe en un
+temporal, que publica con un rename atómico tras el último bloque. Un lock de
+archivo (``flock``) por clave hace que, si varias peticiones (de cualquier
+proceso) piden el mismo ZIP a la vez, solo una lo genere: el resto espera
+(como mucho ``LOCK_TIMEOUT``; después lo envían sin caché) y envía el archivo
+ya publicado. Las descargas de un ZIP publicado no retienen el lock. El tamaño total se limita con
+``ARCHIVE_CACHE_MAX_BYTES`` (``0`` desactiva la caché) borrando los ZIP menos usados.
+"""
+
+import fcntl
+import logging
+import os
+import tempfile
+import time
+from typing import IO, Iterable, Iterator, Optional
+
+from app.modules.dataset.zip_stream import CHUNK_SIZE
+from app.modules.flamapy.cache import cache_root, evict_lru, touch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DISK_BUDGET = 2 * 1024 * 1024 * 1024  # 2 GB
+LOCK_TIMEOUT = 120.0  # Espera máxima a que otra petición termine de generar el mismo ZIP
+LOCK_POLL_INTERVAL = 0.2
+
+
+class ArchiveCache:
+    """ZIP ya generados, por clave (``dataset_<id>/<fingerprint>`` o ``version_<id>/archive``)."""
+
+    def __init__(self, cache_dir: Optional[str] = None, disk_budget: Optional[int] = None):
+        self.cache_dir = cache_dir or os.path.join(cache_root(), "archives")
+        self.disk_budget = (
+            disk_budget if disk_budget is not None else int(os.getenv("ARCHIVE_CACHE_MAX_BYTES", DEFAULT_DISK_BUDGET))
+        )
+
+    @staticmethod
+    def dataset_key(dataset_id: int, fingerprint: str) -> str:
+        return f"dataset_{dataset_id}/{fingerprint}"
+
+    @staticmethod
+    def version_key(version_id: int) -> str:
+        return f"version_{version_id}/archive"
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.zip")
+
+    @staticmethod
+    def etag(key: str) -> str:
+        """ETag (sin comillas) del ZIP: la clave ya identifica su contenido."""
+        return key.replace("/", "-")
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Ruta del ZIP si ya está generado (y lo marca como usado)."""
+        if self.disk_budget <= 0:
+            return None
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        touch(path)
+        return path
+
+    def stream(self, key: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Bytes del ZIP de ``key``. Si no está en caché, cada bloque de ``chunks``
+        (un generador perezoso como ``stream_zip``) se envía a la vez que se
+        escribe en el temporal, así que el cliente recibe el primer byte sin
+        esperar a que se genere todo. Si otra petición lo está generando, se
+        espera a que lo publique y se envía el archivo, sin consumir ``chunks``.
+        """
+        if self.disk_budget <= 0:
+            yield from chunks
+            return
+
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.lock", "w") as lock:
+            if not self._acquire(lock):
+                logger.warning(f"Timed out waiting for archive {key}, sending it uncached")
+                yield from chunks
+                return
+            try:
+                if not os.path.exists(path):
+                    # Quien genera el ZIP mantiene el lock hasta publicarlo
+                    yield from self._build(key, path, chunks)
+                    return
+                touch(path)
+                # Abierto, se puede leer aunque después se borre (otra huella, límite de disco)
+                archive = open(path, "rb")
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+        with archive:
+            yield from _read_chunks(archive)
+
+    def ensure(self, key: str, chunks: Iterable[bytes]) -> Optional[str]:
+        """Genera el ZIP sin enviarlo (p. ej. para responder a un Range) y devuelve su ruta."""
+        if self.disk_budget <= 0:
+            return None
+
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.lock", "w") as lock:
+            if not self._acquire(lock):
+                return None
+            try:
+                if not os.path.exists(path):
+                    for _ in self._build(key, path, chunks):
+                        pass
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return self.lookup(key)
+
+    def _build(self, key: str, path: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Devuelve cada bloque a la vez que lo escribe en un temporal, que solo se
+        publica tras el último. Si falla o se cierra el generador (el cliente se
+        desconecta), el temporal se borra y no se publica nada.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        logger.info(f"Stored archive {key}")
+        self._remove_siblings(path)
+        evict_lru(self.cache_dir, self.disk_budget, suffix=".zip", keep=path)
+
+    @staticmethod
+    def _remove_siblings(path: str) -> None:
+        """
+        Borra los ZIP de huellas anteriores del mismo dataset: ya no se van a
+        pedir. Sus locks se quedan (son archivos vacíos): borrar uno que otro
+        proceso tiene abierto haría que la siguiente petición bloqueara otro
+        inodo y dos procesos generaran el mismo ZIP a la vez.
+        """
+        directory = os.path.dirname(path)
+        for name in os.listdir(directory):
+            sibling = os.path.join(directory, name)
+            if name.endswith(".zip") and sibling != path:
+                try:
+                    os.remove(sibling)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _acquire(lock) -> bool:
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(LOCK_POLL_INTERVAL)
+
+
+def _read_chunks(f: IO[bytes]) -> Iterator[bytes]:
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+_cache: Optional[ArchiveCache] = None
+
+
+def get_archive_cache() -> ArchiveCache:
+    """Caché compartida por todo el proceso."""
+    global _cache
+    if _cache is None:
+        _cache = ArchiveCache()
+    return _cache
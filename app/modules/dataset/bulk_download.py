@@ -0,0 +1,88 @@
+"""
+Descarga de varios datasets en un solo ZIP (una carpeta ``dataset_<id>/`` por dataset).
+
+El ZIP se genera en streaming con ``stream_zip``. Para proteger el servidor hay
+límites configurables por variables de entorno:
+
+- ``BULK_DOWNLOAD_MAX_DATASETS``: datasets por descarga (por defecto 100).
+- ``BULK_DOWNLOAD_MAX_BYTES``: tamaño total de los archivos (por defecto 2 GB).
+- ``BULK_DOWNLOAD_CONCURRENCY``: descargas múltiples a la vez en este proceso
+  (por defecto 2); al superarlo se responde 429 en lugar de encolar.
+"""
+
+import os
+import threading
+from typing import Iterable, Iterator, Optional
+
+from app.modules.dataset.zip_stream import stream_zip
+
+DEFAULT_MAX_DATASETS = 100
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2 GB
+DEFAULT_CONCURRENCY = 2
+
+
+def max_datasets() -> int:
+    return int(os.getenv("BULK_DOWNLOAD_MAX_DATASETS", DEFAULT_MAX_DATASETS))
+
+
+def max_bytes() -> int:
+    return int(os.getenv("BULK_DOWNLOAD_MAX_BYTES", DEFAULT_MAX_BYTES))
+
+
+class BulkDownloadSlots:
+    """Plazas para descargas múltiples simultáneas; una plaza se libera al terminar (o cortarse) su ZIP."""
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit if limit is not None else int(os.getenv("BULK_DOWNLOAD_CONCURRENCY", DEFAULT_CONCURRENCY))
+        self._semaphore = threading.BoundedSemaphore(max(1, self.limit))
+
+    def try_acquire(self) -> bool:
+        return self._semaphore.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+    def stream(self, entries: Iterable[tuple]) -> "_SlotStream":
+        """ZIP de ``entries`` que libera la plaza (ya adquirida) al acabar."""
+        return _SlotStream(stream_zip(entries), self)
+
+
+class _SlotStream:
+    """
+    Iterable para la respuesta. Un generador que nunca llega a arrancar no
+    ejecuta su ``finally``; Werkzeug sí llama siempre a ``close()``, así que la
+    plaza se libera aquí aunque el cliente corte antes del primer bloque.
+    """
+
+    def __init__(self, chunks: Iterator[bytes], slots: BulkDownloadSlots):
+        self._chunks = chunks
+        self._slots = slots
+        self._released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._chunks.close()
+        self._slots.release()
+
+
+_slots: Optional[BulkDownloadSlots] = None
+
+
+def get_bulk_download_slots() -> BulkDownloadSlots:
+    """Plazas compartidas por todo el proceso."""
+    global _slots
+    if _slots is None:
+        _slots = BulkDownloadSlots()
+    return _slots
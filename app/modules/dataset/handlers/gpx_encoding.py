@@ -0,0 +1,160 @@
+"""
+Codificaciones compactas de coordenadas para la API de GPX.
+
+- ``polyline``: Google Encoded Polyline con precisión 5 o 6 decimales.
+- ``binary``: enteros int32 little-endian con codificación delta, precedidos
+  de una cabecera JSON con el resumen del track::
+
+      uint32 LE   longitud N de la cabecera
+      N bytes     JSON UTF-8 (rellenado con espacios hasta múltiplo de 4)
+      int32 LE    lat0, lon0, dlat1, dlon1, ...  (grados * 10^precision)
+
+  El primer punto va en valor absoluto y el resto como diferencia con el
+  anterior. Como la cabecera queda alineada a 4 bytes, el cliente puede leer
+  los datos directamente con un ``Int32Array``.
+"""
+
+import json
+import struct
+from array import array
+from sys import byteorder
+from typing import Dict, List
+
+from app.modules.dataset.handlers.gpx_stats import HAS_NUMPY
+
+if HAS_NUMPY:
+    import numpy as np
+
+ENCODING_FORMATS = ("json", "polyline", "binary")
+PRECISIONS = (5, 6)
+BINARY_MIMETYPE = "application/octet-stream"
+
+
+def _scaled_deltas(coordinates: List[List[float]], precision: int):
+    """Coordenadas escaladas a enteros y convertidas a deltas (primer punto absoluto)."""
+    factor = 10**precision
+
+    if HAS_NUMPY:
+        scaled = np.rint(np.asarray(coordinates, dtype=np.float64).reshape(-1, 2) * factor).astype(np.int64)
+        deltas = np.empty_like(scaled)
+        if len(scaled):
+            deltas[0] = scaled[0]
+            deltas[1:] = np.diff(scaled, axis=0)
+        return deltas.reshape(-1)
+
+    deltas = []
+    previous_lat = previous_lon = 0
+    for lat, lon in coordinates:
+        scaled_lat, scaled_lon = round(lat * factor), round(lon * factor)
+        deltas.append(scaled_lat - previous_lat)
+        deltas.append(scaled_lon - previous_lon)
+        previous_lat, previous_lon = scaled_lat, scaled_lon
+    return deltas
+
+
+# ==========================================
+# GOOGLE ENCODED POLYLINE
+# ==========================================
+
+
+def encode_polyline(coordinates: List[List[float]], precision: int = 5) -> str:
+    """Codifica una lista de pares [lat, lon] como Google Encoded Polyline."""
+    deltas = _scaled_deltas(coordinates, precision)
+
+    if HAS_NUMPY:
+        return _encode_values_numpy(deltas)
+
+    chars = []
+    for value in deltas:
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return "".join(chars)
+
+
+def _encode_values_numpy(deltas) -> str:
+    """Versión vectorizada: cada valor se parte en grupos de 5 bits a la vez."""
+    if not len(deltas):
+        return ""
+
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+
+    # Un int32 con zigzag cabe en 7 grupos de 5 bits
+    shifts = np.arange(7, dtype=np.int64) * 5
+    groups = (values[:, None] >> shifts) & 0x1F
+    lengths = 1 + ((values[:, None] >> shifts[1:]) > 0).sum(axis=1)
+
+    used = np.arange(7)[None, :] < lengths[:, None]
+    continued = np.arange(7)[None, :] < (lengths - 1)[:, None]
+    chars = groups + np.where(continued, 0x20, 0) + 63
+
+    return chars[used].astype(np.uint8).tobytes().decode("ascii")
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[List[float]]:
+    """Decodifica un Google Encoded Polyline a pares [lat, lon]."""
+    factor = 10**precision
+    coordinates = []
+    index = lat = lon = 0
+
+    while index < len(encoded):
+        values = []
+        for _ in range(2):
+            result = shift = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            values.append(~(result >> 1) if result & 1 else result >> 1)
+
+        lat += values[0]
+        lon += values[1]
+        coordinates.append([lat / factor, lon / factor])
+
+    return coordinates
+
+
+# ==========================================
+# BINARIO DELTA INT32 LITTLE-ENDIAN
+# ==========================================
+
+
+def encode_binary(coordinates: List[List[float]], precision: int = 6, header: Dict = None) -> bytes:
+    """Empaqueta las coordenadas (y una cabecera JSON opcional) en el formato binario descrito arriba."""
+    header = dict(header or {}, precision=precision, points=len(coordinates))
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    header_bytes += b" " * (-len(header_bytes) % 4)
+
+    deltas = _scaled_deltas(coordinates, precision)
+    if HAS_NUMPY:
+        body = deltas.astype("<i4").tobytes()
+    else:
+        values = array("i", deltas)
+        if byteorder != "little":
+            values.byteswap()
+        body = values.tobytes()
+
+    return struct.pack("<I", len(header_bytes)) + header_bytes + body
+
+
+def decode_binary(data: bytes):
+    """Operación inversa de ``encode_binary``: devuelve (cabecera, coordenadas)."""
+    (header_length,) = struct.unpack_from("<I", data)
+    header_end = 4 + header_length
+    header = json.loads(data[4:header_end].decode("utf-8"))
+    factor = 10 ** header.get("precision", 6)
+
+    values = struct.unpack_from(f"<{(len(data) - header_end) // 4}i", data, header_end)
+    coordinates = []
+    lat = lon = 0
+    for i in range(0, len(values), 2):
+        lat += values[i]
+        lon += values[i + 1]
+        coordinates.append([lat / factor, lon / factor])
+
+    return header, coordinates
@@ -0,0 +1,74 @@
+"""
+Rejilla jerárquica lat/lon para el índice espacial de tracks GPX.
+
+En el nivel ``L`` el mundo se divide en ``2^L x 2^L`` celdas de
+``360/2^L`` grados de longitud por ``180/2^L`` de latitud. Cada track se
+indexa en el nivel más profundo en el que su bounding box ocupa como mucho
+2x2 celdas, así que nunca genera más de cuatro filas. Para buscar los tracks
+de un viewport basta una consulta por rangos de (nivel, x, y) en cada nivel,
+que se resuelve con el índice compuesto de la tabla.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+MAX_LEVEL = 20  # Celdas de ~0.0003 grados (~40 m en el ecuador)
+
+BBox = Tuple[float, float, float, float]  # (west, south, east, north)
+
+
+def _cell(value: float, lower: float, span: float, level: int) -> int:
+    cells = 1 << level
+    index = int((value - lower) / span * cells)
+    return min(max(index, 0), cells - 1)
+
+
+def cell_x(lon: float, level: int) -> int:
+    return _cell(lon, -180.0, 360.0, level)
+
+
+def cell_y(lat: float, level: int) -> int:
+    return _cell(lat, -90.0, 180.0, level)
+
+
+def cells_for_bounds(bounds: Dict) -> Tuple[int, List[Tuple[int, int]]]:
+    """Nivel y celdas (x, y) en las que se indexa un track con estos bounds."""
+    for level in range(MAX_LEVEL, -1, -1):
+        x0, x1 = cell_x(bounds["min_lon"], level), cell_x(bounds["max_lon"], level)
+        y0, y1 = cell_y(bounds["min_lat"], level), cell_y(bounds["max_lat"], level)
+        if x1 - x0 <= 1 and y1 - y0 <= 1:
+            return level, [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    return 0, [(0, 0)]
+
+
+def cell_ranges(bbox: BBox, level: int) -> Tuple[int, int, int, int]:
+    """Rango de celdas (x0, x1, y0, y1) que cubre un bbox en un nivel."""
+    west, south, east, north = bbox
+    return cell_x(west, level), cell_x(east, level), cell_y(south, level), cell_y(north, level)
+
+
+def split_antimeridian(bbox: BBox) -> List[BBox]:
+    """Un viewport que cruza el antimeridiano (west > east) se parte en dos."""
+    west, south, east, north = bbox
+    if west <= east:
+        return [bbox]
+    return [(west, south, 180.0, north), (-180.0, south, east, north)]
+
+
+def parse_bbox(value: Optional[str]) -> Optional[BBox]:
+    """
+    Parsea ``"west,south,east,north"`` (grados). Devuelve ``None`` si el valor
+    está vacío y lanza ``ValueError`` si no es un bbox válido.
+    """
+    if not value:
+        return None
+
+    parts = [part.strip() for part in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox must be 'west,south,east,north'")
+
+    west, south, east, north = (float(part) for part in parts)
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= north <= 90):
+        raise ValueError("bbox is out of range")
+
+    return west, south, east, north
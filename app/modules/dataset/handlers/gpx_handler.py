@@ -1,21 +1,32 @@
 import logging
-import math
-from typing import Dict, List, Tuple
-
-import gpxpy
-import gpxpy.gpx
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+
+from app.modules.dataset.handlers.gpx_stats import (
+    HAS_NUMPY,
+    TrackStatsAccumulator,
+    haversine,
+    python_bounds,
+    python_distance,
+    python_elevation,
+)
+from app.modules.dataset.handlers.gpx_stream import GPXStreamReader
 
 logger = logging.getLogger(__name__)
 
 
 class GPXHandler:
-    """Handler para archivos GPX."""
+    """
+    Handler para archivos GPX.
+
+    Los archivos se leen en streaming con ``GPXStreamReader`` (bloques de puntos
+    e ``iterparse``), así que la memoria usada no crece con el tamaño del GPX.
+    """
 
     def validate(self, file_path: str) -> bool:
         """Valida que el archivo GPX sea correcto."""
         try:
-            with open(file_path, "r", encoding="utf-8") as gpx_file:
-                gpxpy.parse(gpx_file)
+            self._read(file_path)
             logger.info(f"GPX validation passed: {file_path}")
             return True
         except Exception as e:
@@ -24,87 +35,80 @@ class GPXHandler:
 
     def parse_gpx(self, file_path: str) -> Dict:
         """Parsea un archivo GPX y extrae información relevante."""
-        with open(file_path, "r", encoding="utf-8") as gpx_file:
-            gpx = gpxpy.parse(gpx_file)
-
-        # Extraer coordenadas, elevaciones y tiempos
         coordinates = []
-        elevations = []
-        times = []
-
-        for track in gpx.tracks:
-            for segment in track.segments:
-                for point in segment.points:
-                    coordinates.append([point.latitude, point.longitude])
-                    if point.elevation is not None:
-                        elevations.append(point.elevation)
-                    if point.time:
-                        times.append(point.time)
-
-        # Calcular estadísticas
-        distance = self._calculate_distance(coordinates)
-        elevation_gain, elevation_loss = self._calculate_elevation(elevations)
-        duration = self._calculate_duration(times)
-        bounds = self._calculate_bounds(coordinates)
-
-        result = {
-            "coordinates": coordinates,
-            "distance": round(distance, 2),  # en metros
-            "elevation_gain": round(elevation_gain, 2),
-            "elevation_loss": round(elevation_loss, 2),
-            "duration": duration,  # en segundos
-            "points_count": len(coordinates),
-            "bounds": bounds,
-            "track_name": gpx.tracks[0].name if gpx.tracks else "Unnamed Track",
-        }
+        stats, track_name = self._read(file_path, coordinates)
+
+        result = {"coordinates": coordinates}
+        result.update(self._summarize(stats))
+        result["track_name"] = track_name
 
         logger.info(f"GPX parsed: {result['points_count']} points, {result['distance']}m distance")
         return result
 
-    def _calculate_distance(self, coordinates: List[List[float]]) -> float:
-        """Calcula distancia total usando fórmula de Haversine."""
-        if len(coordinates) < 2:
-            return 0.0
+    def compute_stats(self, file_path: str) -> Dict:
+        """
+        Calcula solo las estadísticas del track (sin devolver coordenadas).
+        Incluye además la hora de inicio y fin si el GPX tiene tiempos.
+        """
+        stats, track_name = self._read(file_path)
+        return self.stats_summary(stats, track_name)
+
+    def stats_summary(self, stats: TrackStatsAccumulator, track_name: Optional[str]) -> Dict:
+        """Resultado de ``compute_stats`` a partir de un acumulador ya completo (p. ej. el de la ingesta)."""
+        result = self._summarize(stats)
+        result["track_name"] = track_name
+        result["start_time"] = stats.start_time
+        result["end_time"] = stats.end_time
+        return result
 
-        total_distance = 0.0
-        for i in range(len(coordinates) - 1):
-            lat1, lon1 = coordinates[i]
-            lat2, lon2 = coordinates[i + 1]
-            total_distance += self._haversine(lat1, lon1, lat2, lon2)
+    def _read(
+        self, file_path: str, coordinates: Optional[List[List[float]]] = None
+    ) -> Tuple[TrackStatsAccumulator, Optional[str]]:
+        """
+        Recorre todos los tracks del archivo acumulando estadísticas por bloques.
+        Si se pasa ``coordinates`` se van añadiendo ahí los pares [lat, lon].
+        """
+        reader = GPXStreamReader()
+        stats = TrackStatsAccumulator(use_numpy=HAS_NUMPY)
 
-        return total_distance
+        try:
+            for chunk in reader.iter_chunks(file_path):
+                if coordinates is not None:
+                    coordinates.extend(chunk.coordinates)
+                stats.add(chunk.coordinates, chunk.elevations, chunk.times)
+        except ET.ParseError as e:
+            raise ValueError(f"XML parsing error - {str(e)}")
+
+        if reader.root_tag != "gpx":
+            raise ValueError("Document must have a `gpx` root node")
+
+        track_name = reader.track_name if reader.has_tracks else "Unnamed Track"
+        return stats, track_name
+
+    def _summarize(self, stats: TrackStatsAccumulator) -> Dict:
+        """Redondea las estadísticas acumuladas (NumPy si está disponible, Python puro si no)."""
+        result = stats.result()
+
+        return {
+            "distance": round(result["distance"], 2),  # en metros
+            "elevation_gain": round(result["elevation_gain"], 2),
+            "elevation_loss": round(result["elevation_loss"], 2),
+            "duration": result["duration"],  # en segundos
+            "points_count": result["points_count"],
+            "bounds": result["bounds"],
+        }
+
+    def _calculate_distance(self, coordinates: List[List[float]]) -> float:
+        """Calcula distancia total usando fórmula de Haversine."""
+        return python_distance(coordinates)
 
     def _haversine(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calcula distancia entre dos puntos usando Haversine (en metros)."""
-        R = 6371000  # Radio de la Tierra en metros
-
-        phi1 = math.radians(lat1)
-        phi2 = math.radians(lat2)
-        delta_phi = math.radians(lat2 - lat1)
-        delta_lambda = math.radians(lon2 - lon1)
-
-        a = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
-
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-        return R * c
+        return haversine(lat1, lon1, lat2, lon2)
 
     def _calculate_elevation(self, elevations: List[float]) -> Tuple[float, float]:
         """Calcula desnivel acumulado positivo y negativo."""
-        if len(elevations) < 2:
-            return 0.0, 0.0
-
-        gain = 0.0
-        loss = 0.0
-
-        for i in range(len(elevations) - 1):
-            diff = elevations[i + 1] - elevations[i]
-            if diff > 0:
-                gain += diff
-            else:
-                loss += abs(diff)
-
-        return gain, loss
+        return python_elevation(elevations)
 
     def _calculate_duration(self, times: List) -> float:
         """Calcula duración del track en segundos."""
@@ -116,10 +120,4 @@ class GPXHandler:
 
     def _calculate_bounds(self, coordinates: List[List[float]]) -> Dict:
         """Calcula bounding box del track."""
-        if not coordinates:
-            return {"min_lat": 0, "max_lat": 0, "min_lon": 0, "max_lon": 0}
-
-        lats = [c[0] for c in coordinates]
-        lons = [c[1] for c in coordinates]
-
-        return {"min_lat": min(lats), "max_lat": max(lats), "min_lon": min(lons), "max_lon": max(lons)}
+        return python_bounds(coordinates)
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Dict, Iterable, Optional
+
+from app.modules.dataset.handlers.gpx_handler import GPXHandler
+from app.modules.dataset.handlers.gpx_simplify import douglas_peucker
+
+logger = logging.getLogger(__name__)
+
+LOD_DIRNAME = ".lod"  # Carpeta oculta junto al archivo subido
+LOD_CACHE_VERSION = 3
+
+# Tolerancias (en metros) de los niveles precalculados, de más a menos detalle
+LOD_TOLERANCES = (2.0, 8.0, 32.0, 128.0)
+
+# Metros por píxel en el ecuador a zoom 0 (teselas de 256 px de Web Mercator)
+METERS_PER_PIXEL_Z0 = 156543.03392
+
+
+def tolerance_for_zoom(zoom: int) -> float:
+    """Tolerancia equivalente a un píxel de pantalla para un nivel de zoom de Leaflet."""
+    zoom = max(0, min(int(zoom), 22))
+    return METERS_PER_PIXEL_Z0 / (2**zoom)
+
+
+def pick_level(tolerance: Optional[float]) -> Optional[float]:
+    """
+    Nivel precalculado más simplificado cuyo error no supera ``tolerance``.
+
+    Devuelve ``None`` si hay que usar el track a resolución completa.
+    """
+    if tolerance is None:
+        return None
+
+    levels = [level for level in LOD_TOLERANCES if level <= tolerance]
+    return max(levels) if levels else None
+
+
+class GPXLODCache:
+    """
+    Niveles de detalle precalculados de un archivo GPX.
+
+    Para cada archivo se guarda en ``<carpeta del dataset>/.lod/<nombre>/`` un
+    JSON por nivel: ``<tolerancia>.json`` con el track simplificado con
+    Douglas-Peucker a cada tolerancia de ``LOD_TOLERANCES``, ``full.json`` con
+    el track completo y un ``summary.json`` pequeño con las estadísticas y los
+    bounds calculados a resolución completa. Cada petición lee solo el resumen
+    y el nivel que necesita, sin volver a parsear el archivo mientras la caché
+    sea válida. La caché se invalida si cambia el tamaño o la fecha de
+    modificación del archivo original.
+    """
+
+    SUMMARY = "summary"
+    FULL = "full"
+
+    def __init__(self, handler: Optional[GPXHandler] = None):
+        self.handler = handler or GPXHandler()
+
+    @staticmethod
+    def cache_dir(file_path: str) -> str:
+        directory, name = os.path.split(file_path)
+        return os.path.join(directory, LOD_DIRNAME, name)
+
+    @classmethod
+    def cache_path(cls, file_path: str, part: str) -> str:
+        """Ruta de una parte de la caché: ``SUMMARY``, ``FULL`` o la tolerancia de un nivel."""
+        return os.path.join(cls.cache_dir(file_path), f"{part}.json")
+
+    @classmethod
+    def level_part(cls, level: Optional[float]) -> str:
+        return cls.FULL if level is None else str(level)
+
+    @staticmethod
+    def _source_signature(file_path: str) -> Dict:
+        stat = os.stat(file_path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def load(self, file_path: str, part: str) -> Optional[Dict]:
+        """Lee una parte de la caché si existe y sigue siendo válida para el archivo."""
+        cache_path = self.cache_path(file_path, part)
+        if not os.path.exists(cache_path):
+            return None
+
+        try:
+            with open(cache_path, "r", encoding="utf-8") as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable LOD cache {cache_path}: {e}")
+            return None
+
+        if cached.get("version") != LOD_CACHE_VERSION or cached.get("source") != self._source_signature(file_path):
+            return None
+
+        return cached
+
+    def build(self, file_path: str, parsed: Optional[Dict] = None) -> Dict:
+        """
+        Parsea el archivo a resolución completa, calcula los niveles y guarda cada
+        parte en su archivo. Devuelve ``{"summary": ..., "levels": ..., "full": ...}``.
+        """
+        parsed = parsed or self.handler.parse_gpx(file_path)
+        coordinates = parsed["coordinates"]
+        header = {"version": LOD_CACHE_VERSION, "source": self._source_signature(file_path)}
+
+        built = {
+            "summary": {key: value for key, value in parsed.items() if key != "coordinates"},
+            "levels": {str(tolerance): douglas_peucker(coordinates, tolerance) for tolerance in LOD_TOLERANCES},
+            "full": coordinates,
+        }
+
+        self._write(self.cache_path(file_path, self.SUMMARY), {**header, "summary": built["summary"]})
+        for part, level_coordinates in [*built["levels"].items(), (self.FULL, coordinates)]:
+            self._write(self.cache_path(file_path, part), {**header, "coordinates": level_coordinates})
+        self._remove_single_file_cache(file_path)
+        return built
+
+    def track_data(self, file_path: str, tolerance: Optional[float]) -> Dict:
+        """
+        Datos del track con el mismo formato que ``GPXHandler.parse_gpx``, pero
+        con las coordenadas del nivel de detalle adecuado a ``tolerance``.
+
+        Distancia, desnivel, puntos y bounds son siempre los de resolución completa.
+        """
+        level = pick_level(tolerance)
+        part = self.level_part(level)
+
+        summary = self.load(file_path, self.SUMMARY)
+        cached_level = self.load(file_path, part) if summary else None
+        if cached_level is not None:
+            summary, coordinates = summary["summary"], cached_level["coordinates"]
+        else:
+            built = self.build(file_path)
+            summary = built["summary"]
+            coordinates = built["full"] if level is None else built["levels"][part]
+
+        result = {"coordinates": coordinates}
+        result.update(summary)
+        result["lod"] = {"tolerance": level or 0.0, "points": len(coordinates)}
+        return result
+
+    @staticmethod
+    def etag(checksums: Iterable[Optional[str]], tolerance: Optional[float], fmt: str) -> Optional[str]:
+        """
+        ETag (sin comillas) de los tracks de varios archivos servidos juntos:
+        cambia con el contenido de cualquiera, el nivel de detalle o el formato.
+        None si algún archivo no tiene checksum.
+        """
+        checksums = list(checksums)
+        if not all(checksums):
+            return None
+        digest = hashlib.sha256(",".join(checksums).encode()).hexdigest()[:32]
+        return f"{digest}-{pick_level(tolerance) or 0.0}-{fmt}-v{LOD_CACHE_VERSION}"
+
+    @staticmethod
+    def _remove_single_file_cache(file_path: str) -> None:
+        """Borra la caché de versiones anteriores (un solo ``.lod/<nombre>.json`` con todos los niveles)."""
+        directory, name = os.path.split(file_path)
+        try:
+            os.remove(os.path.join(directory, LOD_DIRNAME, f"{name}.json"))
+        except OSError:
+            pass
+
+    @staticmethod
+    def _write(cache_path: str, cached: Dict) -> None:
+        """Escritura atómica (archivo temporal + rename); si falla solo se registra."""
+        directory = os.path.dirname(cache_path)
+        tmp_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+                json.dump(cached, tmp_file, separators=(",", ":"))
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write LOD cache {cache_path}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
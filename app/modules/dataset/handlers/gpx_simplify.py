@@ -0,0 +1,112 @@
+import math
+from typing import List
+
+from app.modules.dataset.handlers.gpx_stats import EARTH_RADIUS, HAS_NUMPY
+
+if HAS_NUMPY:
+    import numpy as np
+
+
+def _project(coordinates: List[List[float]]):
+    """
+    Proyección equirectangular centrada en la latitud media.
+
+    Devuelve (x, y) en metros, suficiente para medir tolerancias de unos
+    pocos metros a cientos de metros dentro de un mismo track.
+    """
+    mean_lat = sum(c[0] for c in coordinates) / len(coordinates)
+    k = math.radians(1) * EARTH_RADIUS
+    kx = k * math.cos(math.radians(mean_lat))
+
+    return [(c[1] * kx, c[0] * k) for c in coordinates]
+
+
+def douglas_peucker(coordinates: List[List[float]], tolerance: float) -> List[List[float]]:
+    """
+    Simplifica un track con Douglas-Peucker.
+
+    ``tolerance`` es la distancia máxima en metros entre el track original y
+    el simplificado. El primer y el último punto siempre se conservan. Se usa
+    una pila en lugar de recursión para soportar tracks de cientos de miles
+    de puntos.
+    """
+    n = len(coordinates)
+    if n < 3 or tolerance <= 0:
+        return list(coordinates)
+
+    points = _project(coordinates)
+    if HAS_NUMPY:
+        keep = _keep_mask_numpy(np.asarray(points, dtype=np.float64), tolerance)
+    else:
+        keep = _keep_mask_python(points, tolerance)
+
+    return [coordinates[i] for i in range(n) if keep[i]]
+
+
+def _keep_mask_numpy(points, tolerance: float):
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        a = points[start]
+        d = points[end] - a
+        segment = points[slice(start + 1, end)] - a
+        length2 = float(d @ d)
+
+        if length2 == 0.0:
+            distances = np.hypot(segment[:, 0], segment[:, 1])
+        else:
+            t = np.clip(segment @ d / length2, 0.0, 1.0)
+            offset = segment - np.outer(t, d)
+            distances = np.hypot(offset[:, 0], offset[:, 1])
+
+        index = int(distances.argmax())
+        if distances[index] > tolerance:
+            split = start + 1 + index
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+
+    return keep
+
+
+def _keep_mask_python(points, tolerance: float) -> List[bool]:
+    n = len(points)
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        ax, ay = points[start]
+        dx, dy = points[end][0] - ax, points[end][1] - ay
+        length2 = dx * dx + dy * dy
+
+        max_distance = -1.0
+        split = start
+        for i in range(start + 1, end):
+            px, py = points[i][0] - ax, points[i][1] - ay
+            if length2 == 0.0:
+                distance = math.hypot(px, py)
+            else:
+                t = min(1.0, max(0.0, (px * dx + py * dy) / length2))
+                distance = math.hypot(px - t * dx, py - t * dy)
+            if distance > max_distance:
+                max_distance = distance
+                split = i
+
+        if max_distance > tolerance:
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+
+    return keep
@@ -0,0 +1,277 @@
+import logging
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy es opcional
+    np = None
+
+logger = logging.getLogger(__name__)
+
+HAS_NUMPY = np is not None
+
+EARTH_RADIUS = 6371000  # Radio de la Tierra en metros
+
+EMPTY_BOUNDS = {"min_lat": 0, "max_lat": 0, "min_lon": 0, "max_lon": 0}
+
+
+# ==========================================
+# RUTA DE PYTHON PURO (SIN NUMPY)
+# ==========================================
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calcula distancia entre dos puntos usando Haversine (en metros)."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS * c
+
+
+def python_distance(coordinates: List[List[float]]) -> float:
+    """Calcula distancia total usando fórmula de Haversine."""
+    if len(coordinates) < 2:
+        return 0.0
+
+    total_distance = 0.0
+    for i in range(len(coordinates) - 1):
+        lat1, lon1 = coordinates[i]
+        lat2, lon2 = coordinates[i + 1]
+        total_distance += haversine(lat1, lon1, lat2, lon2)
+
+    return total_distance
+
+
+def python_elevation(elevations: List[float]) -> Tuple[float, float]:
+    """Calcula desnivel acumulado positivo y negativo."""
+    if len(elevations) < 2:
+        return 0.0, 0.0
+
+    gain = 0.0
+    loss = 0.0
+
+    for i in range(len(elevations) - 1):
+        diff = elevations[i + 1] - elevations[i]
+        if diff > 0:
+            gain += diff
+        else:
+            loss += abs(diff)
+
+    return gain, loss
+
+
+def python_bounds(coordinates: List[List[float]]) -> Dict:
+    """Calcula bounding box del track."""
+    if not coordinates:
+        return dict(EMPTY_BOUNDS)
+
+    lats = [c[0] for c in coordinates]
+    lons = [c[1] for c in coordinates]
+
+    return {"min_lat": min(lats), "max_lat": max(lats), "min_lon": min(lons), "max_lon": max(lons)}
+
+
+class GPXStatsEngine:
+    """
+    Motor vectorizado de estadísticas de tracks GPX basado en NumPy.
+
+    Guarda latitudes, longitudes, elevaciones y tiempos como arrays float64
+    contiguos y calcula distancia (Haversine), desnivel, duración y bounding box
+    con operaciones por lotes en lugar de bucles de Python.
+
+    Los resultados coinciden con las funciones ``python_*`` de este módulo
+    (ruta de Python puro, usada cuando NumPy no está instalado).
+    """
+
+    def __init__(
+        self,
+        latitudes: Sequence[float],
+        longitudes: Sequence[float],
+        elevations: Sequence[float] = (),
+        times: Sequence[float] = (),
+    ):
+        if not HAS_NUMPY:
+            raise RuntimeError("NumPy is not installed")
+
+        self.latitudes = np.ascontiguousarray(latitudes, dtype=np.float64)
+        self.longitudes = np.ascontiguousarray(longitudes, dtype=np.float64)
+        # Solo puntos con elevación / tiempo, igual que la ruta de Python puro
+        self.elevations = np.ascontiguousarray(elevations, dtype=np.float64)
+        # Tiempos en segundos (relativos o epoch, solo importa la diferencia)
+        self.times = np.ascontiguousarray(times, dtype=np.float64)
+
+        if self.latitudes.shape != self.longitudes.shape:
+            raise ValueError("Latitudes and longitudes must have the same length")
+
+    @classmethod
+    def from_coordinates(cls, coordinates, elevations=(), times=()) -> "GPXStatsEngine":
+        """Construye el motor a partir de una lista de pares [lat, lon]."""
+        coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        return cls(coords[:, 0], coords[:, 1], elevations, times)
+
+    @property
+    def points_count(self) -> int:
+        return int(self.latitudes.size)
+
+    def distance(self) -> float:
+        """Distancia total en metros usando Haversine sobre todos los pares consecutivos."""
+        if self.latitudes.size < 2:
+            return 0.0
+
+        phi = np.radians(self.latitudes)
+        delta_phi = np.diff(phi)
+        delta_lambda = np.radians(np.diff(self.longitudes))
+
+        a = np.sin(delta_phi / 2) ** 2 + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(delta_lambda / 2) ** 2
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+        return float(EARTH_RADIUS * c.sum())
+
+    def elevation(self) -> Tuple[float, float]:
+        """Desnivel acumulado positivo y negativo."""
+        if self.elevations.size < 2:
+            return 0.0, 0.0
+
+        diffs = np.diff(self.elevations)
+        gain = diffs[diffs > 0].sum()
+        loss = -diffs[diffs < 0].sum()
+
+        return float(gain), float(loss)
+
+    def duration(self) -> float:
+        """Duración en segundos entre el primer y el último punto con tiempo."""
+        if self.times.size < 2:
+            return 0.0
+
+        return float(self.times[-1] - self.times[0])
+
+    def bounds(self) -> Dict:
+        """Bounding box del track."""
+        if self.latitudes.size == 0:
+            return dict(EMPTY_BOUNDS)
+
+        return {
+            "min_lat": float(self.latitudes.min()),
+            "max_lat": float(self.latitudes.max()),
+            "min_lon": float(self.longitudes.min()),
+            "max_lon": float(self.longitudes.max()),
+        }
+
+    def compute(self) -> Dict:
+        """Calcula todas las estadísticas (sin redondear)."""
+        elevation_gain, elevation_loss = self.elevation()
+
+        return {
+            "distance": self.distance(),
+            "elevation_gain": elevation_gain,
+            "elevation_loss": elevation_loss,
+            "duration": self.duration(),
+            "points_count": self.points_count,
+            "bounds": self.bounds(),
+        }
+
+
+class TrackStatsAccumulator:
+    """
+    Acumula las estadísticas de un track que se lee por bloques.
+
+    Cada bloque se procesa con ``GPXStatsEngine`` (o con la ruta de Python puro)
+    arrastrando el último punto y la última elevación del bloque anterior, de
+    modo que el resultado es el mismo que procesando el track entero de una vez
+    sin necesidad de tenerlo completo en memoria.
+    """
+
+    def __init__(self, use_numpy: bool = HAS_NUMPY):
+        self.use_numpy = use_numpy and HAS_NUMPY
+
+        self.distance = 0.0
+        self.elevation_gain = 0.0
+        self.elevation_loss = 0.0
+        self.points_count = 0
+        self.times_count = 0
+        self.start_time = None
+        self.end_time = None
+
+        self._bounds: Optional[Dict] = None
+        self._last_coordinate: Optional[List[float]] = None
+        self._last_elevation: Optional[float] = None
+
+    def add(self, coordinates: List[List[float]], elevations: Sequence[float] = (), times: Sequence = ()) -> None:
+        """Añade un bloque de puntos consecutivos al track."""
+        if coordinates:
+            if self._last_coordinate is not None:
+                coordinates = [self._last_coordinate] + list(coordinates)
+            self._add_coordinates(coordinates)
+            self._last_coordinate = coordinates[-1]
+
+        if elevations:
+            if self._last_elevation is not None:
+                elevations = [self._last_elevation] + list(elevations)
+            self._add_elevations(elevations)
+            self._last_elevation = elevations[-1]
+
+        if times:
+            if self.start_time is None:
+                self.start_time = times[0]
+            self.end_time = times[-1]
+            self.times_count += len(times)
+
+    def _add_coordinates(self, coordinates: List[List[float]]) -> None:
+        if self.use_numpy:
+            engine = GPXStatsEngine.from_coordinates(coordinates)
+            self.distance += engine.distance()
+            bounds = engine.bounds()
+        else:
+            self.distance += python_distance(coordinates)
+            bounds = python_bounds(coordinates)
+
+        # El punto arrastrado del bloque anterior no es nuevo
+        self.points_count += len(coordinates) - (1 if self.points_count else 0)
+        self._merge_bounds(bounds)
+
+    def _add_elevations(self, elevations: Sequence[float]) -> None:
+        if self.use_numpy:
+            gain, loss = GPXStatsEngine([], [], elevations=elevations).elevation()
+        else:
+            gain, loss = python_elevation(list(elevations))
+
+        self.elevation_gain += gain
+        self.elevation_loss += loss
+
+    def _merge_bounds(self, bounds: Dict) -> None:
+        if self._bounds is None:
+            self._bounds = dict(bounds)
+            return
+
+        self._bounds["min_lat"] = min(self._bounds["min_lat"], bounds["min_lat"])
+        self._bounds["max_lat"] = max(self._bounds["max_lat"], bounds["max_lat"])
+        self._bounds["min_lon"] = min(self._bounds["min_lon"], bounds["min_lon"])
+        self._bounds["max_lon"] = max(self._bounds["max_lon"], bounds["max_lon"])
+
+    def duration(self) -> float:
+        """Duración en segundos entre el primer y el último punto con tiempo."""
+        if self.times_count < 2:
+            return 0.0
+
+        return (self.end_time - self.start_time).total_seconds()
+
+    def bounds(self) -> Dict:
+        return dict(self._bounds) if self._bounds is not None else dict(EMPTY_BOUNDS)
+
+    def result(self) -> Dict:
+        """Estadísticas acumuladas (sin redondear), con las mismas claves que ``GPXStatsEngine.compute``."""
+        return {
+            "distance": self.distance,
+            "elevation_gain": self.elevation_gain,
+            "elevation_loss": self.elevation_loss,
+            "duration": self.duration(),
+            "points_count": self.points_count,
+            "bounds": self.bounds(),
+        }
@@ -0,0 +1,218 @@
+import logging
+import xml.etree.ElementTree as ET
+from typing import Iterator, List, Optional
+
+from gpxpy.gpxfield import parse_time
+
+from app.modules.hubfile.storage import open_upload
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000  # Puntos por bloque
+
+
+def local_name(tag: str) -> str:
+    """Nombre de la etiqueta sin namespace ('{ns}trkpt' -> 'trkpt')."""
+    return tag.rsplit("}", 1)[-1]
+
+
+class GPXPointChunk:
+    """
+    Bloque de puntos de track leídos de forma consecutiva.
+
+    ``elevations`` y ``times`` solo contienen los puntos que los tienen,
+    igual que las listas que construía ``GPXHandler`` con gpxpy.
+    """
+
+    __slots__ = ("coordinates", "elevations", "times")
+
+    def __init__(self):
+        self.coordinates: List[List[float]] = []
+        self.elevations: List[float] = []
+        self.times: List = []
+
+    def __len__(self) -> int:
+        return len(self.coordinates)
+
+
+class GPXStreamReader:
+    """
+    Lector GPX en streaming basado en ``xml.etree.ElementTree.iterparse``.
+
+    Recorre el documento evento a evento, entrega los puntos de track en bloques
+    de tamaño fijo y elimina del árbol cada elemento en cuanto se ha procesado,
+    de modo que la memoria usada no depende del tamaño del archivo.
+
+    Además de leer un archivo con ``iter_chunks`` admite un modo push
+    (``feed``/``close``) en el que el llamador va entregando los bytes, para
+    poder procesar el documento a la vez que se calcula su hash.
+
+    Tras recorrer el archivo quedan disponibles ``root_tag``, ``track_name``,
+    ``tracks_count``, ``waypoints_count`` y ``points_count``.
+    """
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+
+        self.chunk_size = chunk_size
+        self.root_tag: Optional[str] = None
+        self.track_name: Optional[str] = None
+        self.tracks_count = 0
+        self.waypoints_count = 0
+        self.points_count = 0
+
+        self._stack: List[ET.Element] = []
+        self._point_depth = 0  # > 0 mientras estamos dentro de un <trkpt>
+        self._chunk = GPXPointChunk()
+        self._parser: Optional[ET.XMLPullParser] = None
+
+    @property
+    def has_tracks(self) -> bool:
+        return self.tracks_count > 0
+
+    @property
+    def has_waypoints(self) -> bool:
+        return self.waypoints_count > 0
+
+    def iter_chunks(self, file_path: str) -> Iterator[GPXPointChunk]:
+        """
+        Lee el archivo y va devolviendo bloques de puntos.
+
+        Lanza ``ET.ParseError`` si el XML está mal formado y ``ValueError`` si
+        algún punto tiene atributos o valores inválidos.
+        """
+        with open_upload(file_path) as f:
+            for event, elem in ET.iterparse(f, events=("start", "end")):
+                chunk = self.handle(event, elem)
+                if chunk is not None:
+                    yield chunk
+
+        chunk = self.flush()
+        if chunk is not None:
+            yield chunk
+
+    def read_all(self, file_path: str) -> None:
+        """Recorre el archivo entero descartando los puntos (solo metadatos y validación)."""
+        for _ in self.iter_chunks(file_path):
+            pass
+
+    def feed(self, data: bytes) -> List[GPXPointChunk]:
+        """
+        Modo push: procesa un bloque de bytes del documento y devuelve los
+        bloques de puntos que se han completado con él.
+        """
+        if self._parser is None:
+            self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._parser.feed(data)
+        return self._read_events()
+
+    def close(self) -> List[GPXPointChunk]:
+        """Termina el modo push (``ET.ParseError`` si el documento está incompleto) y vacía el último bloque."""
+        if self._parser is None:
+            self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._parser.close()
+
+        chunks = self._read_events()
+        chunk = self.flush()
+        if chunk is not None:
+            chunks.append(chunk)
+        return chunks
+
+    def _read_events(self) -> List[GPXPointChunk]:
+        chunks = []
+        for event, elem in self._parser.read_events():
+            chunk = self.handle(event, elem)
+            if chunk is not None:
+                chunks.append(chunk)
+        return chunks
+
+    def handle(self, event: str, elem: ET.Element) -> Optional[GPXPointChunk]:
+        """
+        Procesa un evento ``start``/``end`` del parser.
+
+        Devuelve un bloque cuando se completa, o ``None``.
+        """
+        if event == "start":
+            self._start(elem)
+            return None
+
+        self._end(elem)
+        if len(self._chunk) >= self.chunk_size:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[GPXPointChunk]:
+        """Devuelve el bloque pendiente (si tiene puntos) y empieza uno nuevo."""
+        if not len(self._chunk):
+            return None
+
+        chunk, self._chunk = self._chunk, GPXPointChunk()
+        return chunk
+
+    def _start(self, elem: ET.Element) -> None:
+        if self.root_tag is None:
+            self.root_tag = local_name(elem.tag)
+
+        name = local_name(elem.tag)
+        if self._point_depth:
+            self._point_depth += 1
+        elif name == "trkpt":
+            self._point_depth = 1
+        elif name == "trk":
+            self.tracks_count += 1
+        elif name == "wpt":
+            self.waypoints_count += 1
+
+        self._stack.append(elem)
+
+    def _end(self, elem: ET.Element) -> None:
+        self._stack.pop()
+        parent = self._stack[-1] if self._stack else None
+
+        if self._point_depth:
+            self._point_depth -= 1
+            if self._point_depth:
+                # Hijo de <trkpt> (ele, time...): se lee al cerrar el punto
+                return
+            self._read_point(elem)
+        elif (
+            self.tracks_count == 1
+            and self.track_name is None
+            and parent is not None
+            and local_name(elem.tag) == "name"
+            and local_name(parent.tag) == "trk"
+        ):
+            self.track_name = elem.text
+
+        # El elemento ya está procesado: se vacía y se quita del padre
+        elem.clear()
+        if parent is not None:
+            parent.remove(elem)
+
+    def _read_point(self, elem: ET.Element) -> None:
+        try:
+            latitude = float(elem.attrib["lat"])
+            longitude = float(elem.attrib["lon"])
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Invalid track point coordinates: {e}")
+
+        self._chunk.coordinates.append([latitude, longitude])
+        self.points_count += 1
+
+        for child in elem:
+            name = local_name(child.tag)
+            text = (child.text or "").strip()
+            if not text:
+                continue
+
+            if name == "ele":
+                try:
+                    self._chunk.elevations.append(float(text))
+                except ValueError as e:
+                    raise ValueError(f"Invalid track point elevation: {e}")
+            elif name == "time":
+                try:
+                    self._chunk.times.append(parse_time(text))
+                except Exception as e:
+                    raise ValueError(f"Invalid track point time: {e}")
@@ -0,0 +1,201 @@
+"""
+Ingesta de archivos en una sola pasada.
+
+Cada archivo se lee una única vez, en bloques de ``INGEST_CHUNK_SIZE`` bytes, y
+cada bloque se entrega a la vez a los hashes (MD5 para el checksum y SHA-256
+para el almacén de contenidos, ver ``hubfile/blob_store.py``) y al
+``IngestSink`` del tipo de dataset, que valida el contenido y extrae sus estadísticas mientras se lee.
+Los handlers de ``registry.py`` declaran su sink con ``ingest_sink()``; un tipo
+nuevo solo tiene que implementarlo para entrar en el mismo pipeline.
+
+La ingesta se hace al subir el archivo a la carpeta temporal; su resultado se
+guarda al lado (``remember_ingestion``) y al crear el dataset o añadir el archivo
+se recupera (``recall_ingestion``) en lugar de volver a leerlo.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+INGEST_CHUNK_SIZE = 64 * 1024
+INGESTED_DIR = ".ingested"
+
+
+class IngestSink:
+    """
+    Consumidor de los bytes de un archivo durante la ingesta. ``errors`` son los
+    problemas de validación que no rechazan el archivo (se guardan aparte); None
+    si el tipo no hace esa validación. ``model`` es el modelo que el tipo haya
+    construido al leerlo (el ``FeatureModel`` de un UVL), para no volver a parsearlo.
+    """
+
+    errors: Optional[List[str]] = None
+    model: Any = None
+
+    def feed(self, data: bytes) -> None:
+        """Procesa un bloque. Lanza ``ValueError`` en cuanto detecta que el archivo no es válido."""
+        raise NotImplementedError
+
+    def close(self) -> Optional[Dict]:
+        """Termina la lectura: lanza ``ValueError`` si el archivo no es válido y devuelve sus estadísticas (o None)."""
+        raise NotImplementedError
+
+
+class IngestionResult:
+    """
+    Resultado de ingerir un archivo: checksum, SHA-256, tamaño, estadísticas del
+    tipo, errores de validación que no lo rechazan y modelo parseado (ver
+    ``IngestSink``).
+    """
+
+    __slots__ = ("kind", "checksum", "size", "stats", "sha256", "errors", "model")
+
+    def __init__(
+        self,
+        kind: Optional[str],
+        checksum: str,
+        size: int,
+        stats: Optional[Dict] = None,
+        sha256: Optional[str] = None,
+        errors: Optional[List[str]] = None,
+        model: Any = None,
+    ):
+        self.kind = kind
+        self.checksum = checksum
+        self.size = size
+        self.stats = stats
+        self.sha256 = sha256
+        self.errors = errors
+        self.model = model
+
+    def __repr__(self):
+        return f"IngestionResult<{self.kind} {self.checksum} {self.size}B>"
+
+
+def iter_file_chunks(file_path: str, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+    """Lee el archivo en bloques de tamaño fijo (``INGEST_CHUNK_SIZE`` por defecto)."""
+    chunk_size = chunk_size or INGEST_CHUNK_SIZE
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            yield chunk
+
+
+def check_file(file_path: str) -> int:
+    """Comprueba que el archivo existe y no está vacío. Devuelve su tamaño."""
+    if not os.path.exists(file_path):
+        raise ValueError("File not found")
+
+    size = os.path.getsize(file_path)
+    if size == 0:
+        raise ValueError("File is empty")
+    return size
+
+
+def feed_file(file_path: str, sink: IngestSink) -> Optional[Dict]:
+    """Pasa un archivo completo por un sink (validación sin hash)."""
+    check_file(file_path)
+    for chunk in iter_file_chunks(file_path):
+        sink.feed(chunk)
+    return sink.close()
+
+
+def ingest_file(file_path: str, handler, kind: Optional[str] = None) -> IngestionResult:
+    """
+    Valida, calcula el MD5 y el SHA-256 y extrae las estadísticas de un archivo leyéndolo una sola vez.
+
+    Si el handler no tiene sink propio se calcula el hash en streaming y se
+    valida después con ``handler.validate``.
+    """
+    size = check_file(file_path)
+    sink = handler.ingest_sink()
+    hasher = hashlib.md5()
+    sha256 = hashlib.sha256()
+
+    for chunk in iter_file_chunks(file_path):
+        hasher.update(chunk)
+        sha256.update(chunk)
+        if sink is not None:
+            sink.feed(chunk)
+
+    if sink is None:
+        handler.validate(file_path)
+        return IngestionResult(kind, hasher.hexdigest(), size, sha256=sha256.hexdigest())
+
+    stats = sink.close()
+    return IngestionResult(
+        kind, hasher.hexdigest(), size, stats, sha256=sha256.hexdigest(), errors=sink.errors, model=sink.model
+    )
+
+
+def _ingested_path(file_path: str) -> str:
+    directory, name = os.path.split(file_path)
+    return os.path.join(directory, INGESTED_DIR, f"{name}.json")
+
+
+def _source(file_path: str) -> Dict:
+    st = os.stat(file_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _decode(obj: Dict):
+    if obj.keys() == {"$datetime"}:
+        return datetime.fromisoformat(obj["$datetime"])
+    return obj
+
+
+def remember_ingestion(file_path: str, result: IngestionResult) -> None:
+    """
+    Guarda junto al archivo (en ``.ingested/``) el resultado de su ingesta, sin el
+    modelo parseado. Solo vale mientras el archivo no cambie de tamaño ni de mtime.
+    """
+    data = {
+        "source": _source(file_path),
+        "kind": result.kind,
+        "checksum": result.checksum,
+        "size": result.size,
+        "stats": result.stats,
+        "sha256": result.sha256,
+        "errors": result.errors,
+    }
+    path = _ingested_path(file_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, default=_encode)
+
+
+def recall_ingestion(file_path: str, kind: Optional[str] = None) -> Optional[IngestionResult]:
+    """
+    Resultado guardado por ``remember_ingestion`` si sigue siendo válido para el
+    archivo, o None. Se consume: el archivo se mueve a continuación.
+    """
+    path = _ingested_path(file_path)
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f, object_hook=_decode)
+        source = _source(file_path)
+    except (OSError, ValueError):
+        return None
+    finally:
+        forget_ingestion(file_path)
+
+    if data.get("source") != source or data.get("kind") != kind:
+        return None
+    return IngestionResult(
+        kind, data["checksum"], data["size"], data["stats"], sha256=data["sha256"], errors=data["errors"]
+    )
+
+
+def forget_ingestion(file_path: str) -> None:
+    """Borra el resultado guardado de un archivo (si lo hay)."""
+    try:
+        os.remove(_ingested_path(file_path))
+    except OSError:
+        pass
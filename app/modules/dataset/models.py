@@ -126,8 +126,13 @@ class BaseDataset(db.Model):
         return [file for fm in self.feature_models for file in fm.files]
 
     def delete(self):
+        from app.modules.hubfile.services import BlobService
+
+        blob_service = BlobService()
+        sha256s = blob_service.dataset_references(self)
         db.session.delete(self)
         db.session.commit()
+        blob_service.release(sha256s)
 
     def _normalize_publication_type(self):
         """
@@ -301,20 +306,20 @@ class UVLDataset(BaseDataset):
         # Plantilla parcial específica (si la tienes)
         return "dataset/blocks/uvl_tree.html"
 
+    def uvl_metrics(self) -> dict:
+        """
+        Totales de los modelos UVL del dataset (features, constraints, profundidad máxima).
+        Se leen con un único SUM de las métricas guardadas al ingerir cada archivo
+        (tabla fm_metrics); las de archivos antiguos se calculan con ``rosemary uvl:metrics``.
+        """
+        from app.modules.featuremodel.services import FMMetricsService
+
+        return FMMetricsService().totals_for_dataset(self)
+
     def calculate_total_features(self):
         """Calcular total de features en todos los modelos UVL"""
         try:
-            from flamapy.metamodels.fm_metamodel.transformations import UVLReader
-
-            total = 0
-            for feature_model in self.feature_models:
-                for file in feature_model.files:
-                    try:
-                        fm = UVLReader(file.get_path()).transform()
-                        total += len(fm.get_features())
-                    except Exception:
-                        continue
-            return total
+            return self.uvl_metrics()["features"]
         except Exception as e:
             logger.error(f"Error calculating total features: {e}")
             return 0
@@ -322,17 +327,7 @@ class UVLDataset(BaseDataset):
     def calculate_total_constraints(self):
         """Calcular total de constraints en todos los modelos UVL"""
         try:
-            from flamapy.metamodels.fm_metamodel.transformations import UVLReader
-
-            total = 0
-            for feature_model in self.feature_models:
-                for file in feature_model.files:
-                    try:
-                        fm = UVLReader(file.get_path()).transform()
-                        total += len(fm.get_constraints())
-                    except Exception:
-                        continue
-            return total
+            return self.uvl_metrics()["constraints"]
         except Exception as e:
             logger.error(f"Error calculating total constraints: {e}")
             return 0
@@ -341,6 +336,10 @@ class UVLDataset(BaseDataset):
 class GPXDataset(BaseDataset):
     __mapper_args__ = {"polymorphic_identity": "gpx"}
 
+    # Totales desnormalizados (suma de gpx_track_stats) para filtrar y ordenar en explore sin parsear archivos
+    total_distance = db.Column(db.Float, index=True)  # metros
+    total_elevation_gain = db.Column(db.Float, index=True)  # metros
+
     @classmethod
     def kind(cls) -> str:
         return "gpx"
@@ -357,69 +356,31 @@ class GPXDataset(BaseDataset):
         except Exception:
             return False
 
-    def calculate_total_distance(self):
-        """Calcular distancia total de todos los tracks"""
-        from app.modules.dataset.handlers.gpx_handler import GPXHandler
+    def track_totals(self) -> dict:
+        """
+        Totales de todos los tracks del dataset (distancia, desniveles y puntos).
+        Se leen de la tabla gpx_track_stats con un único SUM en SQL; los archivos
+        antiguos sin estadísticas se calculan con ``rosemary gpx:stats``.
+        """
+        from app.modules.dataset.services import GPXTrackStatsService
 
-        handler = GPXHandler()
-        total = 0
+        return GPXTrackStatsService().totals_for_dataset(self)
 
-        for fm in self.feature_models:
-            for file in fm.files:
-                if file.name.lower().endswith(".gpx"):
-                    file_path = file.get_path()
-                    data = handler.parse_gpx(file_path)
-                    if data:
-                        total += data.get("distance", 0)
-        return total
+    def calculate_total_distance(self):
+        """Calcular distancia total de todos los tracks"""
+        return self.track_totals()["distance"]
 
     def calculate_total_elevation_gain(self):
         """Calcular desnivel positivo total"""
-        from app.modules.dataset.handlers.gpx_handler import GPXHandler
-
-        handler = GPXHandler()
-        total = 0
-
-        for fm in self.feature_models:
-            for file in fm.files:
-                if file.name.lower().endswith(".gpx"):
-                    file_path = file.get_path()
-                    data = handler.parse_gpx(file_path)
-                    if data:
-                        total += data.get("elevation_gain", 0)
-        return total
+        return self.track_totals()["elevation_gain"]
 
     def calculate_total_elevation_loss(self):
         """Calcular desnivel negativo total"""
-        from app.modules.dataset.handlers.gpx_handler import GPXHandler
-
-        handler = GPXHandler()
-        total = 0
-
-        for fm in self.feature_models:
-            for file in fm.files:
-                if file.name.lower().endswith(".gpx"):
-                    file_path = file.get_path()
-                    data = handler.parse_gpx(file_path)
-                    if data:
-                        total += data.get("elevation_loss", 0)
-        return total
+        return self.track_totals()["elevation_loss"]
 
     def count_total_points(self):
         """Contar total de puntos GPS"""
-        from app.modules.dataset.handlers.gpx_handler import GPXHandler
-
-        handler = GPXHandler()
-        total = 0
-
-        for fm in self.feature_models:
-            for file in fm.files:
-                if file.name.lower().endswith(".gpx"):
-                    file_path = file.get_path()
-                    data = handler.parse_gpx(file_path)
-                    if data:
-                        total += data.get("points_count", 0)
-        return total
+        return self.track_totals()["points_count"]
 
     def count_tracks(self):
         """Contar número de tracks GPX"""
@@ -431,6 +392,84 @@ class GPXDataset(BaseDataset):
         return count
 
 
+class GPXTrackStats(db.Model):
+    """
+    Estadísticas de un archivo GPX, calculadas una sola vez al ingerir el archivo.
+    La fila solo es válida mientras el checksum coincida con el del Hubfile.
+    """
+
+    __tablename__ = "gpx_track_stats"
+    __table_args__ = (db.UniqueConstraint("hubfile_id", "checksum", name="uq_gpx_track_stats_hubfile_checksum"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    hubfile_id = db.Column(db.Integer, db.ForeignKey("file.id"), nullable=False, index=True)
+    checksum = db.Column(db.String(120), nullable=False)
+
+    distance = db.Column(db.Float, nullable=False, default=0)  # metros
+    elevation_gain = db.Column(db.Float, nullable=False, default=0)
+    elevation_loss = db.Column(db.Float, nullable=False, default=0)
+    points_count = db.Column(db.Integer, nullable=False, default=0)
+    duration = db.Column(db.Float, nullable=False, default=0)  # segundos
+
+    min_lat = db.Column(db.Float)
+    max_lat = db.Column(db.Float)
+    min_lon = db.Column(db.Float)
+    max_lon = db.Column(db.Float)
+
+    start_time = db.Column(db.DateTime)
+    end_time = db.Column(db.DateTime)
+
+    # Error si el archivo no se pudo parsear: la fila (con métricas a 0) evita reintentarlo
+    parse_error = db.Column(db.String(255))
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    hubfile = db.relationship("Hubfile", backref=db.backref("gpx_track_stats", lazy=True, cascade="all, delete-orphan"))
+
+    def bounds(self) -> dict:
+        return {"min_lat": self.min_lat, "max_lat": self.max_lat, "min_lon": self.min_lon, "max_lon": self.max_lon}
+
+    def to_dict(self):
+        return {
+            "hubfile_id": self.hubfile_id,
+            "checksum": self.checksum,
+            "distance": self.distance,
+            "elevation_gain": self.elevation_gain,
+            "elevation_loss": self.elevation_loss,
+            "points_count": self.points_count,
+            "duration": self.duration,
+            "bounds": self.bounds(),
+            "start_time": self.start_time.isoformat() if self.start_time else None,
+            "end_time": self.end_time.isoformat() if self.end_time else None,
+            "parse_error": self.parse_error,
+        }
+
+    def __repr__(self):
+        return f"GPXTrackStats<file={self.hubfile_id}, distance={self.distance}>"
+
+
+class GPXTrackCell(db.Model):
+    """
+    Índice espacial de tracks GPX: celdas de la rejilla jerárquica (ver
+    ``handlers/gpx_grid.py``) que cubren el bounding box de cada track.
+    """
+
+    __tablename__ = "gpx_track_cell"
+    __table_args__ = (db.Index("ix_gpx_track_cell_level_x_y", "level", "cell_x", "cell_y"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    track_stats_id = db.Column(db.Integer, db.ForeignKey("gpx_track_stats.id"), nullable=False, index=True)
+    dataset_id = db.Column(db.Integer, db.ForeignKey("data_set.id"), nullable=False, index=True)
+    level = db.Column(db.SmallInteger, nullable=False)
+    cell_x = db.Column(db.Integer, nullable=False)
+    cell_y = db.Column(db.Integer, nullable=False)
+
+    track_stats = db.relationship("GPXTrackStats", backref=db.backref("cells", lazy=True, cascade="all, delete-orphan"))
+
+    def __repr__(self):
+        return f"GPXTrackCell<level={self.level}, x={self.cell_x}, y={self.cell_y}>"
+
+
 class DatasetVersion(db.Model):
     """Modelo genérico para versiones de cualquier tipo de dataset"""
 
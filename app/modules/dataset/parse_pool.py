@@ -0,0 +1,361 @@
+"""
+Parseo en paralelo de los archivos de un dataset.
+
+Las operaciones que recorren todos los archivos de un dataset (snapshot de una
+versión, totales UVL, estadísticas GPX pendientes) reparten los archivos entre
+un ``ProcessPoolExecutor`` acotado en lugar de parsearlos uno a uno en el hilo
+de la petición. Cada archivo tiene su propio timeout, que empieza cuando un
+worker lo recoge, y sus errores quedan aislados en su ``ParseResult``: un
+archivo corrupto o que tarda demasiado no impide obtener el resultado del
+resto, ni afecta a otras llamadas que estén usando el pool a la vez.
+
+Configuración (variables de entorno):
+
+- ``PARSE_POOL_WORKERS``: número de procesos (por defecto, los núcleos
+  disponibles). Con ``0`` todo se parsea en el proceso actual.
+- ``PARSE_POOL_TIMEOUT``: segundos máximos por archivo (por defecto 60).
+"""
+
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 60.0
+QUEUE_TIMEOUT = 120.0  # Espera máxima a que un worker recoja una tarea (incluye su arranque)
+POLL_INTERVAL = 0.1
+
+
+# ==========================================
+# FUNCIONES DE PARSEO (se ejecutan en los procesos del pool)
+# ==========================================
+
+
+def uvl_file_metrics(file_path: str, checksum: Optional[str] = None) -> Dict:
+    """Métricas de un modelo UVL (``feature_model_metrics``), vía la caché de modelos por checksum."""
+    from app.modules.featuremodel.metrics import feature_model_metrics
+    from app.modules.flamapy.cache import get_feature_model_cache
+
+    return feature_model_metrics(get_feature_model_cache().get(checksum, file_path))
+
+
+def uvl_feature_names(file_path: str, checksum: Optional[str] = None) -> List[str]:
+    """Nombres de las features de un modelo UVL, vía la caché de modelos por checksum."""
+    from app.modules.featuremodel.feature_names import feature_names
+    from app.modules.flamapy.cache import get_feature_model_cache
+
+    return feature_names(get_feature_model_cache().get(checksum, file_path))
+
+
+def uvl_file_errors(file_path: str) -> List[str]:
+    """Errores de la gramática UVL (ANTLR) de un archivo; lista vacía si es válido."""
+    from app.modules.flamapy.validation import validate_uvl_file
+
+    return validate_uvl_file(file_path)
+
+
+def gpx_file_stats(file_path: str) -> Dict:
+    """Estadísticas de un track GPX (mismo formato que ``GPXHandler.compute_stats``)."""
+    from app.modules.dataset.handlers.gpx_handler import GPXHandler
+
+    return GPXHandler().compute_stats(file_path)
+
+
+_started = None  # En cada worker, la cola por la que avisa de las tareas que empieza
+
+
+def _init_worker(started) -> None:
+    """
+    Arranque de un worker: guarda la cola de avisos e importa los parsers (GPX y
+    gramática UVL) antes de aceptar tareas. No crea la aplicación Flask.
+    """
+    global _started
+    _started = started
+    import app.modules.dataset.handlers.gpx_handler  # noqa: F401
+    import app.modules.flamapy.validation  # noqa: F401
+
+
+def _run_task(task_id: int, func: Callable[..., Any], *args: Any) -> Any:
+    """Avisa de que la tarea empieza (desde ese momento corre su timeout) y la ejecuta."""
+    _started.put(task_id)
+    return func(*args)
+
+
+# ==========================================
+# POOL
+# ==========================================
+
+
+class ParseResult:
+    """Resultado del parseo de un archivo: ``value`` si fue bien, ``error`` si no."""
+
+    __slots__ = ("path", "value", "error")
+
+    def __init__(self, path: str, value: Any = None, error: Optional[str] = None):
+        self.path = path
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        return f"ParseResult<{self.path} {'ok' if self.ok else self.error}>"
+
+
+class _StuckWorkers(Exception):
+    """Un worker se ha quedado bloqueado (timeout) o ninguno recoge las tareas."""
+
+
+class _Workers:
+    """
+    Un ``ProcessPoolExecutor`` con la cola por la que sus workers avisan de
+    cada tarea que empiezan y las llamadas a ``ParsePool`` que lo están usando.
+    """
+
+    def __init__(self, max_workers: int):
+        context = multiprocessing.get_context("spawn")
+        self.started = context.Queue()
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=context, initializer=_init_worker, initargs=(self.started,)
+        )
+        self.users = 0
+        self.retired = False
+        self._start_times: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, task_id: int, func: Callable[..., Any], call: tuple) -> Future:
+        return self.executor.submit(_run_task, task_id, func, *call)
+
+    def started_at(self, task_id: int) -> Optional[float]:
+        """Momento (``time.monotonic``) en que un worker empezó la tarea; None si sigue en cola."""
+        with self._lock:
+            while True:
+                try:
+                    self._start_times[self.started.get_nowait()] = time.monotonic()
+                except (queue.Empty, OSError, ValueError):
+                    break
+            return self._start_times.get(task_id)
+
+    def forget(self, task_id: int) -> None:
+        with self._lock:
+            self._start_times.pop(task_id, None)
+
+    def close(self, kill: bool = False) -> None:
+        """Cierra el executor. Con ``kill`` termina además los procesos que sigan ocupados."""
+        if kill:
+            # ProcessPoolExecutor no permite cancelar una tarea en curso: la única
+            # forma de liberar un worker bloqueado es terminar su proceso.
+            for process in list((getattr(self.executor, "_processes", None) or {}).values()):
+                process.terminate()
+        self.executor.shutdown(wait=not kill, cancel_futures=True)
+        self.started.close()
+
+
+class ParsePool:
+    """
+    Pool de procesos compartido para parsear archivos de datasets.
+
+    Se crea la primera vez que hace falta y se reutiliza entre peticiones. Usa
+    el método de arranque ``spawn``, que no hereda del proceso web las
+    conexiones abiertas ni el estado de gevent.
+
+    Un timeout solo afecta a la llamada en la que ocurre: el executor con el
+    worker bloqueado se retira (las llamadas nuevas y el resto de esa llamada
+    van a uno nuevo), las demás llamadas que lo estaban usando terminan con él
+    y sus procesos se terminan cuando lo suelta la última.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: Optional[float] = None):
+        if max_workers is None:
+            max_workers = int(os.getenv("PARSE_POOL_WORKERS", os.cpu_count() or 1))
+        if timeout is None:
+            timeout = float(os.getenv("PARSE_POOL_TIMEOUT", DEFAULT_TIMEOUT))
+
+        self.max_workers = max(0, max_workers)
+        self.timeout = timeout
+        self._workers: Optional[_Workers] = None
+        self._task_ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def map(self, func: Callable[..., Any], paths: List[str], *extra: List[Any]) -> List[ParseResult]:
+        """
+        Aplica ``func`` (función de módulo, serializable) a cada ruta. Como en
+        ``map()``, cada lista de ``extra`` aporta un argumento más por ruta.
+
+        Devuelve un ``ParseResult`` por ruta, en el mismo orden. Con un solo
+        archivo o sin workers se parsea en el proceso actual (sin timeout).
+        """
+        results: List[Optional[ParseResult]] = [None] * len(paths)
+        for index, result in self.imap(func, paths, *extra):
+            results[index] = result
+        return results
+
+    def imap(self, func: Callable[..., Any], paths: List[str], *extra: List[Any]) -> Iterator[Tuple[int, ParseResult]]:
+        """Como ``map()``, pero va devolviendo ``(índice, resultado)`` según termina cada archivo."""
+        return self._iter_calls(func, [(path, *args) for path, *args in zip(paths, *extra)])
+
+    def _iter_calls(self, func: Callable[..., Any], calls: List[tuple]) -> Iterator[Tuple[int, ParseResult]]:
+        if self.max_workers == 0 or len(calls) <= 1:
+            for index, call in enumerate(calls):
+                yield index, self._run_inline(func, call)
+            return
+
+        finished = set()
+        failure = None
+        workers = self._acquire()
+        try:
+            for index, result in self._iter_pooled(workers, func, calls):
+                finished.add(index)
+                yield index, result
+        except (BrokenProcessPool, _StuckWorkers) as e:
+            failure = e
+        finally:
+            self._release(workers, retire=failure is not None)
+
+        if failure is None:
+            return
+        remaining = [index for index in range(len(calls)) if index not in finished]
+        if isinstance(failure, BrokenProcessPool):
+            logger.error(f"Parse pool broken, parsing {len(remaining)} files inline: {failure}")
+            for index in remaining:
+                yield index, self._run_inline(func, calls[index])
+        else:
+            # El resto de esta llamada se reparte en un executor nuevo
+            for sub_index, result in self._iter_calls(func, [calls[index] for index in remaining]):
+                yield remaining[sub_index], result
+
+    def shutdown(self, kill: bool = False) -> None:
+        """Cierra el pool. Con ``kill`` termina además los procesos que sigan ocupados."""
+        with self._lock:
+            workers, self._workers = self._workers, None
+
+        if workers is not None:
+            workers.close(kill)
+
+    @staticmethod
+    def _run_inline(func: Callable[..., Any], call: tuple) -> ParseResult:
+        path = call[0]
+        try:
+            return ParseResult(path, value=func(*call))
+        except Exception as e:
+            logger.warning(f"Could not parse {path}: {e}")
+            return ParseResult(path, error=str(e) or e.__class__.__name__)
+
+    def _acquire(self) -> _Workers:
+        with self._lock:
+            if self._workers is None:
+                self._workers = _Workers(self.max_workers)
+            self._workers.users += 1
+            return self._workers
+
+    def _release(self, workers: _Workers, retire: bool = False) -> None:
+        """
+        Una llamada deja de usar ``workers``. Con ``retire`` (worker bloqueado
+        o pool roto) las llamadas nuevas ya no lo reciben; sus procesos se
+        terminan cuando lo suelta la última llamada que lo usaba.
+        """
+        with self._lock:
+            workers.users -= 1
+            if retire:
+                workers.retired = True
+                if self._workers is workers:
+                    self._workers = None
+            close = workers.retired and workers.users == 0
+        if close:
+            workers.close(kill=True)
+
+    def _iter_pooled(
+        self, workers: _Workers, func: Callable[..., Any], calls: List[tuple]
+    ) -> Iterator[Tuple[int, ParseResult]]:
+        """
+        Cada archivo tiene ``timeout`` segundos desde que un worker lo empieza,
+        así que ni el arranque de los procesos ni la espera detrás de otras
+        llamadas cuentan. Nunca hay más tareas de esta llamada en vuelo que
+        workers. Lanza ``_StuckWorkers`` tras devolver los archivos que se
+        pasan de tiempo (su worker sigue ocupado) o si en ``QUEUE_TIMEOUT``
+        ningún worker recoge una tarea.
+        """
+        pending = iter(range(len(calls)))
+        in_flight = {}  # future -> (índice, id de tarea, momento de envío)
+
+        def submit_next() -> bool:
+            index = next(pending, None)
+            if index is None:
+                return False
+            task_id = next(self._task_ids)
+            in_flight[workers.submit(task_id, func, calls[index])] = (index, task_id, time.monotonic())
+            return True
+
+        def deadline(task_id: int, submitted: float) -> Tuple[float, bool]:
+            started = workers.started_at(task_id)
+            if started is None:
+                return submitted + QUEUE_TIMEOUT, False
+            return started + self.timeout, True
+
+        for _ in range(self.max_workers):
+            if not submit_next():
+                break
+
+        while in_flight:
+            now = time.monotonic()
+            deadlines = [deadline(task_id, submitted) for _, task_id, submitted in in_flight.values()]
+            # Mientras haya tareas en cola se consulta a menudo si ya han empezado
+            next_check = min(when if running else min(when, now + POLL_INTERVAL) for when, running in deadlines)
+            done, _ = wait(in_flight, timeout=max(0.0, next_check - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index, task_id, _ = in_flight.pop(future)
+                workers.forget(task_id)
+                path = calls[index][0]
+                try:
+                    result = ParseResult(path, value=future.result())
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Could not parse {path}: {e}")
+                    result = ParseResult(path, error=str(e) or e.__class__.__name__)
+                submit_next()
+                yield index, result
+
+            now = time.monotonic()
+            expired, stalled = [], False
+            for future, (index, task_id, submitted) in in_flight.items():
+                when, running = deadline(task_id, submitted)
+                if when <= now and not future.done():
+                    if running:
+                        expired.append(future)
+                    else:
+                        stalled = True
+
+            for future in expired:
+                index, task_id, _ = in_flight.pop(future)
+                workers.forget(task_id)
+                logger.error(f"Parsing {calls[index][0]} timed out after {self.timeout}s")
+                yield index, ParseResult(calls[index][0], error=f"Timed out after {self.timeout}s")
+
+            if expired or stalled:
+                for future, (_, task_id, _) in in_flight.items():
+                    future.cancel()
+                    workers.forget(task_id)
+                raise _StuckWorkers()
+
+
+_pool: Optional[ParsePool] = None
+
+
+def get_parse_pool() -> ParsePool:
+    """Pool compartido por todo el proceso."""
+    global _pool
+    if _pool is None:
+        _pool = ParsePool()
+    return _pool
@@ -1,12 +1,19 @@
+import codecs
 import logging
 import os
 import xml.etree.ElementTree as ET
-from typing import Type
+from typing import Dict, Optional, Type
 
 from flask_wtf import FlaskForm
 
 from app.modules.dataset.forms import GPXFeatureModelForm, UVLFeatureModelForm
+from app.modules.dataset.handlers.gpx_handler import GPXHandler as GPXTrackHandler
+from app.modules.dataset.handlers.gpx_stats import HAS_NUMPY, TrackStatsAccumulator
+from app.modules.dataset.handlers.gpx_stream import GPXStreamReader
+from app.modules.dataset.ingestion import IngestionResult, IngestSink, feed_file, ingest_file, recall_ingestion
 from app.modules.dataset.models import BaseDataset, GPXDataset, UVLDataset
+from app.modules.flamapy.cache import feature_model_from_tree
+from app.modules.flamapy.validation import parse_uvl_text
 
 logger = logging.getLogger(__name__)
 
@@ -21,55 +28,130 @@ class DataTypeHandler:
     def validate(self, filepath: str) -> bool:
         raise NotImplementedError
 
+    def ingest_sink(self) -> Optional[IngestSink]:
+        """
+        Sink que valida (y extrae estadísticas) mientras se lee el archivo en la ingesta.
+        Si un tipo no lo define, la ingesta valida con ``validate`` tras calcular el hash.
+        """
+        return None
+
+
+class UVLIngestSink(IngestSink):
+    """
+    Busca la sección "features" en streaming (también si queda partida entre dos
+    bloques) y, si ``with_grammar`` es True, parsea al final el modelo con la
+    gramática ANTLR. Los errores de gramática no rechazan el archivo: quedan en
+    ``errors`` para guardar el veredicto por checksum. Si no hay errores, el
+    mismo árbol da el ``FeatureModel`` de flamapy (``model``), del que salen
+    métricas, índice de features y artefactos sin volver a parsear el archivo.
+    """
+
+    TOKEN = "features"
+
+    def __init__(self, with_grammar: bool = True):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._tail = ""
+        self._found = False
+        self._text = [] if with_grammar else None
+
+    def feed(self, data: bytes) -> None:
+        text = self._decoder.decode(data)
+        if self._text is not None:
+            self._text.append(text)
+        if self._found:
+            return
+
+        window = self._tail + text.lower()
+        self._found = self.TOKEN in window
+        self._tail = window[-(len(self.TOKEN) - 1) :]
+
+    def close(self) -> Optional[Dict]:
+        self._decoder.decode(b"", final=True)
+        # Validación básica: debe contener "features"
+        if not self._found:
+            raise ValueError("Invalid UVL file: missing 'features' section")
+
+        if self._text is None:
+            return None
+
+        tree, self.errors = parse_uvl_text("".join(self._text))
+        if not self.errors:
+            try:
+                self.model = feature_model_from_tree(tree)
+            except Exception as e:
+                # Se volverá a intentar desde el archivo cuando se necesite el modelo
+                logger.warning(f"Could not build feature model during ingestion: {e}")
+        return None
+
 
 class UVLHandler(DataTypeHandler):
     ext = ".uvl"
     name = "uvl"
 
     def validate(self, filepath: str) -> bool:
-        if not os.path.exists(filepath):
-            raise ValueError("File not found")
-        if os.path.getsize(filepath) == 0:
-            raise ValueError("File is empty")
+        feed_file(filepath, UVLIngestSink(with_grammar=False))
+        return True
 
-        with open(filepath, "r", encoding="utf-8") as f:
-            content = f.read()
-            # Validación básica: debe contener "features"
-            if "features" not in content.lower():
-                raise ValueError("Invalid UVL file: missing 'features' section")
+    def ingest_sink(self) -> IngestSink:
+        return UVLIngestSink()
 
-        return True
 
+class GPXIngestSink(IngestSink):
+    """
+    Valida un GPX en streaming y, si ``with_stats`` es True, acumula a la vez sus
+    estadísticas (mismo resultado que ``GPXTrackHandler.compute_stats``).
+    """
 
-class GPXHandler(DataTypeHandler):
-    ext = ".gpx"
-    name = "gpx"
+    def __init__(self, with_stats: bool = True):
+        self.reader = GPXStreamReader()
+        self.stats = TrackStatsAccumulator(use_numpy=HAS_NUMPY) if with_stats else None
 
-    def validate(self, filepath: str) -> bool:
-        if not os.path.exists(filepath):
-            raise ValueError("File not found")
-        if os.path.getsize(filepath) == 0:
-            raise ValueError("File is empty")
+    def feed(self, data: bytes) -> None:
+        self._add(self._call(self.reader.feed, data))
 
-        try:
-            tree = ET.parse(filepath)
-            root = tree.getroot()
+    def close(self) -> Optional[Dict]:
+        self._add(self._call(self.reader.close))
 
-            # Verificar que es un archivo GPX válido
-            if not root.tag.endswith("gpx"):
-                raise ValueError("Invalid GPX file: root element is not <gpx>")
+        # Verificar que es un archivo GPX válido
+        if not self.reader.root_tag.endswith("gpx"):
+            raise ValueError("Invalid GPX file: root element is not <gpx>")
 
-            # Verificar que tiene al menos un track o waypoint
-            namespaces = {"gpx": "http://www.topografix.com/GPX/1/1"}
-            tracks = root.findall(".//gpx:trk", namespaces) or root.findall(".//trk")
-            waypoints = root.findall(".//gpx:wpt", namespaces) or root.findall(".//wpt")
+        # Verificar que tiene al menos un track o waypoint
+        if not self.reader.has_tracks and not self.reader.has_waypoints:
+            raise ValueError("Invalid GPX file: no tracks or waypoints found")
 
-            if not tracks and not waypoints:
-                raise ValueError("Invalid GPX file: no tracks or waypoints found")
+        if self.stats is None:
+            return None
+        track_name = self.reader.track_name if self.reader.has_tracks else "Unnamed Track"
+        return GPXTrackHandler().stats_summary(self.stats, track_name)
 
-            return True
+    @staticmethod
+    def _call(method, *args):
+        try:
+            return method(*args)
         except ET.ParseError as e:
             raise ValueError(f"Invalid GPX file: XML parsing error - {str(e)}")
+        except ValueError as e:
+            raise ValueError(f"Invalid GPX file: {str(e)}")
+
+    def _add(self, chunks) -> None:
+        if self.stats is None:
+            return
+        for chunk in chunks:
+            self.stats.add(chunk.coordinates, chunk.elevations, chunk.times)
+
+
+class GPXHandler(DataTypeHandler):
+    ext = ".gpx"
+    name = "gpx"
+
+    def validate(self, filepath: str) -> bool:
+        # Lectura en streaming: la memoria no depende del tamaño del archivo
+        feed_file(filepath, GPXIngestSink(with_stats=False))
+        return True
+
+    def ingest_sink(self) -> IngestSink:
+        return GPXIngestSink()
 
 
 # === Descriptor de tipo de dataset ===
@@ -100,6 +182,16 @@ class DatasetTypeDescriptor:
         self.icon = icon  # ✅ NUEVO
         self.color = color  # ✅ NUEVO
 
+    def ingest(self, file_path: str) -> IngestionResult:
+        """
+        Valida, calcula el checksum y extrae las estadísticas del archivo en una sola
+        lectura, o reutiliza el resultado guardado al subirlo (ver ``remember_ingestion``).
+        """
+        recalled = recall_ingestion(file_path, self.kind)
+        if recalled is not None:
+            return recalled
+        return ingest_file(file_path, self.handler, kind=self.kind)
+
 
 # === Registro global de tipos ===
 DATASET_TYPE_REGISTRY = {
@@ -3,10 +3,22 @@ from datetime import datetime, timezone
 from typing import List, Optional
 
 from flask_login import current_user
-from sqlalchemy import desc, func
+from sqlalchemy import and_, desc, func, insert, or_
 
+from app.modules.dataset.handlers.gpx_grid import MAX_LEVEL, BBox, cell_ranges, cells_for_bounds, split_antimeridian
 from app.modules.dataset.models import BaseDataset  # 👈 usar el mapper base para consultas polimórficas
-from app.modules.dataset.models import Author, Comment, DOIMapping, DSDownloadRecord, DSMetaData, DSViewRecord
+from app.modules.dataset.models import (
+    Author,
+    Comment,
+    DOIMapping,
+    DSDownloadRecord,
+    DSMetaData,
+    DSViewRecord,
+    GPXTrackCell,
+    GPXTrackStats,
+)
+from app.modules.featuremodel.models import FeatureModel
+from app.modules.hubfile.models import Hubfile
 from core.repositories.BaseRepository import BaseRepository
 
 logger = logging.getLogger(__name__)
@@ -25,6 +37,25 @@ class DSDownloadRecordRepository(BaseRepository):
         max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
         return max_id if max_id is not None else 0
 
+    def downloaded_dataset_ids(self, dataset_ids: List[int], user_id: Optional[int], download_cookie: str) -> set:
+        """Datasets de la lista que ya tienen registro para este usuario y cookie."""
+        rows = (
+            self.session.query(self.model.dataset_id)
+            .filter(
+                self.model.dataset_id.in_(dataset_ids),
+                self.model.user_id == user_id,
+                self.model.download_cookie == download_cookie,
+            )
+            .all()
+        )
+        return {dataset_id for (dataset_id,) in rows}
+
+    def create_many(self, rows: List[dict]) -> None:
+        """Inserta todos los registros en una sola sentencia (executemany) y una transacción."""
+        if rows:
+            self.session.execute(insert(self.model), rows)
+        self.session.commit()
+
 
 class DSMetaDataRepository(BaseRepository):
     def __init__(self):
@@ -93,6 +124,27 @@ class DataSetRepository(BaseRepository):
             .first()
         )
 
+    def get_downloadable_by_ids(self, dataset_ids: List[int], user_id: Optional[int] = None) -> List[BaseDataset]:
+        """Datasets de ``dataset_ids`` que están publicados (con DOI) o son de ``user_id``."""
+        visible = DSMetaData.dataset_doi.isnot(None)
+        if user_id is not None:
+            visible = or_(visible, BaseDataset.user_id == user_id)
+        return (
+            self.model.query.join(DSMetaData)
+            .filter(BaseDataset.id.in_(dataset_ids), visible)
+            .order_by(BaseDataset.id)
+            .all()
+        )
+
+    def total_file_size(self, dataset_ids: List[int]) -> int:
+        """Suma de los tamaños de los archivos de los datasets, con una sola consulta."""
+        return (
+            self.session.query(func.coalesce(func.sum(Hubfile.size), 0))
+            .join(FeatureModel, FeatureModel.id == Hubfile.feature_model_id)
+            .filter(FeatureModel.data_set_id.in_(dataset_ids))
+            .scalar()
+        )
+
     def count_synchronized_datasets(self):
         return self.model.query.join(DSMetaData).filter(DSMetaData.dataset_doi.isnot(None)).count()
 
@@ -109,6 +161,130 @@ class DataSetRepository(BaseRepository):
         )
 
 
+class GPXTrackStatsRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(GPXTrackStats)
+
+    def get_for_hubfile(self, hubfile_id: int, checksum: str) -> Optional[GPXTrackStats]:
+        return self.model.query.filter_by(hubfile_id=hubfile_id, checksum=checksum).first()
+
+    def get_hubfiles_without_stats(self, dataset_id: Optional[int] = None) -> List[Hubfile]:
+        """
+        Archivos GPX sin estadísticas para su checksum actual (p.ej. subidos antes de
+        existir la tabla), de un dataset o de todos. Los que fallaron al parsear ya tienen fila.
+        """
+        query = (
+            self.session.query(Hubfile)
+            .join(FeatureModel, FeatureModel.id == Hubfile.feature_model_id)
+            .outerjoin(
+                GPXTrackStats,
+                (GPXTrackStats.hubfile_id == Hubfile.id) & (GPXTrackStats.checksum == Hubfile.checksum),
+            )
+            .filter(func.lower(Hubfile.name).like("%.gpx"), GPXTrackStats.id.is_(None))
+        )
+        if dataset_id is not None:
+            query = query.filter(FeatureModel.data_set_id == dataset_id)
+        return query.all()
+
+    def sum_for_dataset(self, dataset_id: int) -> dict:
+        """Suma en SQL las estadísticas de todos los tracks del dataset."""
+        row = (
+            self.session.query(
+                func.coalesce(func.sum(GPXTrackStats.distance), 0),
+                func.coalesce(func.sum(GPXTrackStats.elevation_gain), 0),
+                func.coalesce(func.sum(GPXTrackStats.elevation_loss), 0),
+                func.coalesce(func.sum(GPXTrackStats.points_count), 0),
+            )
+            .join(
+                Hubfile,
+                (Hubfile.id == GPXTrackStats.hubfile_id) & (Hubfile.checksum == GPXTrackStats.checksum),
+            )
+            .join(FeatureModel, FeatureModel.id == Hubfile.feature_model_id)
+            .filter(FeatureModel.data_set_id == dataset_id)
+            .one()
+        )
+        distance, elevation_gain, elevation_loss, points_count = row
+        return {
+            "distance": float(distance),
+            "elevation_gain": float(elevation_gain),
+            "elevation_loss": float(elevation_loss),
+            "points_count": int(points_count),
+        }
+
+
+class GPXTrackCellRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(GPXTrackCell)
+
+    def index_track(self, track_stats: GPXTrackStats, dataset_id: int) -> List[GPXTrackCell]:
+        """Añade al índice espacial las celdas que cubren el bounding box del track."""
+        if track_stats.min_lat is None or not track_stats.points_count:
+            return []
+
+        level, cells = cells_for_bounds(track_stats.bounds())
+        rows = [
+            GPXTrackCell(track_stats=track_stats, dataset_id=dataset_id, level=level, cell_x=x, cell_y=y)
+            for x, y in cells
+        ]
+        self.session.add_all(rows)
+        return rows
+
+    def get_stats_without_cells(self, dataset_id: Optional[int] = None) -> List[tuple]:
+        """Pares (estadísticas, dataset_id) de tracks con puntos que aún no están en el índice."""
+        query = (
+            self.session.query(GPXTrackStats, FeatureModel.data_set_id)
+            .join(Hubfile, Hubfile.id == GPXTrackStats.hubfile_id)
+            .join(FeatureModel, FeatureModel.id == Hubfile.feature_model_id)
+            .outerjoin(GPXTrackCell, GPXTrackCell.track_stats_id == GPXTrackStats.id)
+            .filter(GPXTrackCell.id.is_(None), GPXTrackStats.points_count > 0)
+        )
+        if dataset_id is not None:
+            query = query.filter(FeatureModel.data_set_id == dataset_id)
+        return query.all()
+
+    def dataset_ids_in_bbox(self, bbox: BBox):
+        """
+        Subconsulta con los ids de datasets que tienen algún track cuyo bounding
+        box intersecta ``bbox`` (west, south, east, north).
+
+        Primero se acota por rangos de celdas en cada nivel (índice compuesto
+        level, cell_x, cell_y) y después se comprueba la intersección exacta
+        con los bounds guardados del track.
+        """
+        cell_filters = []
+        intersects = []
+        for box in split_antimeridian(bbox):
+            west, south, east, north = box
+            for level in range(MAX_LEVEL + 1):
+                x0, x1, y0, y1 = cell_ranges(box, level)
+                cell_filters.append(
+                    and_(
+                        GPXTrackCell.level == level,
+                        GPXTrackCell.cell_x.between(x0, x1),
+                        GPXTrackCell.cell_y.between(y0, y1),
+                    )
+                )
+            intersects.append(
+                and_(
+                    GPXTrackStats.min_lon <= east,
+                    GPXTrackStats.max_lon >= west,
+                    GPXTrackStats.min_lat <= north,
+                    GPXTrackStats.max_lat >= south,
+                )
+            )
+
+        return (
+            self.session.query(GPXTrackCell.dataset_id)
+            .join(GPXTrackStats, GPXTrackStats.id == GPXTrackCell.track_stats_id)
+            .join(
+                Hubfile,
+                (Hubfile.id == GPXTrackStats.hubfile_id) & (Hubfile.checksum == GPXTrackStats.checksum),
+            )
+            .filter(or_(*cell_filters), or_(*intersects))
+            .distinct()
+        )
+
+
 class DOIMappingRepository(BaseRepository):
     def __init__(self):
         super().__init__(DOIMapping)
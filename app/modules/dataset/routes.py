@@ -3,13 +3,12 @@ import logging
 import os
 import re
 import shutil
-import tempfile
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
-from zipfile import ZipFile
 
 from flask import (
+    Response,
     abort,
     flash,
     jsonify,
@@ -17,8 +16,6 @@ from flask import (
     redirect,
     render_template,
     request,
-    send_file,
-    send_from_directory,
     url_for,
 )
 from flask_login import current_user, login_required
@@ -28,8 +25,10 @@ from werkzeug.utils import secure_filename
 from app import db
 from app.modules.community.services import CommunityService
 from app.modules.dataset import dataset_bp
+from app.modules.dataset.archive_cache import ArchiveCache, get_archive_cache
 from app.modules.dataset.fetchers.base import FetchError
 from app.modules.dataset.forms import DataSetForm
+from app.modules.dataset.ingestion import forget_ingestion
 from app.modules.dataset.models import BaseDataset, DatasetVersion, DSDownloadRecord, PublicationType
 from app.modules.dataset.registry import (
     get_allowed_extensions,
@@ -44,9 +43,12 @@ from app.modules.dataset.services import (
     DSDownloadRecordService,
     DSMetaDataService,
     DSViewRecordService,
+    GPXTrackStatsService,
     VersionService,
-    calculate_checksum_and_size,
 )
+from app.modules.hubfile.delivery import deliver_file
+from app.modules.hubfile.services import BlobService
+from app.modules.hubfile.storage import store_upload
 from app.modules.zenodo.services import ZenodoService
 
 logger = logging.getLogger(__name__)
@@ -309,8 +311,9 @@ def publish_dataset(dataset_id):
                 # Calculate specific metrics if needed
                 if hasattr(version, "total_features"):
                     try:
-                        version.total_features = dataset.calculate_total_features() or 0
-                        version.total_constraints = dataset.calculate_total_constraints() or 0
+                        metrics = dataset.uvl_metrics()
+                        version.total_features = metrics["features"]
+                        version.total_constraints = metrics["constraints"]
                         version.model_count = (
                             dataset.feature_models.count()
                             if hasattr(dataset.feature_models, "count")
@@ -367,10 +370,10 @@ def upload():
     file.save(file_path)
 
     kind = infer_kind_from_filename(new_filename)
-    descriptor = get_descriptor(kind)
 
+    # Ingesta completa ahora; al crear el dataset se reutiliza su resultado
     try:
-        descriptor.handler.validate(file_path)
+        dataset_service.ingest_upload(file_path, kind)
     except Exception as e:
         if os.path.exists(file_path):
             os.remove(file_path)
@@ -467,6 +470,7 @@ def delete():
 
     if os.path.exists(filepath):
         os.remove(filepath)
+        forget_ingestion(filepath)
         return jsonify({"message": "File deleted successfully"}), 200
 
     return jsonify({"error": "Error: File not found"}), 404
@@ -478,40 +482,14 @@ def delete():
 @dataset_bp.route("/dataset/download/<int:dataset_id>", methods=["GET"])
 def download_dataset(dataset_id):
     dataset = dataset_service.get_or_404(dataset_id)
-    base_path = f"uploads/user_{dataset.user_id}/dataset_{dataset.id}/"
-
-    temp_dir = tempfile.mkdtemp()
-    zip_path = os.path.join(temp_dir, f"dataset_{dataset_id}.zip")
-
-    with ZipFile(zip_path, "w") as zipf:
-        for subdir, _, files in os.walk(base_path):
-            for file in files:
-                full_path = os.path.join(subdir, file)
-                relative_path = os.path.relpath(full_path, base_path)
-                zipf.write(
-                    full_path,
-                    arcname=os.path.join(os.path.basename(zip_path[:-4]), relative_path),
-                )
+
+    key = ArchiveCache.dataset_key(dataset.id, dataset_service.archive_fingerprint(dataset))
+    resp = _send_archive(key, lambda: dataset_service.stream_zip(dataset), f"dataset_{dataset_id}.zip")
 
     user_cookie = request.cookies.get("download_cookie")
     if not user_cookie:
         user_cookie = str(uuid.uuid4())
-        resp = make_response(
-            send_from_directory(
-                temp_dir,
-                f"dataset_{dataset_id}.zip",
-                as_attachment=True,
-                mimetype="application/zip",
-            )
-        )
         resp.set_cookie("download_cookie", user_cookie)
-    else:
-        resp = send_from_directory(
-            temp_dir,
-            f"dataset_{dataset_id}.zip",
-            as_attachment=True,
-            mimetype="application/zip",
-        )
 
     existing_record = DSDownloadRecord.query.filter_by(
         user_id=current_user.id if current_user.is_authenticated else None,
@@ -519,7 +497,8 @@ def download_dataset(dataset_id):
         download_cookie=user_cookie,
     ).first()
 
-    if not existing_record:
+    # Una revalidación (304) no es una descarga
+    if not existing_record and resp.status_code != 304:
         DSDownloadRecordService().create(
             user_id=current_user.id if current_user.is_authenticated else None,
             dataset_id=dataset_id,
@@ -530,6 +509,42 @@ def download_dataset(dataset_id):
     return resp
 
 
+def _send_archive(key: str, build, download_name: str):
+    """
+    ZIP de la caché si ya está generado; si no, se genera mientras se envía
+    (transferencia chunked, sin archivo temporal) y queda guardado para la siguiente.
+
+    La clave identifica el contenido, así que sirve de ETag: una revalidación
+    recibe 304 sin generar nada. Los ZIP guardados admiten Range (206) para
+    reanudar descargas; si llega un Range sin ZIP guardado, se genera primero.
+    """
+    cache = get_archive_cache()
+    etag = cache.etag(key)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    path = cache.lookup(key)
+    if path is None and request.range is not None:
+        path = cache.ensure(key, build())
+    if path is not None:
+        # Con FILE_DELIVERY=x-accel el ZIP guardado lo envía nginx
+        return deliver_file(
+            path, mimetype="application/zip", as_attachment=True, download_name=download_name, etag=etag
+        )
+
+    # build() resuelve aquí las rutas: el generador se consume ya fuera del contexto de la petición
+    response = Response(
+        cache.stream(key, build()),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={download_name}"},
+    )
+    response.set_etag(etag)
+    response.accept_ranges = "bytes"
+    return response
+
+
 # ========== DOI RESOLVER ==========
 
 
@@ -596,12 +611,56 @@ def get_unsynchronized_dataset(dataset_id):
 # ========== GPX API ==========
 
 
+def _gpx_upload_dir(user_id, dataset_id) -> str:
+    """Carpeta de uploads de un dataset tal y como la resuelve la API de GPX."""
+    from flask import current_app
+
+    project_root = os.path.dirname(current_app.root_path)
+    return os.path.join(project_root, "uploads", f"user_{user_id}", f"dataset_{dataset_id}")
+
+
+def _gpx_tolerance_from_request():
+    """Tolerancia de simplificación pedida con ``?tolerance=<metros>`` o ``?zoom=<nivel>``."""
+    from app.modules.dataset.handlers.gpx_lod import tolerance_for_zoom
+
+    tolerance = request.args.get("tolerance", type=float)
+    zoom = request.args.get("zoom", type=int)
+    if tolerance is None and zoom is not None:
+        tolerance = tolerance_for_zoom(zoom)
+    return tolerance
+
+
 @dataset_bp.route("/api/gpx/<int:file_id>")
 def get_gpx_data(file_id):
-    """Retorna datos parseados de un archivo GPX."""
-    from flask import current_app, jsonify
+    """
+    Retorna datos parseados de un archivo GPX.
+
+    Con ``?zoom=<nivel de Leaflet>`` o ``?tolerance=<metros>`` las coordenadas
+    se sirven simplificadas desde la caché de niveles de detalle; distancia,
+    desnivel y bounds son siempre los del track completo.
+
+    ``?format=polyline`` devuelve las coordenadas como Google Encoded Polyline y
+    ``?format=binary`` como int32 delta little-endian (``application/octet-stream``),
+    con ``?precision=5|6``.
+    """
+    from flask import jsonify
+
+    from app.modules.dataset.handlers.gpx_encoding import (
+        BINARY_MIMETYPE,
+        ENCODING_FORMATS,
+        PRECISIONS,
+        encode_binary,
+        encode_polyline,
+    )
+    from app.modules.dataset.handlers.gpx_lod import GPXLODCache
 
-    from app.modules.dataset.handlers.gpx_handler import GPXHandler
+    encoding = request.args.get("format", "json")
+    if encoding not in ENCODING_FORMATS:
+        return jsonify({"error": f"Unsupported format: {encoding}"}), 400
+
+    precision = request.args.get("precision", 6 if encoding == "binary" else 5, type=int)
+    if precision not in PRECISIONS:
+        return jsonify({"error": "Precision must be 5 or 6"}), 400
 
     try:
         # Query directa
@@ -637,25 +696,28 @@ def get_gpx_data(file_id):
             if not current_user.is_authenticated or user_id != current_user.id:
                 return jsonify({"error": "Unauthorized"}), 403
 
-        project_root = os.path.dirname(current_app.root_path)
-        file_path = os.path.join(
-            project_root,
-            "uploads",
-            f"user_{user_id}",
-            f"dataset_{dataset_id}",
-            gpx_file_name,
-        )
+        file_path = os.path.join(_gpx_upload_dir(user_id, dataset_id), gpx_file_name)
 
         if not os.path.exists(file_path):
             logger.error(f"File not found at: {file_path}")
             return jsonify({"error": "File not found on disk"}), 404
 
-        handler = GPXHandler()
-        gpx_data = handler.parse_gpx(file_path)
+        gpx_data = GPXLODCache().track_data(file_path, _gpx_tolerance_from_request())
 
         if gpx_data is None:
             return jsonify({"error": "Invalid GPX file"}), 500
 
+        if encoding == "binary":
+            coordinates = gpx_data.pop("coordinates")
+            return make_response(
+                encode_binary(coordinates, precision, header=gpx_data), 200, {"Content-Type": BINARY_MIMETYPE}
+            )
+
+        if encoding == "polyline":
+            coordinates = gpx_data.pop("coordinates")
+            gpx_data["polyline"] = encode_polyline(coordinates, precision)
+            gpx_data["precision"] = precision
+
         return jsonify(gpx_data)
 
     except Exception as e:
@@ -663,6 +725,93 @@ def get_gpx_data(file_id):
         return jsonify({"error": f"Error processing GPX file: {str(e)}"}), 500
 
 
+@dataset_bp.route("/api/dataset/<int:dataset_id>/gpx")
+def get_dataset_gpx_data(dataset_id):
+    """
+    Retorna todos los tracks GPX de un dataset en una sola respuesta en streaming.
+
+    ``?format=ndjson`` (por defecto) emite un objeto JSON por línea y archivo;
+    ``?format=geojson`` emite un ``FeatureCollection`` con un ``LineString``
+    por track. Admite ``?zoom``/``?tolerance`` igual que ``/api/gpx/<id>`` y
+    lee cada archivo de su caché de niveles de detalle (también a resolución
+    completa). El control de acceso se hace una sola vez para todo el dataset,
+    y si el cliente ya tiene la respuesta (ETag de los checksums de los
+    archivos y el nivel de detalle) se contesta 304 sin leer ninguno.
+    """
+    from flask import Response, jsonify, stream_with_context
+
+    from app.modules.dataset.handlers.gpx_lod import GPXLODCache
+    from app.modules.hubfile.repositories import HubfileRepository
+
+    output = request.args.get("format", "ndjson")
+    if output not in ("ndjson", "geojson"):
+        return jsonify({"error": f"Unsupported format: {output}"}), 400
+
+    dataset = BaseDataset.query.get(dataset_id)
+    if not dataset:
+        return jsonify({"error": "Dataset not found"}), 404
+
+    if not dataset.ds_meta_data.dataset_doi:
+        if not current_user.is_authenticated or dataset.user_id != current_user.id:
+            return jsonify({"error": "Unauthorized"}), 403
+
+    dataset_dir = _gpx_upload_dir(dataset.user_id, dataset.id)
+    tolerance = _gpx_tolerance_from_request()
+    files = HubfileRepository().get_gpx_files_by_dataset(dataset.id)
+    cache = GPXLODCache()
+
+    etag = cache.etag((hubfile.checksum for hubfile, _ in files), tolerance, output)
+    if etag is not None and request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    def tracks():
+        for hubfile, fm_meta_data_id in files:
+            record = {"file_id": hubfile.id, "fm_meta_data_id": fm_meta_data_id, "name": hubfile.name}
+            file_path = os.path.join(dataset_dir, hubfile.name)
+            try:
+                if not os.path.exists(file_path):
+                    raise FileNotFoundError("File not found on disk")
+                record.update(cache.track_data(file_path, tolerance))
+            except Exception as e:
+                logger.error(f"Error parsing GPX {hubfile.id} of dataset {dataset_id}: {str(e)}")
+                record["error"] = f"Error processing GPX file: {str(e)}"
+            yield record
+
+    def ndjson():
+        for record in tracks():
+            yield json.dumps(record, separators=(",", ":")) + "\n"
+
+    def geojson():
+        yield '{"type":"FeatureCollection","features":['
+        for index, record in enumerate(tracks()):
+            coordinates = record.pop("coordinates", None)
+            bounds = record.get("bounds")
+            feature = {
+                "type": "Feature",
+                "id": record["file_id"],
+                "geometry": (
+                    {"type": "LineString", "coordinates": [[lon, lat] for lat, lon in coordinates]}
+                    if coordinates is not None
+                    else None
+                ),
+                "properties": record,
+            }
+            if bounds:
+                feature["bbox"] = [bounds["min_lon"], bounds["min_lat"], bounds["max_lon"], bounds["max_lat"]]
+            yield ("," if index else "") + json.dumps(feature, separators=(",", ":"))
+        yield "]}"
+
+    if output == "geojson":
+        response = Response(stream_with_context(geojson()), mimetype="application/geo+json")
+    else:
+        response = Response(stream_with_context(ndjson()), mimetype="application/x-ndjson")
+    if etag is not None:
+        response.set_etag(etag)
+    return response
+
+
 # ========== VERSIONES ==========
 
 
@@ -771,9 +920,11 @@ def download_version_zip(dataset_id, version_id):
 
     dataset = version.dataset
 
-    zip_path = VersionService.build_version_zip(version, dataset)
-
-    return send_file(zip_path, as_attachment=True, download_name=f"{dataset.id}_v{version.version_number}.zip")
+    return _send_archive(
+        ArchiveCache.version_key(version.id),
+        lambda: VersionService.build_version_zip(version, dataset),
+        f"{dataset.id}_v{version.version_number}.zip",
+    )
 
 
 # ========== EDIT DATASET ==========
@@ -885,10 +1036,9 @@ def upload_multiple():
         file.save(file_path)
 
         kind = infer_kind_from_filename(new_filename)
-        descriptor = get_descriptor(kind)
 
         try:
-            descriptor.handler.validate(file_path)
+            dataset_service.ingest_upload(file_path, kind)
             uploaded_files.append(new_filename)
         except Exception as e:
             if os.path.exists(file_path):
@@ -952,6 +1102,7 @@ def add_files_to_dataset(dataset_id):
 
     added_count = 0
     changes = []
+    stored_sha256s = []
 
     for filename in files_to_add:
         temp_file_path = os.path.join(temp_folder, filename)
@@ -965,8 +1116,9 @@ def add_files_to_dataset(dataset_id):
 
         descriptor = get_descriptor(file_kind)
 
+        # Una sola lectura: validación, checksum y estadísticas (mover no cambia el contenido)
         try:
-            descriptor.handler.validate(temp_file_path)
+            ingested = descriptor.ingest(temp_file_path)
         except Exception as e:
             flash(f"File validation failed for {filename}: {str(e)}", "danger")
             continue
@@ -1006,21 +1158,29 @@ def add_files_to_dataset(dataset_id):
             fm_meta_data_id=fmmetadata.id,
         )
 
-        checksum, size = calculate_checksum_and_size(dest_file_path)
-
-        HubfileRepository().create(
+        hubfile = HubfileRepository().create(
             commit=False,
             name=filename,
-            checksum=checksum,
-            size=size,
+            checksum=ingested.checksum,
+            sha256=ingested.sha256,
+            size=ingested.size,
             feature_model_id=fm.id,
         )
 
+        dataset_service.record_ingested(hubfile, dataset.id, dest_file_path, ingested)
+
+        # Se comprime (si está activado) cuando ya se han sacado métricas y artefactos del original,
+        # y el blob es el archivo ya comprimido: el del dataset queda enlazado a él
+        store_upload(dest_file_path)
+        if BlobService().store_safely(hubfile, dest_file_path):
+            stored_sha256s.append(hubfile.sha256)
+
         added_count += 1
         changes.append(f"Added file from {source}: {filename}")
 
     if added_count > 0:
         try:
+            GPXTrackStatsService().refresh_dataset_totals(dataset)
             db.session.commit()
 
             # Crear versión automática si no está sincronizado
@@ -1048,6 +1208,7 @@ def add_files_to_dataset(dataset_id):
 
         except Exception as e:
             db.session.rollback()
+            BlobService().discard(stored_sha256s)
             flash(f"Error saving files: {str(e)}", "danger")
             return redirect(url_for("dataset.edit_dataset", dataset_id=dataset_id))
     else:
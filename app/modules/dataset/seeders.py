@@ -6,7 +6,9 @@ from dotenv import load_dotenv
 
 from app.modules.auth.models import User
 from app.modules.dataset.models import Author, DSMetaData, DSMetrics, GPXDataset, PublicationType, UVLDataset
+from app.modules.dataset.services import GPXTrackStatsService
 from app.modules.featuremodel.models import FeatureModel, FMMetaData
+from app.modules.featuremodel.services import FMMetricsService
 from app.modules.hubfile.models import Hubfile
 from core.seeders.BaseSeeder import BaseSeeder
 
@@ -123,6 +125,9 @@ class DataSetSeeder(BaseSeeder):
             )
             self.seed([uvl_file])
 
+        # Métricas persistidas de los modelos UVL
+        FMMetricsService().backfill()
+
         # Create GPX datasets
         gpx_ds_metrics = DSMetrics(number_of_models="5", number_of_features="0")
         seeded_gpx_ds_metrics = self.seed([gpx_ds_metrics])[0]
@@ -212,3 +217,6 @@ class DataSetSeeder(BaseSeeder):
                 feature_model_id=feature_model.id,
             )
             self.seed([gpx_file])
+
+        # Estadísticas e índice espacial de los tracks
+        GPXTrackStatsService().backfill()
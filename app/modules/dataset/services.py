@@ -6,7 +6,7 @@ import tempfile
 import uuid
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 from zipfile import BadZipFile, ZipFile
 
 from flask import request
@@ -19,6 +19,8 @@ from app.modules.dataset.fetchers.base import FetchError
 from app.modules.dataset.fetchers.github import GithubFetcher
 from app.modules.dataset.fetchers.registry import DataSourceManager
 from app.modules.dataset.fetchers.zip import ZipFetcher
+from app.modules.dataset.handlers.gpx_handler import GPXHandler
+from app.modules.dataset.ingestion import IngestionResult, forget_ingestion, iter_file_chunks, remember_ingestion
 from app.modules.dataset.models import (
     BaseDataset,
     DatasetVersion,
@@ -26,9 +28,11 @@ from app.modules.dataset.models import (
     DSViewRecord,
     GPXDataset,
     GPXDatasetVersion,
+    GPXTrackStats,
     UVLDataset,
     UVLDatasetVersion,
 )
+from app.modules.dataset.parse_pool import get_parse_pool, gpx_file_stats
 from app.modules.dataset.registry import get_descriptor, infer_kind_from_filename
 from app.modules.dataset.repositories import (
     AuthorRepository,
@@ -38,10 +42,19 @@ from app.modules.dataset.repositories import (
     DSDownloadRecordRepository,
     DSMetaDataRepository,
     DSViewRecordRepository,
+    GPXTrackCellRepository,
+    GPXTrackStatsRepository,
 )
+from app.modules.dataset.zip_stream import stream_zip
 from app.modules.featuremodel.models import FeatureModel
 from app.modules.featuremodel.repositories import FeatureModelRepository, FMMetaDataRepository
+from app.modules.featuremodel.services import FMFeatureNameService, FMMetricsService
+from app.modules.flamapy.artifacts import prebuild_artifacts
+from app.modules.flamapy.cache import get_feature_model_cache
+from app.modules.flamapy.services import UVLValidationService
 from app.modules.hubfile.repositories import HubfileDownloadRecordRepository, HubfileRepository
+from app.modules.hubfile.services import BlobService
+from app.modules.hubfile.storage import store_upload
 from app.modules.mail.services import MailService
 from core.services.BaseService import BaseService
 
@@ -50,10 +63,10 @@ logger = logging.getLogger(__name__)
 
 def calculate_checksum_and_size(file_path):
     file_size = os.path.getsize(file_path)
-    with open(file_path, "rb") as file:
-        content = file.read()
-        hash_md5 = hashlib.md5(content).hexdigest()
-        return hash_md5, file_size
+    hash_md5 = hashlib.md5()
+    for chunk in iter_file_chunks(file_path):
+        hash_md5.update(chunk)
+    return hash_md5.hexdigest(), file_size
 
 
 class DataSetService(BaseService):
@@ -67,6 +80,11 @@ class DataSetService(BaseService):
         self.hubfiledownloadrecord_repository = HubfileDownloadRecordRepository()
         self.hubfilerepository = HubfileRepository()
         self.dsviewrecord_repostory = DSViewRecordRepository()
+        self.gpx_track_stats_service = GPXTrackStatsService()
+        self.fm_metrics_service = FMMetricsService()
+        self.feature_name_service = FMFeatureNameService()
+        self.uvl_validation_service = UVLValidationService()
+        self.blob_service = BlobService()
 
         self.datasource_manager = DataSourceManager(
             providers=[
@@ -75,8 +93,58 @@ class DataSetService(BaseService):
             ]
         )
 
+    def delete(self, id):
+        """Borra el dataset (con sus archivos y versiones) y suelta sus referencias a blobs."""
+        dataset = self.repository.get_by_id(id)
+        if dataset is None:
+            return False
+        dataset.delete()
+        return True
+
+    def zip_entries(self, dataset: BaseDataset) -> List[Tuple[str, str]]:
+        """Archivos del dataset en disco como pares ``(ruta, nombre en el ZIP)`` bajo ``dataset_<id>/``."""
+        working_dir = os.getenv("WORKING_DIR", "")
+        base_path = os.path.join(working_dir, "uploads", f"user_{dataset.user_id}", f"dataset_{dataset.id}")
+
+        entries = []
+        for subdir, dirs, files in os.walk(base_path):
+            # Las carpetas ocultas (p. ej. la caché .lod de GPX) no forman parte del dataset
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for file in sorted(files):
+                full_path = os.path.join(subdir, file)
+                entries.append(
+                    (full_path, os.path.join(f"dataset_{dataset.id}", os.path.relpath(full_path, base_path)))
+                )
+        return entries
+
+    def archive_fingerprint(self, dataset: BaseDataset) -> str:
+        """
+        Huella del contenido de los archivos (nombre y checksum) para la caché de
+        ZIPs. A diferencia de ``files_fingerprint`` (nombre y tamaño, guardada al
+        publicar) cambia en cuanto cambia cualquier archivo, publicado o no.
+        """
+        h = hashlib.sha256()
+        for hubfile in sorted(dataset.files(), key=lambda hubfile: hubfile.name):
+            h.update(f"{hubfile.name}\0{hubfile.checksum or hubfile.size}\0".encode())
+        return h.hexdigest()
+
+    def get_downloadable_by_ids(self, dataset_ids: List[int], user_id: Optional[int] = None) -> List[BaseDataset]:
+        """Datasets publicados o del usuario: los borradores de otros no se pueden descargar."""
+        return self.repository.get_downloadable_by_ids(dataset_ids, user_id)
+
+    def total_file_size(self, dataset_ids: List[int]) -> int:
+        return self.repository.total_file_size(dataset_ids)
+
+    def stream_zip(self, dataset: BaseDataset) -> Iterator[bytes]:
+        """ZIP del dataset generado en streaming, sin pasar por un archivo temporal."""
+        return stream_zip(self.zip_entries(dataset))
+
     def move_feature_models(self, dataset: BaseDataset):
-        """Mueve los archivos de feature models desde la carpeta temporal a la definitiva."""
+        """
+        Mueve los archivos de feature models desde la carpeta temporal a la
+        definitiva (comprimidos si ``UPLOAD_COMPRESSION=gzip``) y los incorpora
+        al almacén de blobs.
+        """
         current_user = AuthenticationService().get_authenticated_user()
         source_dir = current_user.temp_folder()
 
@@ -90,9 +158,57 @@ class DataSetService(BaseService):
 
             if os.path.exists(source_path):
                 shutil.move(source_path, dest_dir)
+                dest_path = os.path.join(dest_dir, filename)
+                # Se comprime (si toca) y el blob es ese mismo archivo: el dataset queda enlazado a él
+                store_upload(dest_path)
+                for hubfile in feature_model.files:
+                    if hubfile.name == filename:
+                        self.blob_service.store_safely(hubfile, dest_path)
             else:
                 logger.warning(f"File not found: {source_path}")
 
+        try:
+            self.repository.session.commit()
+        except Exception:
+            self.repository.session.rollback()
+            self.blob_service.discard(file.sha256 for fm in dataset.feature_models for file in fm.files if file.sha256)
+            raise
+
+    def ingest_upload(self, file_path: str, kind: str) -> IngestionResult:
+        """
+        Ingesta completa de un archivo recién subido a la carpeta temporal. Lanza
+        ``ValueError`` si no es válido o tiene errores de gramática. El resultado
+        se guarda junto al archivo, y el modelo parseado en la caché por checksum,
+        para que crear el dataset o añadirle el archivo no lo vuelva a leer.
+        """
+        forget_ingestion(file_path)
+        ingested = get_descriptor(kind).ingest(file_path)
+        if ingested.errors:
+            raise ValueError("; ".join(ingested.errors[:5]))
+
+        remember_ingestion(file_path, ingested)
+        if ingested.model is not None:
+            get_feature_model_cache().put(ingested.checksum, ingested.model)
+        return ingested
+
+    def record_ingested(self, hubfile, dataset_id: int, file_path: str, ingested: IngestionResult) -> None:
+        """
+        Guarda (sin commit) lo que se saca de un archivo recién ingerido sin
+        volver a leerlo: las estadísticas de un GPX, o el veredicto de la
+        gramática, las métricas, el índice de features y el árbol de un UVL a
+        partir del modelo parseado en la ingesta. Ningún fallo interrumpe la subida.
+        """
+        if ingested.kind == "gpx":
+            self.gpx_track_stats_service.record_safely(hubfile, file_path, stats=ingested.stats)
+        elif ingested.kind == "uvl":
+            self.uvl_validation_service.record_safely(hubfile.checksum, ingested.errors)
+            if ingested.model is not None and hubfile.checksum:
+                # Los artefactos y análisis posteriores lo encuentran por checksum
+                get_feature_model_cache().put(hubfile.checksum, ingested.model)
+            self.fm_metrics_service.record_safely(hubfile, file_path, model=ingested.model)
+            self.feature_name_service.index_safely(hubfile, dataset_id, file_path, model=ingested.model)
+            prebuild_artifacts(hubfile.checksum, file_path)
+
     def get_synchronized(self, current_user_id: int) -> BaseDataset:
         return self.repository.get_synchronized(current_user_id)
 
@@ -217,20 +333,28 @@ class DataSetService(BaseService):
             file_path = os.path.join(current_user.temp_folder(), filename)
             descriptor_for_file = get_descriptor(infer_kind_from_filename(filename))
 
+            # Una sola lectura del archivo: validación, checksum y estadísticas
             try:
-                descriptor_for_file.handler.validate(file_path)
+                ingested = descriptor_for_file.ingest(file_path)
             except Exception as e:
                 logger.error(f"Validation failed for {filename}: {e}")
                 self.repository.session.rollback()
                 raise BadRequest(f"File validation failed: {str(e)}")
 
-            checksum, size = calculate_checksum_and_size(file_path)
-
             file = self.hubfilerepository.create(
-                commit=False, name=filename, checksum=checksum, size=size, feature_model_id=fm.id
+                commit=False,
+                name=filename,
+                checksum=ingested.checksum,
+                sha256=ingested.sha256,
+                size=ingested.size,
+                feature_model_id=fm.id,
             )
             fm.files.append(file)
 
+            self.record_ingested(file, dataset.id, file_path, ingested)
+
+        self.gpx_track_stats_service.refresh_dataset_totals(dataset)
+
         # =========================================================
         # Commit final
         # =========================================================
@@ -485,16 +609,19 @@ class VersionService:
 
         # Calcular métricas específicas según tipo
         if isinstance(dataset, GPXDataset):
-            version.total_distance = dataset.calculate_total_distance()
-            version.total_elevation_gain = dataset.calculate_total_elevation_gain()
-            version.total_elevation_loss = dataset.calculate_total_elevation_loss()
-            version.total_points = dataset.count_total_points()
+            totals = dataset.track_totals()
+            version.total_distance = totals["distance"]
+            version.total_elevation_gain = totals["elevation_gain"]
+            version.total_elevation_loss = totals["elevation_loss"]
+            version.total_points = totals["points_count"]
             version.track_count = dataset.count_tracks()
 
         elif isinstance(dataset, UVLDataset):
             try:
-                version.total_features = dataset.calculate_total_features() or 0
-                version.total_constraints = dataset.calculate_total_constraints() or 0
+                # Métricas precalculadas al ingerir cada archivo (tabla fm_metrics)
+                metrics = dataset.uvl_metrics()
+                version.total_features = metrics["features"]
+                version.total_constraints = metrics["constraints"]
 
                 version.model_count = db.session.query(FeatureModel).filter_by(data_set_id=dataset.id).count()
 
@@ -505,6 +632,8 @@ class VersionService:
                 version.model_count = 0
 
         db.session.add(version)
+        # Cada archivo de la versión mantiene vivo su blob aunque el dataset cambie
+        BlobService().retain(files_snapshot)
         db.session.commit()
 
         return version
@@ -520,12 +649,14 @@ class VersionService:
 
     @staticmethod
     def _create_files_snapshot(dataset):
-        """Crear un snapshot JSON de todos los archivos actuales"""
+        """Crear un snapshot JSON de todos los archivos actuales (con su blob, si lo tienen)"""
         snapshot = {}
         for fm in dataset.feature_models:
             if hasattr(fm, "files"):
                 for file in fm.files:
                     snapshot[file.name] = {"id": file.id, "checksum": file.checksum, "size": file.size}
+                    if file.sha256:
+                        snapshot[file.name]["sha256"] = file.sha256
         return snapshot
 
     @staticmethod
@@ -559,26 +690,26 @@ class VersionService:
             return version2.compare_with(version1)
 
     @staticmethod
-    def build_version_zip(version: DatasetVersion, dataset: BaseDataset, temp_root="/tmp") -> str:
+    def build_version_zip(version: DatasetVersion, dataset: BaseDataset) -> Iterator[bytes]:
         """
-        Construir un ZIP con los archivos de una versión específica del dataset.
-        Devuelve la ruta al archivo ZIP creado.
+        ZIP con los archivos de una versión específica del dataset, generado en
+        streaming (ver ``stream_zip``): no se escribe ningún archivo temporal.
+        Los archivos con blob se leen de él, con el contenido exacto de la
+        versión; los anteriores al almacén de blobs, de la carpeta del dataset.
         """
-        temp_dir = tempfile.mkdtemp(dir=temp_root)
-        zip_path = os.path.join(temp_dir, f"dataset_version_{version.id}.zip")
-
         working_dir = os.getenv("WORKING_DIR", "")
         dataset_dir = os.path.join(working_dir, "uploads", f"user_{dataset.user_id}", f"dataset_{dataset.id}")
+        blob_service = BlobService()
 
-        with ZipFile(zip_path, "w") as zipf:
-            for file_name, file_info in version.files_snapshot.items():
-                file_path = os.path.join(dataset_dir, file_name)
-                if os.path.exists(file_path):
-                    zipf.write(file_path, arcname=file_name)
-                else:
-                    logger.warning(f"File {file_name} not found for version {version.id}, skipping.")
+        entries = []
+        for file_name, entry in version.files_snapshot.items():
+            file_path = blob_service.path_for(entry.get("sha256")) or os.path.join(dataset_dir, file_name)
+            if os.path.exists(file_path):
+                entries.append((file_path, file_name))
+            else:
+                logger.warning(f"File {file_name} not found for version {version.id}, skipping.")
 
-        return zip_path
+        return stream_zip(entries)
 
 
 class AuthorService(BaseService):
@@ -590,6 +721,21 @@ class DSDownloadRecordService(BaseService):
     def __init__(self):
         super().__init__(DSDownloadRecordRepository())
 
+    def record_downloads(self, dataset_ids: List[int], user_id: Optional[int], download_cookie: str) -> int:
+        """
+        Registra la descarga de varios datasets a la vez (descarga múltiple): los
+        que faltan para este usuario y cookie se insertan juntos, en una transacción.
+        """
+        already = self.repository.downloaded_dataset_ids(dataset_ids, user_id, download_cookie)
+        now = datetime.now(timezone.utc)
+        rows = [
+            {"user_id": user_id, "dataset_id": dataset_id, "download_date": now, "download_cookie": download_cookie}
+            for dataset_id in dataset_ids
+            if dataset_id not in already
+        ]
+        self.repository.create_many(rows)
+        return len(rows)
+
 
 class DSMetaDataService(BaseService):
     def __init__(self):
@@ -628,6 +774,141 @@ class DSViewRecordService(BaseService):
         return user_cookie
 
 
+class GPXTrackStatsService(BaseService):
+    """Estadísticas persistidas por archivo GPX (tabla gpx_track_stats)."""
+
+    def __init__(self):
+        super().__init__(GPXTrackStatsRepository())
+        self.cell_repository = GPXTrackCellRepository()
+        self.handler = GPXHandler()
+
+    def record(self, hubfile, file_path: str, commit: bool = False, stats: Optional[dict] = None) -> GPXTrackStats:
+        """
+        Calcula y guarda las estadísticas de un Hubfile GPX.
+        Si ya existen para el mismo checksum no se vuelve a parsear el archivo, y
+        si se pasan ``stats`` (las extraídas durante la ingesta) tampoco.
+        """
+        existing = self.repository.get_for_hubfile(hubfile.id, hubfile.checksum)
+        if existing:
+            return existing
+
+        if stats is None:
+            stats = self.handler.compute_stats(file_path)
+        bounds = stats["bounds"]
+
+        track_stats = self.repository.create(
+            commit=False,
+            hubfile_id=hubfile.id,
+            checksum=hubfile.checksum,
+            distance=stats["distance"],
+            elevation_gain=stats["elevation_gain"],
+            elevation_loss=stats["elevation_loss"],
+            points_count=stats["points_count"],
+            duration=stats["duration"],
+            min_lat=bounds["min_lat"],
+            max_lat=bounds["max_lat"],
+            min_lon=bounds["min_lon"],
+            max_lon=bounds["max_lon"],
+            start_time=self._to_naive_utc(stats["start_time"]),
+            end_time=self._to_naive_utc(stats["end_time"]),
+        )
+        self.cell_repository.index_track(track_stats, hubfile.feature_model.data_set_id)
+
+        if commit:
+            self.repository.session.commit()
+        return track_stats
+
+    def record_safely(self, hubfile, file_path: str, stats: Optional[dict] = None) -> Optional[GPXTrackStats]:
+        """Como record(), pero un fallo no interrumpe la subida (se recalcula más tarde)."""
+        try:
+            return self.record(hubfile, file_path, stats=stats)
+        except Exception as e:
+            logger.warning(f"Could not compute GPX stats for {hubfile.name}: {e}")
+            return None
+
+    def record_failure(self, hubfile, error: str) -> GPXTrackStats:
+        """
+        Guarda (sin commit) una fila sin métricas que marca el archivo como no parseable
+        para su checksum actual, de modo que el backfill no lo reintente.
+        """
+        return self.repository.create(
+            commit=False, hubfile_id=hubfile.id, checksum=hubfile.checksum, parse_error=str(error)[:255]
+        )
+
+    def record_many(self, hubfiles) -> int:
+        """
+        Calcula en paralelo (pool de procesos) y guarda sin commit las estadísticas
+        de varios Hubfiles. Devuelve cuántos se han guardado; los que no se pueden
+        parsear quedan marcados con ``parse_error``.
+        """
+        paths = [hubfile.get_path() for hubfile in hubfiles]
+        recorded = 0
+        for hubfile, result in zip(hubfiles, get_parse_pool().map(gpx_file_stats, paths)):
+            if not result.ok:
+                logger.warning(f"Could not compute GPX stats for {hubfile.name}: {result.error}")
+                self.record_failure(hubfile, result.error)
+                continue
+            if self.record_safely(hubfile, result.path, stats=result.value):
+                recorded += 1
+        return recorded
+
+    def backfill(self, dataset_id: Optional[int] = None) -> int:
+        """
+        Calcula y guarda las estadísticas de los archivos GPX que no las tienen (de un
+        dataset o de todos), los añade al índice espacial y actualiza los totales de sus
+        datasets. Se ejecuta desde ``rosemary gpx:stats``, nunca al leer los totales.
+        """
+        missing = self.repository.get_hubfiles_without_stats(dataset_id)
+        recorded = self.record_many(missing) if missing else 0
+        self.repository.session.flush()
+        self.index_missing_tracks(dataset_id)
+
+        for dataset in {hubfile.feature_model.data_set for hubfile in missing}:
+            self.refresh_dataset_totals(dataset)
+        self.repository.session.commit()
+        return recorded
+
+    def totals_for_dataset(self, dataset: BaseDataset) -> dict:
+        """Totales del dataset con un único SUM en SQL sobre las estadísticas ya guardadas."""
+        return self.repository.sum_for_dataset(dataset.id)
+
+    def refresh_dataset_totals(self, dataset: BaseDataset) -> dict:
+        """
+        Recalcula con un SUM las columnas total_distance / total_elevation_gain del
+        dataset (sin commit). Se llama al añadir archivos, antes del commit.
+        """
+        totals = self.repository.sum_for_dataset(dataset.id)
+        self._store_totals(dataset, totals)
+        return totals
+
+    @staticmethod
+    def _store_totals(dataset: BaseDataset, totals: dict) -> bool:
+        """Copia los totales a las columnas indexadas del dataset. Devuelve True si han cambiado."""
+        if not isinstance(dataset, GPXDataset):
+            return False
+        if dataset.total_distance == totals["distance"] and dataset.total_elevation_gain == totals["elevation_gain"]:
+            return False
+
+        dataset.total_distance = totals["distance"]
+        dataset.total_elevation_gain = totals["elevation_gain"]
+        return True
+
+    def index_missing_tracks(self, dataset_id: Optional[int] = None) -> int:
+        """Añade al índice espacial los tracks con estadísticas que todavía no tienen celdas."""
+        pending = self.cell_repository.get_stats_without_cells(dataset_id)
+        for track_stats, dataset_id in pending:
+            self.cell_repository.index_track(track_stats, dataset_id)
+        if pending:
+            self.repository.session.commit()
+        return len(pending)
+
+    @staticmethod
+    def _to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+        if value is None or value.tzinfo is None:
+            return value
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
 class DOIMappingService(BaseService):
     def __init__(self):
         super().__init__(DOIMappingRepository())
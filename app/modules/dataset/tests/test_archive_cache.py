@@ -0,0 +1,149 @@
+"""
+Tests para la caché de ZIPs de datasets y versiones.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from app.modules.dataset.archive_cache import ArchiveCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ArchiveCache(cache_dir=str(tmp_path / "archives"), disk_budget=10 * 1024 * 1024)
+
+
+def chunks(*parts, calls=None, delay=0.0):
+    if calls is not None:
+        calls.append(1)
+    for part in parts:
+        time.sleep(delay)
+        yield part
+
+
+def test_archive_is_stored_after_first_download(cache):
+    key = ArchiveCache.dataset_key(1, "abc")
+
+    assert cache.lookup(key) is None
+    assert b"".join(cache.stream(key, chunks(b"PK", b"data"))) == b"PKdata"
+
+    path = cache.lookup(key)
+    assert path == cache.path_for(key)
+    with open(path, "rb") as f:
+        assert f.read() == b"PKdata"
+
+
+def test_failed_build_is_not_published(cache):
+    key = ArchiveCache.version_key(4)
+
+    def broken():
+        yield b"a"
+        raise OSError("file vanished")
+
+    with pytest.raises(OSError):
+        b"".join(cache.stream(key, broken()))
+
+    assert cache.lookup(key) is None
+    assert [name for name in os.listdir(os.path.dirname(cache.path_for(key))) if name.endswith(".tmp")] == []
+
+
+def test_first_chunk_is_sent_before_the_build_finishes(cache):
+    key = ArchiveCache.dataset_key(6, "abc")
+    release = threading.Event()
+
+    def blocked():
+        yield b"first"
+        release.wait(5)
+        yield b"last"
+
+    download = cache.stream(key, blocked())
+    assert next(download) == b"first"
+    # Aún no está publicado: el resto del ZIP no se ha generado
+    assert cache.lookup(key) is None
+
+    release.set()
+    assert b"".join(download) == b"last"
+    with open(cache.lookup(key), "rb") as f:
+        assert f.read() == b"firstlast"
+
+
+def test_closed_download_is_not_published(cache):
+    key = ArchiveCache.version_key(6)
+
+    download = cache.stream(key, chunks(b"a", b"b"))
+    assert next(download) == b"a"
+    download.close()
+
+    assert cache.lookup(key) is None
+    assert [name for name in os.listdir(os.path.dirname(cache.path_for(key))) if name.endswith(".tmp")] == []
+    # El lock se ha soltado: la siguiente petición lo genera
+    assert b"".join(cache.stream(key, chunks(b"c"))) == b"c"
+
+
+def test_slow_download_does_not_hold_the_lock(cache):
+    key = ArchiveCache.version_key(5)
+    b"".join(cache.stream(key, chunks(b"a", b"b")))
+
+    # Un cliente lee un bloque del ZIP publicado y se queda parado a mitad de la descarga
+    slow = cache.stream(key, chunks(b"x"))
+    assert next(slow) == b"ab"
+
+    calls = []
+    started = time.monotonic()
+    assert b"".join(cache.stream(key, chunks(b"x", calls=calls))) == b"ab"
+    assert time.monotonic() - started < 1
+    assert calls == []
+    slow.close()
+
+
+def test_concurrent_builds_are_coalesced(cache):
+    key = ArchiveCache.dataset_key(2, "abc")
+    calls = []
+    results = []
+
+    def download():
+        results.append(b"".join(cache.stream(key, chunks(b"x" * 10, b"y" * 10, calls=calls, delay=0.05))))
+
+    threads = [threading.Thread(target=download) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [b"x" * 10 + b"y" * 10] * 4
+
+
+def test_new_fingerprint_replaces_previous_archive(cache):
+    old, new = ArchiveCache.dataset_key(3, "old"), ArchiveCache.dataset_key(3, "new")
+    b"".join(cache.stream(old, chunks(b"old")))
+
+    b"".join(cache.stream(new, chunks(b"new")))
+
+    assert cache.lookup(old) is None
+    assert cache.lookup(new) is not None
+    # El lock de la huella anterior no se borra: otro proceso podría tenerlo tomado
+    assert os.path.exists(f"{cache.path_for(old)}.lock")
+
+
+def test_cache_respects_disk_budget(cache):
+    cache.disk_budget = 15
+    first, second = ArchiveCache.version_key(1), ArchiveCache.version_key(2)
+    b"".join(cache.stream(first, chunks(b"1" * 10)))
+    os.utime(cache.path_for(first), (1000, 1000))
+
+    b"".join(cache.stream(second, chunks(b"2" * 10)))
+
+    assert cache.lookup(first) is None
+    assert cache.lookup(second) is not None
+
+
+def test_disabled_cache_only_streams(tmp_path):
+    cache = ArchiveCache(cache_dir=str(tmp_path / "archives"), disk_budget=0)
+    key = ArchiveCache.version_key(1)
+
+    assert b"".join(cache.stream(key, chunks(b"data"))) == b"data"
+    assert not os.path.exists(cache.cache_dir)
@@ -0,0 +1,192 @@
+"""
+Tests para la descarga de varios datasets en un solo ZIP (/explore/download).
+"""
+
+import io
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+from zipfile import ZipFile
+
+import pytest
+from flask import Flask
+from flask_login import LoginManager
+
+import app.modules.dataset.bulk_download as bulk_mod
+from app import db
+from app.modules.auth.models import User
+from app.modules.dataset.bulk_download import BulkDownloadSlots
+from app.modules.dataset.models import DSDownloadRecord, DSMetaData, PublicationType, UVLDataset
+from app.modules.explore import explore_bp
+from app.modules.explore.services import ExploreService
+from app.modules.featuremodel.models import FeatureModel
+from app.modules.hubfile.models import Hubfile
+
+UVL_EXAMPLES = Path(__file__).parents[1] / "uvl_examples"
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Crear aplicación Flask de test."""
+    monkeypatch.setenv("WORKING_DIR", str(tmp_path))
+    monkeypatch.setattr(bulk_mod, "_slots", BulkDownloadSlots(limit=1))
+
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SECRET_KEY="test-secret-key",
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+    login_manager = LoginManager()
+    login_manager.init_app(app)
+    login_manager.user_loader(lambda user_id: db.session.get(User, int(user_id)))
+    db.init_app(app)
+    app.register_blueprint(explore_bp)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _create_dataset(tmp_path, title, files, published=True):
+    user = User(email=f"{title}@example.com", password="hashed")
+    ds_meta = DSMetaData(
+        title=title,
+        description="Models",
+        publication_type=PublicationType.NONE,
+        dataset_doi=f"10.1234/{title}" if published else None,
+    )
+    db.session.add_all([user, ds_meta])
+    db.session.flush()
+    dataset = UVLDataset(user_id=user.id, ds_meta_data_id=ds_meta.id)
+    db.session.add(dataset)
+    db.session.flush()
+
+    dataset_dir = tmp_path / "uploads" / f"user_{user.id}" / f"dataset_{dataset.id}"
+    dataset_dir.mkdir(parents=True)
+    for name in files:
+        shutil.copy(UVL_EXAMPLES / name, dataset_dir / name)
+        fm = FeatureModel(data_set_id=dataset.id)
+        db.session.add(fm)
+        db.session.flush()
+        size = (dataset_dir / name).stat().st_size
+        db.session.add(Hubfile(name=name, checksum=f"{title}-{name}", size=size, feature_model_id=fm.id))
+
+    db.session.commit()
+    return dataset
+
+
+@pytest.fixture
+def datasets(app, tmp_path):
+    return [
+        _create_dataset(tmp_path, "first", ["file1.uvl", "file2.uvl"]),
+        _create_dataset(tmp_path, "second", ["file3.uvl"]),
+    ]
+
+
+def test_selected_datasets_are_streamed_in_one_archive(app, datasets):
+    client = app.test_client()
+    first, second = datasets
+
+    response = client.get(f"/explore/download?ids={first.id},{second.id}")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/zip"
+    assert response.is_streamed
+    with ZipFile(io.BytesIO(response.get_data())) as zf:
+        assert zf.namelist() == [
+            f"dataset_{first.id}/file1.uvl",
+            f"dataset_{first.id}/file2.uvl",
+            f"dataset_{second.id}/file3.uvl",
+        ]
+        assert zf.read(f"dataset_{second.id}/file3.uvl") == (UVL_EXAMPLES / "file3.uvl").read_bytes()
+
+    assert DSDownloadRecord.query.count() == 2
+
+    # Misma cookie: no se vuelven a contar
+    client.get(f"/explore/download?ids={first.id}&ids={second.id}").get_data()
+    assert DSDownloadRecord.query.count() == 2
+
+
+def test_records_are_inserted_in_one_statement(app, datasets):
+    with patch.object(db.session, "commit", wraps=db.session.commit) as commit:
+        app.test_client().get("/explore/download?ids=1,2").get_data()
+
+    assert commit.call_count == 1
+
+
+def test_explore_filter_selects_datasets(app, datasets):
+    with patch.object(ExploreService, "filter", return_value=[datasets[1]]) as explore_filter:
+        response = app.test_client().get("/explore/download?query=second&dataset_type=uvl")
+
+    assert explore_filter.call_args.kwargs["query"] == "second"
+    assert explore_filter.call_args.kwargs["dataset_type"] == "uvl"
+    with ZipFile(io.BytesIO(response.get_data())) as zf:
+        assert zf.namelist() == [f"dataset_{datasets[1].id}/file3.uvl"]
+
+
+def test_invalid_or_empty_selection(app, datasets):
+    client = app.test_client()
+
+    assert client.get("/explore/download?ids=1,abc").status_code == 400
+    assert client.get("/explore/download?ids=99").status_code == 404
+
+
+def test_drafts_of_other_users_cannot_be_downloaded(app, datasets, tmp_path):
+    draft = _create_dataset(tmp_path, "draft", ["file1.uvl"], published=False)
+    client = app.test_client()
+
+    # Aunque el resto de la selección sea pública, la petición entera se rechaza
+    assert client.get(f"/explore/download?ids={datasets[0].id},{draft.id}").status_code == 404
+    assert client.get(f"/explore/download?ids={draft.id}").status_code == 404
+    assert DSDownloadRecord.query.count() == 0
+
+
+def test_owner_can_download_own_draft(app, tmp_path):
+    draft = _create_dataset(tmp_path, "draft", ["file1.uvl"], published=False)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(draft.user_id)
+
+    response = client.get(f"/explore/download?ids={draft.id}")
+
+    assert response.status_code == 200
+    with ZipFile(io.BytesIO(response.get_data())) as zf:
+        assert zf.namelist() == [f"dataset_{draft.id}/file1.uvl"]
+
+
+def test_size_and_count_caps(app, datasets, monkeypatch):
+    client = app.test_client()
+
+    monkeypatch.setenv("BULK_DOWNLOAD_MAX_DATASETS", "1")
+    assert client.get("/explore/download?ids=1,2").status_code == 413
+
+    monkeypatch.setenv("BULK_DOWNLOAD_MAX_DATASETS", "10")
+    monkeypatch.setenv("BULK_DOWNLOAD_MAX_BYTES", "10")
+    assert client.get("/explore/download?ids=1,2").status_code == 413
+    assert DSDownloadRecord.query.count() == 0
+
+
+def test_concurrency_limit(app, datasets):
+    client = app.test_client()
+    running = client.get("/explore/download?ids=1")
+
+    busy = client.get("/explore/download?ids=2")
+    assert busy.status_code == 429
+    assert busy.headers["Retry-After"]
+
+    # La plaza se libera al cerrar la respuesta, aunque no se haya leído
+    running.close()
+    assert client.get("/explore/download?ids=2").status_code == 200
+
+
+def test_slot_released_when_stream_finishes():
+    slots = BulkDownloadSlots(limit=1)
+    assert slots.try_acquire()
+
+    b"".join(slots.stream([]))
+
+    assert slots.try_acquire()
@@ -1,10 +1,12 @@
 import io
+import os
 from pathlib import Path
 
 import pytest
 from flask import Flask
 
 import app.modules.dataset.routes as routes_mod
+from app.modules.dataset.ingestion import IngestionResult
 from app.modules.dataset.registry import (
     GPXHandler,
     UVLHandler,
@@ -42,13 +44,8 @@ def app(tmp_path, monkeypatch):
 
     routes_mod.current_user = DummyUser()
 
-    class DummyHandler:
-        def validate(self, path: str):
-            return True
-
-    class DummyDescriptor:
-        def __init__(self, kind: str):
-            self.handler = DummyHandler()
+    def dummy_ingest_upload(path: str, kind: str):
+        return IngestionResult(kind, "checksum", os.path.getsize(path))
 
     monkeypatch.setattr(routes_mod, "get_allowed_extensions", lambda: [".uvl", ".gpx"])
     monkeypatch.setattr(
@@ -56,7 +53,7 @@ def app(tmp_path, monkeypatch):
         "infer_kind_from_filename",
         lambda fn: "uvl" if fn.lower().endswith(".uvl") else "gpx" if fn.lower().endswith(".gpx") else "unknown",
     )
-    monkeypatch.setattr(routes_mod, "get_descriptor", lambda kind: DummyDescriptor(kind))
+    monkeypatch.setattr(routes_mod.dataset_service, "ingest_upload", dummy_ingest_upload)
 
     return app
 
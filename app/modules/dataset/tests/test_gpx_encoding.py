@@ -0,0 +1,86 @@
+"""
+Tests para las codificaciones compactas de coordenadas (polyline y binario).
+"""
+
+import struct
+
+import pytest
+
+import app.modules.dataset.handlers.gpx_encoding as gpx_encoding_mod
+from app.modules.dataset.handlers.gpx_encoding import decode_binary, decode_polyline, encode_binary, encode_polyline
+from app.modules.dataset.handlers.gpx_stats import HAS_NUMPY
+
+COORDINATES = [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]
+
+TRACK = [[37.0 + i * 0.00013, -5.0 - i * 0.00021 + (i % 7) * 0.00001] for i in range(500)] + [[-89.5, 179.9]]
+
+
+# ==========================================
+# TESTS DE POLYLINE
+# ==========================================
+
+
+def test_encode_polyline_reference_example():
+    """Ejemplo de la documentación de Google."""
+    assert encode_polyline(COORDINATES, 5) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+@pytest.mark.parametrize("precision", [5, 6])
+def test_polyline_roundtrip(precision):
+    decoded = decode_polyline(encode_polyline(TRACK, precision), precision)
+
+    assert len(decoded) == len(TRACK)
+    for original, result in zip(TRACK, decoded):
+        assert result == pytest.approx(original, abs=10**-precision)
+
+
+def test_encode_polyline_empty():
+    assert encode_polyline([]) == ""
+    assert decode_polyline("") == []
+
+
+@pytest.mark.skipif(not HAS_NUMPY, reason="NumPy not installed")
+@pytest.mark.parametrize("precision", [5, 6])
+def test_polyline_numpy_matches_python(precision, monkeypatch):
+    numpy_result = encode_polyline(TRACK, precision)
+
+    monkeypatch.setattr(gpx_encoding_mod, "HAS_NUMPY", False)
+
+    assert encode_polyline(TRACK, precision) == numpy_result
+
+
+# ==========================================
+# TESTS DEL FORMATO BINARIO
+# ==========================================
+
+
+def test_binary_roundtrip_with_header():
+    data = encode_binary(TRACK, 6, header={"track_name": "Señal", "distance": 12.5})
+
+    header, decoded = decode_binary(data)
+
+    assert header["track_name"] == "Señal"
+    assert header["precision"] == 6
+    assert header["points"] == len(TRACK)
+    for original, result in zip(TRACK, decoded):
+        assert result == pytest.approx(original, abs=1e-6)
+
+
+def test_binary_layout_is_aligned_delta_int32():
+    data = encode_binary(COORDINATES, 5)
+    (header_length,) = struct.unpack_from("<I", data)
+
+    assert header_length % 4 == 0
+    values = struct.unpack_from("<6i", data, 4 + header_length)
+    assert values[:2] == (3850000, -12020000)
+    assert values[2:4] == (220000, -75000)
+    assert len(data) == 4 + header_length + 6 * 4
+
+
+@pytest.mark.skipif(not HAS_NUMPY, reason="NumPy not installed")
+def test_binary_numpy_matches_python(monkeypatch):
+    numpy_result = encode_binary(TRACK, 6)
+
+    monkeypatch.setattr(gpx_encoding_mod, "HAS_NUMPY", False)
+
+    assert encode_binary(TRACK, 6) == numpy_result
@@ -0,0 +1,207 @@
+"""
+Tests para el parseo de archivos GPX y el cálculo de estadísticas de tracks.
+"""
+
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+import app.modules.dataset.handlers.gpx_handler as gpx_handler_mod
+from app.modules.dataset.handlers.gpx_handler import GPXHandler
+from app.modules.dataset.handlers.gpx_stats import HAS_NUMPY, GPXStatsEngine, TrackStatsAccumulator
+from app.modules.dataset.handlers.gpx_stream import GPXStreamReader
+
+GPX_EXAMPLES = sorted((Path(__file__).parent.parent / "gpx_examples").glob("*.gpx"))
+
+needs_numpy = pytest.mark.skipif(not HAS_NUMPY, reason="NumPy not installed")
+
+
+@pytest.fixture
+def timed_gpx(tmp_path):
+    """GPX pequeño con elevaciones y tiempos."""
+    gpx_content = """<?xml version="1.0"?>
+    <gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">
+        <trk>
+            <name>Timed Track</name>
+            <trkseg>
+                <trkpt lat="40.0" lon="-3.0"><ele>100</ele><time>2024-01-01T10:00:00Z</time></trkpt>
+                <trkpt lat="40.01" lon="-3.01"><ele>120</ele><time>2024-01-01T10:05:00Z</time></trkpt>
+                <trkpt lat="40.02" lon="-3.0"><time>2024-01-01T10:10:00Z</time></trkpt>
+                <trkpt lat="40.03" lon="-2.99"><ele>90</ele><time>2024-01-01T10:20:00Z</time></trkpt>
+            </trkseg>
+        </trk>
+    </gpx>"""
+    gpx_file = tmp_path / "timed.gpx"
+    gpx_file.write_text(gpx_content)
+    return str(gpx_file)
+
+
+def _assert_same_result(numpy_result, python_result):
+    assert numpy_result["points_count"] == python_result["points_count"]
+    assert numpy_result["coordinates"] == python_result["coordinates"]
+    assert numpy_result["track_name"] == python_result["track_name"]
+    for key in ("distance", "elevation_gain", "elevation_loss", "duration"):
+        assert numpy_result[key] == pytest.approx(python_result[key], abs=0.011)
+    for key, value in python_result["bounds"].items():
+        assert numpy_result["bounds"][key] == pytest.approx(value)
+
+
+# ==========================================
+# TESTS DEL MOTOR NUMPY
+# ==========================================
+
+
+@needs_numpy
+def test_engine_empty_track():
+    """Un track vacío no debe fallar."""
+    stats = GPXStatsEngine([], []).compute()
+
+    assert stats["distance"] == 0.0
+    assert stats["elevation_gain"] == 0.0
+    assert stats["elevation_loss"] == 0.0
+    assert stats["duration"] == 0.0
+    assert stats["points_count"] == 0
+    assert stats["bounds"] == {"min_lat": 0, "max_lat": 0, "min_lon": 0, "max_lon": 0}
+
+
+@needs_numpy
+def test_engine_matches_python_haversine():
+    """La distancia vectorizada coincide con el Haversine punto a punto."""
+    coordinates = [[37.0, -5.0], [37.001, -5.002], [37.003, -5.001], [37.01, -4.99]]
+    handler = GPXHandler()
+
+    engine = GPXStatsEngine.from_coordinates(coordinates)
+
+    assert engine.distance() == pytest.approx(handler._calculate_distance(coordinates))
+    assert engine.bounds() == handler._calculate_bounds(coordinates)
+
+
+@needs_numpy
+def test_engine_elevation_and_duration():
+    """Desnivel y duración con operaciones por lotes."""
+    engine = GPXStatsEngine([0, 0, 0, 0], [0, 0, 0, 0], elevations=[10, 15, 12, 20], times=[0, 30, 60, 90])
+
+    assert engine.elevation() == (13.0, 3.0)
+    assert engine.duration() == 90.0
+
+
+@needs_numpy
+def test_engine_rejects_mismatched_lengths():
+    with pytest.raises(ValueError):
+        GPXStatsEngine([1.0, 2.0], [1.0])
+
+
+# ==========================================
+# TESTS DE PARSE_GPX (NUMPY vs PYTHON PURO)
+# ==========================================
+
+
+@needs_numpy
+@pytest.mark.parametrize("gpx_path", GPX_EXAMPLES, ids=lambda p: p.name)
+def test_parse_gpx_numpy_matches_python_path(gpx_path, monkeypatch):
+    """El motor NumPy produce el mismo diccionario que la ruta de Python puro."""
+    handler = GPXHandler()
+    numpy_result = handler.parse_gpx(str(gpx_path))
+
+    monkeypatch.setattr(gpx_handler_mod, "HAS_NUMPY", False)
+    python_result = handler.parse_gpx(str(gpx_path))
+
+    _assert_same_result(numpy_result, python_result)
+
+
+@needs_numpy
+def test_parse_gpx_with_times_matches_python_path(timed_gpx, monkeypatch):
+    handler = GPXHandler()
+    numpy_result = handler.parse_gpx(timed_gpx)
+
+    monkeypatch.setattr(gpx_handler_mod, "HAS_NUMPY", False)
+    python_result = handler.parse_gpx(timed_gpx)
+
+    _assert_same_result(numpy_result, python_result)
+    assert numpy_result["duration"] == 1200.0
+
+
+def test_parse_gpx_python_fallback(timed_gpx, monkeypatch):
+    """Sin NumPy se usa la ruta de Python puro."""
+    monkeypatch.setattr(gpx_handler_mod, "HAS_NUMPY", False)
+
+    result = GPXHandler().parse_gpx(timed_gpx)
+
+    assert result["points_count"] == 4
+    assert result["elevation_gain"] == 20.0
+    assert result["elevation_loss"] == 30.0
+    assert result["duration"] == 1200.0
+    assert result["track_name"] == "Timed Track"
+
+
+# ==========================================
+# TESTS DEL LECTOR EN STREAMING
+# ==========================================
+
+
+def test_stream_reader_yields_fixed_size_chunks(timed_gpx):
+    """Los puntos se entregan en bloques de tamaño fijo."""
+    reader = GPXStreamReader(chunk_size=3)
+
+    chunks = list(reader.iter_chunks(timed_gpx))
+
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    assert chunks[0].coordinates[0] == [40.0, -3.0]
+    assert chunks[0].elevations == [100.0, 120.0]
+    assert len(chunks[0].times) == 3
+    assert reader.points_count == 4
+    assert reader.track_name == "Timed Track"
+    assert reader.root_tag == "gpx"
+
+
+def test_stream_reader_clears_processed_elements(timed_gpx):
+    """Los elementos ya procesados se eliminan del árbol."""
+    reader = GPXStreamReader(chunk_size=2)
+    root = None
+
+    for event, elem in ET.iterparse(timed_gpx, events=("start", "end")):
+        if root is None:
+            root = elem
+        reader.handle(event, elem)
+
+    assert len(root) == 0
+    assert reader.tracks_count == 1
+
+
+def test_stream_reader_rejects_invalid_point(tmp_path):
+    gpx_file = tmp_path / "bad_point.gpx"
+    gpx_file.write_text('<gpx><trk><trkseg><trkpt lat="abc" lon="1"/></trkseg></trk></gpx>')
+
+    with pytest.raises(ValueError, match="coordinates"):
+        GPXStreamReader().read_all(str(gpx_file))
+
+
+@pytest.mark.parametrize("use_numpy", [pytest.param(True, marks=needs_numpy), False])
+@pytest.mark.parametrize("gpx_path", GPX_EXAMPLES[:2], ids=lambda p: p.name)
+def test_chunked_stats_match_single_pass(gpx_path, use_numpy):
+    """Acumular por bloques da el mismo resultado que procesar el track de una vez."""
+    reader = GPXStreamReader(chunk_size=7)
+    chunked = TrackStatsAccumulator(use_numpy=use_numpy)
+    whole = TrackStatsAccumulator(use_numpy=use_numpy)
+    coordinates, elevations = [], []
+
+    for chunk in reader.iter_chunks(str(gpx_path)):
+        chunked.add(chunk.coordinates, chunk.elevations, chunk.times)
+        coordinates.extend(chunk.coordinates)
+        elevations.extend(chunk.elevations)
+    whole.add(coordinates, elevations)
+
+    chunked_result, whole_result = chunked.result(), whole.result()
+    assert chunked_result["points_count"] == whole_result["points_count"] == len(coordinates)
+    assert chunked_result["bounds"] == whole_result["bounds"]
+    for key in ("distance", "elevation_gain", "elevation_loss"):
+        assert chunked_result[key] == pytest.approx(whole_result[key])
+
+
+def test_validate_rejects_non_gpx_root(tmp_path):
+    gpx_file = tmp_path / "wrong_root.gpx"
+    gpx_file.write_text("<?xml version='1.0'?><kml></kml>")
+
+    with pytest.raises(ValueError, match="Invalid GPX file"):
+        GPXHandler().validate(str(gpx_file))
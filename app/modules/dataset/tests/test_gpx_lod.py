@@ -0,0 +1,166 @@
+"""
+Tests para la simplificación de tracks GPX y la caché de niveles de detalle.
+"""
+
+import os
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+import app.modules.dataset.handlers.gpx_simplify as gpx_simplify_mod
+from app.modules.dataset.handlers.gpx_handler import GPXHandler
+from app.modules.dataset.handlers.gpx_lod import (
+    LOD_TOLERANCES,
+    GPXLODCache,
+    pick_level,
+    tolerance_for_zoom,
+)
+from app.modules.dataset.handlers.gpx_simplify import douglas_peucker
+from app.modules.dataset.handlers.gpx_stats import HAS_NUMPY
+
+GPX_EXAMPLE = Path(__file__).parent.parent / "gpx_examples" / "file1.gpx"
+
+
+@pytest.fixture
+def gpx_file(tmp_path):
+    """Copia de un GPX de ejemplo dentro de una carpeta de dataset."""
+    dataset_dir = tmp_path / "dataset_1"
+    dataset_dir.mkdir()
+    path = dataset_dir / "track.gpx"
+    shutil.copy(GPX_EXAMPLE, path)
+    return str(path)
+
+
+# ==========================================
+# TESTS DE DOUGLAS-PEUCKER
+# ==========================================
+
+
+def test_douglas_peucker_removes_collinear_points():
+    coordinates = [[40.0, -3.0 + i * 0.001] for i in range(100)]
+
+    simplified = douglas_peucker(coordinates, 1.0)
+
+    assert simplified == [coordinates[0], coordinates[-1]]
+
+
+def test_douglas_peucker_keeps_corners():
+    coordinates = [[40.0, -3.0], [40.0, -2.99], [40.0, -2.98], [40.01, -2.98], [40.02, -2.98]]
+
+    simplified = douglas_peucker(coordinates, 5.0)
+
+    assert simplified == [[40.0, -3.0], [40.0, -2.98], [40.02, -2.98]]
+
+
+def test_douglas_peucker_short_or_zero_tolerance_is_unchanged():
+    coordinates = [[40.0, -3.0], [40.1, -3.1]]
+
+    assert douglas_peucker(coordinates, 10.0) == coordinates
+    assert douglas_peucker(coordinates * 3, 0) == coordinates * 3
+
+
+@pytest.mark.skipif(not HAS_NUMPY, reason="NumPy not installed")
+def test_douglas_peucker_numpy_matches_python(monkeypatch):
+    coordinates = GPXHandler().parse_gpx(str(GPX_EXAMPLE))["coordinates"]
+    numpy_result = douglas_peucker(coordinates, 8.0)
+
+    monkeypatch.setattr(gpx_simplify_mod, "HAS_NUMPY", False)
+    python_result = douglas_peucker(coordinates, 8.0)
+
+    assert numpy_result == python_result
+    assert 2 <= len(numpy_result) < len(coordinates)
+
+
+# ==========================================
+# TESTS DE NIVELES DE DETALLE
+# ==========================================
+
+
+def test_pick_level_for_zoom():
+    assert pick_level(None) is None
+    assert pick_level(1.0) is None
+    assert pick_level(tolerance_for_zoom(6)) == max(LOD_TOLERANCES)
+    assert pick_level(tolerance_for_zoom(14)) == 8.0
+    assert pick_level(tolerance_for_zoom(22)) is None
+
+
+def test_track_data_uses_full_resolution_stats(gpx_file):
+    full = GPXHandler().parse_gpx(gpx_file)
+
+    data = GPXLODCache().track_data(gpx_file, max(LOD_TOLERANCES))
+
+    assert len(data["coordinates"]) < len(full["coordinates"])
+    assert data["lod"] == {"tolerance": max(LOD_TOLERANCES), "points": len(data["coordinates"])}
+    for key in ("distance", "elevation_gain", "elevation_loss", "points_count", "bounds", "track_name"):
+        assert data[key] == full[key]
+
+
+def test_track_data_without_tolerance_returns_every_point(gpx_file):
+    full = GPXHandler().parse_gpx(gpx_file)
+
+    data = GPXLODCache().track_data(gpx_file, None)
+
+    assert data["coordinates"] == full["coordinates"]
+    assert data["lod"]["tolerance"] == 0.0
+
+
+def test_levels_are_cached_next_to_the_upload(gpx_file):
+    cache = GPXLODCache()
+    cache.track_data(gpx_file, 32.0)
+
+    lod_dir = os.path.join(os.path.dirname(gpx_file), ".lod", "track.gpx")
+    expected = {"summary.json", "full.json", *(f"{tolerance}.json" for tolerance in LOD_TOLERANCES)}
+    assert set(os.listdir(lod_dir)) == expected
+
+    with patch.object(GPXHandler, "parse_gpx", side_effect=AssertionError("should not parse")):
+        data = cache.track_data(gpx_file, 32.0)
+
+    assert data["lod"]["tolerance"] == 32.0
+
+
+def test_full_resolution_is_served_from_cache(gpx_file):
+    cache = GPXLODCache()
+    expected = cache.track_data(gpx_file, None)
+
+    with patch.object(GPXHandler, "parse_gpx", side_effect=AssertionError("should not parse")):
+        assert cache.track_data(gpx_file, None) == expected
+
+
+def test_etag_follows_content_and_level():
+    etag = GPXLODCache.etag(["a", "b"], 32.0, "ndjson")
+
+    assert GPXLODCache.etag(["a", "b"], 40.0, "ndjson") == etag
+    assert GPXLODCache.etag(["a", "c"], 32.0, "ndjson") != etag
+    assert GPXLODCache.etag(["a", "b"], None, "ndjson") != etag
+    assert GPXLODCache.etag(["a", "b"], 32.0, "geojson") != etag
+    assert GPXLODCache.etag(["a", None], 32.0, "ndjson") is None
+
+
+def test_track_data_reads_only_the_picked_level(gpx_file):
+    cache = GPXLODCache()
+    cache.build(gpx_file)
+    for tolerance in LOD_TOLERANCES:
+        if tolerance != 32.0:
+            os.remove(cache.cache_path(gpx_file, str(tolerance)))
+    os.remove(cache.cache_path(gpx_file, GPXLODCache.FULL))
+
+    with patch.object(GPXHandler, "parse_gpx", side_effect=AssertionError("should not parse")):
+        data = cache.track_data(gpx_file, 40.0)
+
+    assert data["lod"]["tolerance"] == 32.0
+    assert data["points_count"] > data["lod"]["points"]
+
+
+def test_cache_is_rebuilt_when_file_changes(gpx_file):
+    cache = GPXLODCache()
+    cache.build(gpx_file)
+
+    stat = os.stat(gpx_file)
+    os.utime(gpx_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cache.load(gpx_file, GPXLODCache.SUMMARY) is None
+    assert cache.load(gpx_file, "32.0") is None
+    assert cache.track_data(gpx_file, 32.0)["points_count"] > 0
+    assert cache.load(gpx_file, GPXLODCache.SUMMARY)["summary"]["points_count"] > 0
@@ -0,0 +1,187 @@
+"""
+Tests para el índice espacial de tracks GPX (tabla gpx_track_cell) y el filtro bbox de explore.
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+from app import db
+from app.modules.auth.models import User
+from app.modules.dataset.handlers.gpx_grid import MAX_LEVEL, cells_for_bounds, parse_bbox
+from app.modules.dataset.handlers.gpx_handler import GPXHandler
+from app.modules.dataset.models import DSMetaData, GPXDataset, GPXTrackCell, GPXTrackStats, PublicationType
+from app.modules.dataset.services import GPXTrackStatsService
+from app.modules.explore.repositories import ExploreRepository
+from app.modules.featuremodel.models import FeatureModel, FMMetaData
+from app.modules.hubfile.models import Hubfile
+
+GPX_EXAMPLES = Path(__file__).parent.parent / "gpx_examples"
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Crear aplicación Flask de test."""
+    monkeypatch.setenv("WORKING_DIR", str(tmp_path))
+
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def published_gpx_dataset(app, tmp_path):
+    """Dataset GPX publicado (con DOI) con file1.gpx en la carpeta de uploads."""
+    user = User(email="gpx@example.com", password="hashed")
+    db.session.add(user)
+    db.session.flush()
+
+    ds_meta = DSMetaData(
+        title="GPX Dataset",
+        description="Tracks",
+        publication_type=PublicationType.NONE,
+        dataset_doi="10.1234/gpx",
+    )
+    db.session.add(ds_meta)
+    db.session.flush()
+
+    dataset = GPXDataset(user_id=user.id, ds_meta_data_id=ds_meta.id)
+    db.session.add(dataset)
+    db.session.flush()
+
+    dataset_dir = tmp_path / "uploads" / f"user_{user.id}" / f"dataset_{dataset.id}"
+    dataset_dir.mkdir(parents=True)
+    shutil.copy(GPX_EXAMPLES / "file1.gpx", dataset_dir / "file1.gpx")
+
+    fm_meta = FMMetaData(
+        filename="file1.gpx", title="Track", description="Track", publication_type=PublicationType.NONE
+    )
+    db.session.add(fm_meta)
+    db.session.flush()
+
+    fm = FeatureModel(data_set_id=dataset.id, fm_meta_data_id=fm_meta.id)
+    db.session.add(fm)
+    db.session.flush()
+
+    db.session.add(Hubfile(name="file1.gpx", checksum="checksum-file1", size=1, feature_model_id=fm.id))
+    db.session.commit()
+    return dataset
+
+
+@pytest.fixture
+def track_bounds():
+    return GPXHandler().compute_stats(str(GPX_EXAMPLES / "file1.gpx"))["bounds"]
+
+
+def _viewport_around(bounds, margin=0.01):
+    return (
+        bounds["min_lon"] - margin,
+        bounds["min_lat"] - margin,
+        bounds["max_lon"] + margin,
+        bounds["max_lat"] + margin,
+    )
+
+
+# ==========================================
+# TESTS DE LA REJILLA
+# ==========================================
+
+
+def test_cells_for_bounds_uses_at_most_four_cells():
+    for bounds in (
+        {"min_lat": 37.38, "max_lat": 37.39, "min_lon": -5.99, "max_lon": -5.98},
+        {"min_lat": -10.0, "max_lat": 50.0, "min_lon": -120.0, "max_lon": 100.0},
+        {"min_lat": 0.0, "max_lat": 0.0, "min_lon": 0.0, "max_lon": 0.0},
+    ):
+        level, cells = cells_for_bounds(bounds)
+
+        assert 0 <= level <= MAX_LEVEL
+        assert 1 <= len(cells) <= 4
+
+
+def test_small_tracks_get_deeper_levels():
+    small, _ = cells_for_bounds({"min_lat": 37.38, "max_lat": 37.39, "min_lon": -5.99, "max_lon": -5.98})
+    large, _ = cells_for_bounds({"min_lat": 30.0, "max_lat": 45.0, "min_lon": -10.0, "max_lon": 5.0})
+
+    assert small > large
+
+
+def test_parse_bbox():
+    assert parse_bbox("") is None
+    assert parse_bbox("-6, 37, -5, 38") == (-6.0, 37.0, -5.0, 38.0)
+
+    with pytest.raises(ValueError):
+        parse_bbox("1,2,3")
+    with pytest.raises(ValueError):
+        parse_bbox("-6,38,-5,37")
+
+
+# ==========================================
+# TESTS DEL ÍNDICE Y DEL FILTRO BBOX
+# ==========================================
+
+
+def test_record_indexes_track_cells(app, published_gpx_dataset):
+    hubfile = published_gpx_dataset.feature_models[0].files[0]
+
+    stats = GPXTrackStatsService().record(hubfile, hubfile.get_path(), commit=True)
+
+    cells = GPXTrackCell.query.all()
+    assert 1 <= len(cells) <= 4
+    assert all(cell.track_stats_id == stats.id for cell in cells)
+    assert all(cell.dataset_id == published_gpx_dataset.id for cell in cells)
+
+
+def test_index_missing_tracks_backfills_cells(app, published_gpx_dataset, track_bounds):
+    hubfile = published_gpx_dataset.feature_models[0].files[0]
+    db.session.add(GPXTrackStats(hubfile_id=hubfile.id, checksum=hubfile.checksum, points_count=10, **track_bounds))
+    db.session.commit()
+
+    assert GPXTrackStatsService().index_missing_tracks() == 1
+    assert GPXTrackCell.query.count() >= 1
+    assert GPXTrackStatsService().index_missing_tracks() == 0
+
+
+def test_explore_bbox_filter(app, published_gpx_dataset, track_bounds):
+    GPXTrackStatsService().backfill(published_gpx_dataset.id)
+    repository = ExploreRepository()
+
+    inside = repository.filter(bbox=_viewport_around(track_bounds))
+    far_away = repository.filter(bbox=(100.0, -40.0, 110.0, -30.0))
+    corner = repository.filter(bbox=(track_bounds["max_lon"], track_bounds["max_lat"], 179.0, 89.0))
+
+    assert [d.id for d in inside] == [published_gpx_dataset.id]
+    assert far_away == []
+    assert [d.id for d in corner] == [published_gpx_dataset.id]
+
+
+def test_explore_bbox_filter_across_antimeridian(app, published_gpx_dataset, track_bounds):
+    GPXTrackStatsService().backfill(published_gpx_dataset.id)
+    west, south, east, north = _viewport_around(track_bounds)
+
+    # Viewport que va de 170º a la longitud este del track pasando por el antimeridiano
+    results = ExploreRepository().filter(bbox=(170.0, south, east, north))
+
+    assert [d.id for d in results] == [published_gpx_dataset.id]
+
+
+def test_explore_bbox_ignores_stale_stats(app, published_gpx_dataset, track_bounds):
+    GPXTrackStatsService().backfill(published_gpx_dataset.id)
+    hubfile = published_gpx_dataset.feature_models[0].files[0]
+    hubfile.checksum = "changed"
+    db.session.commit()
+
+    assert ExploreRepository().filter(bbox=_viewport_around(track_bounds)) == []
@@ -0,0 +1,236 @@
+"""
+Tests para las estadísticas persistidas por archivo GPX (tabla gpx_track_stats).
+"""
+
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+
+from app import db
+from app.modules.auth.models import User
+from app.modules.dataset.handlers.gpx_handler import GPXHandler
+from app.modules.dataset.models import DSMetaData, GPXDataset, GPXTrackStats, PublicationType
+from app.modules.dataset.services import GPXTrackStatsService, VersionService
+from app.modules.explore.repositories import ExploreRepository
+from app.modules.featuremodel.models import FeatureModel, FMMetaData
+from app.modules.hubfile.models import Hubfile
+
+GPX_EXAMPLES = Path(__file__).parent.parent / "gpx_examples"
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Crear aplicación Flask de test."""
+    monkeypatch.setenv("WORKING_DIR", str(tmp_path))
+
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def gpx_dataset(app, tmp_path):
+    """Dataset GPX con dos tracks copiados a la carpeta de uploads."""
+    user = User(email="gpx@example.com", password="hashed")
+    db.session.add(user)
+    db.session.flush()
+
+    ds_meta = DSMetaData(title="GPX Dataset", description="Tracks", publication_type=PublicationType.NONE)
+    db.session.add(ds_meta)
+    db.session.flush()
+
+    dataset = GPXDataset(user_id=user.id, ds_meta_data_id=ds_meta.id)
+    db.session.add(dataset)
+    db.session.flush()
+
+    dataset_dir = tmp_path / "uploads" / f"user_{user.id}" / f"dataset_{dataset.id}"
+    dataset_dir.mkdir(parents=True)
+
+    for name in ("file1.gpx", "file2.gpx"):
+        shutil.copy(GPX_EXAMPLES / name, dataset_dir / name)
+
+        fm_meta = FMMetaData(filename=name, title=name, description="Track", publication_type=PublicationType.NONE)
+        db.session.add(fm_meta)
+        db.session.flush()
+
+        fm = FeatureModel(data_set_id=dataset.id, fm_meta_data_id=fm_meta.id)
+        db.session.add(fm)
+        db.session.flush()
+
+        db.session.add(Hubfile(name=name, checksum=f"checksum-{name}", size=1, feature_model_id=fm.id))
+
+    db.session.commit()
+    return dataset
+
+
+def _expected_totals():
+    handler = GPXHandler()
+    parsed = [handler.parse_gpx(str(GPX_EXAMPLES / name)) for name in ("file1.gpx", "file2.gpx")]
+    return {
+        "distance": sum(p["distance"] for p in parsed),
+        "elevation_gain": sum(p["elevation_gain"] for p in parsed),
+        "elevation_loss": sum(p["elevation_loss"] for p in parsed),
+        "points_count": sum(p["points_count"] for p in parsed),
+    }
+
+
+# ==========================================
+# TESTS DE GPXTrackStatsService
+# ==========================================
+
+
+def test_record_stores_stats(app, gpx_dataset):
+    """record() calcula y guarda las estadísticas del archivo."""
+    hubfile = gpx_dataset.feature_models[0].files[0]
+
+    stats = GPXTrackStatsService().record(hubfile, hubfile.get_path(), commit=True)
+    parsed = GPXHandler().parse_gpx(hubfile.get_path())
+
+    assert stats.hubfile_id == hubfile.id
+    assert stats.checksum == hubfile.checksum
+    assert stats.distance == pytest.approx(parsed["distance"])
+    assert stats.points_count == parsed["points_count"]
+    assert stats.bounds() == parsed["bounds"]
+
+
+def test_record_is_idempotent_per_checksum(app, gpx_dataset):
+    """Si ya hay estadísticas para el mismo checksum no se vuelve a parsear."""
+    hubfile = gpx_dataset.feature_models[0].files[0]
+    service = GPXTrackStatsService()
+    first = service.record(hubfile, hubfile.get_path(), commit=True)
+
+    with patch.object(GPXHandler, "compute_stats", side_effect=AssertionError("should not parse")):
+        second = service.record(hubfile, hubfile.get_path(), commit=True)
+
+    assert first.id == second.id
+    assert GPXTrackStats.query.count() == 1
+
+
+def test_backfill_then_totals_read_from_table(app, gpx_dataset):
+    """Leer los totales no parsea nada; el backfill calcula una vez los archivos sin estadísticas."""
+    assert gpx_dataset.calculate_total_distance() == 0
+    assert GPXTrackStats.query.count() == 0
+
+    assert GPXTrackStatsService().backfill(gpx_dataset.id) == 2
+    totals = gpx_dataset.track_totals()
+    expected = _expected_totals()
+
+    assert GPXTrackStats.query.count() == 2
+    for key, value in expected.items():
+        assert totals[key] == pytest.approx(value)
+
+    with patch.object(GPXHandler, "compute_stats", side_effect=AssertionError("should not parse")):
+        assert gpx_dataset.calculate_total_distance() == pytest.approx(expected["distance"])
+        assert gpx_dataset.count_total_points() == expected["points_count"]
+
+
+def test_backfill_marks_broken_file_and_does_not_retry(app, gpx_dataset):
+    """Un archivo que no se puede parsear queda marcado y el siguiente backfill no lo reintenta."""
+    broken = gpx_dataset.feature_models[0].files[0]
+    Path(broken.get_path()).write_text("<not-gpx")
+    service = GPXTrackStatsService()
+
+    assert service.backfill(gpx_dataset.id) == 1
+    marker = service.repository.get_for_hubfile(broken.id, broken.checksum)
+    assert marker.parse_error
+    assert marker.distance == 0
+    assert marker.cells == []
+    assert service.repository.get_hubfiles_without_stats(gpx_dataset.id) == []
+
+    assert service.backfill(gpx_dataset.id) == 0
+    assert GPXTrackStats.query.count() == 2
+
+
+def test_totals_ignore_stale_checksum(app, gpx_dataset):
+    """Una fila con checksum antiguo no cuenta y se recalcula."""
+    hubfile = gpx_dataset.feature_models[0].files[0]
+    db.session.add(GPXTrackStats(hubfile_id=hubfile.id, checksum="old", distance=1e9, points_count=1))
+    db.session.commit()
+
+    GPXTrackStatsService().backfill(gpx_dataset.id)
+    totals = gpx_dataset.track_totals()
+
+    assert totals["distance"] == pytest.approx(_expected_totals()["distance"])
+
+
+def test_create_version_reads_persisted_stats(app, gpx_dataset):
+    """create_version no parsea los archivos cuando ya existen las estadísticas."""
+    GPXTrackStatsService().backfill(gpx_dataset.id)
+    user = User.query.first()
+
+    with patch.object(GPXHandler, "parse_gpx", side_effect=AssertionError("should not parse")):
+        version = VersionService.create_version(gpx_dataset, "Test", user)
+
+    expected = _expected_totals()
+    assert version.total_distance == pytest.approx(expected["distance"])
+    assert version.total_points == expected["points_count"]
+    assert version.track_count == 2
+
+
+# ==========================================
+# TESTS DE TOTALES INDEXADOS EN DATA_SET
+# ==========================================
+
+
+def test_totals_are_stored_on_dataset(app, gpx_dataset):
+    """Los totales se copian a las columnas indexadas de data_set."""
+    expected = _expected_totals()
+
+    GPXTrackStatsService().backfill()
+    db.session.expire_all()
+    dataset = GPXDataset.query.get(gpx_dataset.id)
+
+    assert dataset.total_distance == pytest.approx(expected["distance"])
+    assert dataset.total_elevation_gain == pytest.approx(expected["elevation_gain"])
+
+
+def test_refresh_dataset_totals_after_adding_file(app, gpx_dataset):
+    """Al añadir un archivo los totales se recalculan sin volver a parsear los anteriores."""
+    service = GPXTrackStatsService()
+    service.backfill(gpx_dataset.id)
+    hubfile = gpx_dataset.feature_models[0].files[0]
+    db.session.query(GPXTrackStats).filter_by(hubfile_id=hubfile.id).update({"distance": 1000.0})
+
+    with patch.object(GPXHandler, "compute_stats", side_effect=AssertionError("should not parse")):
+        totals = service.refresh_dataset_totals(gpx_dataset)
+
+    assert gpx_dataset.total_distance == pytest.approx(totals["distance"])
+    assert totals["distance"] < _expected_totals()["distance"]
+
+
+def test_explore_filters_and_sorts_by_distance(app, gpx_dataset):
+    """Filtros de distancia y desnivel, y orden por distancia, resueltos en SQL."""
+    gpx_dataset.ds_meta_data.dataset_doi = "10.1234/gpx"
+    short_meta = DSMetaData(
+        title="Short", description="Short", publication_type=PublicationType.NONE, dataset_doi="10.1234/short"
+    )
+    db.session.add(short_meta)
+    db.session.flush()
+    short = GPXDataset(
+        user_id=gpx_dataset.user_id, ds_meta_data_id=short_meta.id, total_distance=500.0, total_elevation_gain=5.0
+    )
+    db.session.add(short)
+    db.session.commit()
+    GPXTrackStatsService().backfill(gpx_dataset.id)
+
+    km = gpx_dataset.total_distance / 1000
+    repository = ExploreRepository()
+
+    assert [d.id for d in repository.filter(min_distance=1)] == [gpx_dataset.id]
+    assert [d.id for d in repository.filter(max_distance=int(km) - 1)] == [short.id]
+    assert [d.id for d in repository.filter(min_elevation_gain=10)] == [gpx_dataset.id]
+    assert [d.id for d in repository.filter(sorting="distance")] == [gpx_dataset.id, short.id]
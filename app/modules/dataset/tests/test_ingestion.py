@@ -0,0 +1,146 @@
+"""
+Tests para la ingesta de archivos en una sola pasada (validación, checksum y estadísticas).
+"""
+
+import hashlib
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+import app.modules.dataset.ingestion as ingestion_mod
+from app.modules.dataset.handlers.gpx_handler import GPXHandler as GPXTrackHandler
+from app.modules.dataset.handlers.gpx_stream import GPXStreamReader
+from app.modules.dataset.ingestion import ingest_file, recall_ingestion, remember_ingestion
+from app.modules.dataset.registry import DataTypeHandler, get_descriptor
+from app.modules.dataset.services import DataSetService, calculate_checksum_and_size
+
+GPX_EXAMPLE = Path(__file__).parent.parent / "gpx_examples" / "file1.gpx"
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """Bloques de lectura diminutos para forzar tokens y etiquetas partidos entre bloques."""
+    monkeypatch.setattr(ingestion_mod, "INGEST_CHUNK_SIZE", 7)
+
+
+def test_gpx_ingest_matches_separate_passes(small_chunks):
+    result = get_descriptor("gpx").ingest(str(GPX_EXAMPLE))
+
+    assert result.kind == "gpx"
+    assert (result.checksum, result.size) == calculate_checksum_and_size(str(GPX_EXAMPLE))
+    assert result.checksum == hashlib.md5(GPX_EXAMPLE.read_bytes()).hexdigest()
+    assert result.sha256 == hashlib.sha256(GPX_EXAMPLE.read_bytes()).hexdigest()
+    assert result.stats == GPXTrackHandler().compute_stats(str(GPX_EXAMPLE))
+
+
+def test_ingest_reads_the_file_once():
+    with patch.object(ingestion_mod, "iter_file_chunks", wraps=ingestion_mod.iter_file_chunks) as reads:
+        get_descriptor("gpx").ingest(str(GPX_EXAMPLE))
+
+    assert reads.call_count == 1
+
+
+def test_uvl_ingest_finds_features_split_between_chunks(tmp_path, small_chunks):
+    uvl_file = tmp_path / "model.uvl"
+    uvl_file.write_text("namespace Model\nFEATURES\n    Root\n")
+
+    result = get_descriptor("uvl").ingest(str(uvl_file))
+
+    assert result.size == uvl_file.stat().st_size
+    # La palabra clave de la gramática va en minúsculas: se acepta, pero con errores guardados
+    assert result.errors
+    assert result.model is None
+
+
+def test_uvl_ingest_runs_grammar_check(tmp_path, small_chunks):
+    uvl_file = tmp_path / "model.uvl"
+    uvl_file.write_text("features\n    Root\n        optional\n            A\n")
+
+    result = get_descriptor("uvl").ingest(str(uvl_file))
+
+    assert result.errors == []
+    assert result.stats is None
+    assert [feature.name for feature in result.model.get_features()] == ["Root", "A"]
+
+
+def test_uvl_ingest_rejects_missing_features(tmp_path, small_chunks):
+    uvl_file = tmp_path / "model.uvl"
+    uvl_file.write_text("namespace Model\nconstraints\n")
+
+    with pytest.raises(ValueError, match="missing 'features' section"):
+        get_descriptor("uvl").ingest(str(uvl_file))
+
+
+def test_gpx_ingest_rejects_truncated_file(tmp_path):
+    gpx_file = tmp_path / "broken.gpx"
+    gpx_file.write_bytes(GPX_EXAMPLE.read_bytes()[:-200])
+
+    with pytest.raises(ValueError, match="XML parsing error"):
+        get_descriptor("gpx").ingest(str(gpx_file))
+
+
+def test_handler_without_sink_falls_back_to_validate(tmp_path):
+    class PlainHandler(DataTypeHandler):
+        validated = []
+
+        def validate(self, filepath):
+            self.validated.append(filepath)
+            return True
+
+    path = tmp_path / "data.txt"
+    path.write_bytes(b"payload")
+
+    result = ingest_file(str(path), PlainHandler(), kind="plain")
+
+    assert PlainHandler.validated == [str(path)]
+    assert result.checksum == hashlib.md5(b"payload").hexdigest()
+    assert result.stats is None
+    assert result.errors is None
+
+
+def test_stream_reader_push_mode_matches_iterparse():
+    data = GPX_EXAMPLE.read_bytes()
+    pushed = GPXStreamReader(chunk_size=100)
+    points = []
+    for start in range(0, len(data), 7):
+        points.extend(chunk.coordinates for chunk in pushed.feed(data[start : start + 7]))
+    points.extend(chunk.coordinates for chunk in pushed.close())
+
+    parsed = GPXStreamReader(chunk_size=100)
+    expected = [chunk.coordinates for chunk in parsed.iter_chunks(str(GPX_EXAMPLE))]
+
+    assert points == expected
+    assert pushed.track_name == parsed.track_name
+
+
+def test_upload_ingestion_is_reused_once(tmp_path):
+    """El resultado guardado al subir el archivo evita volver a leerlo al crear el dataset."""
+    gpx_file = tmp_path / "track.gpx"
+    gpx_file.write_bytes(GPX_EXAMPLE.read_bytes())
+    uploaded = DataSetService().ingest_upload(str(gpx_file), "gpx")
+
+    with patch.object(ingestion_mod, "iter_file_chunks", side_effect=AssertionError("should not read")):
+        reused = get_descriptor("gpx").ingest(str(gpx_file))
+
+    assert (reused.checksum, reused.sha256, reused.size) == (uploaded.checksum, uploaded.sha256, uploaded.size)
+    assert reused.stats == uploaded.stats
+    assert not (tmp_path / ingestion_mod.INGESTED_DIR / "track.gpx.json").exists()
+
+
+def test_remembered_ingestion_is_ignored_if_the_file_changes(tmp_path):
+    gpx_file = tmp_path / "track.gpx"
+    gpx_file.write_bytes(GPX_EXAMPLE.read_bytes())
+    remember_ingestion(str(gpx_file), get_descriptor("gpx").ingest(str(gpx_file)))
+    gpx_file.write_bytes(GPX_EXAMPLE.read_bytes() + b"\n")
+
+    assert recall_ingestion(str(gpx_file), "gpx") is None
+
+
+def test_upload_rejects_uvl_with_grammar_errors(tmp_path):
+    uvl_file = tmp_path / "model.uvl"
+    uvl_file.write_text("namespace Model\nFEATURES\n    Root\n")
+
+    with pytest.raises(ValueError):
+        DataSetService().ingest_upload(str(uvl_file), "uvl")
+    assert recall_ingestion(str(uvl_file), "uvl") is None
@@ -0,0 +1,129 @@
+"""
+Tests para el pool de procesos que parsea en paralelo los archivos de un dataset.
+"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app.modules.dataset.handlers.gpx_handler import GPXHandler
+from app.modules.dataset.parse_pool import ParsePool, gpx_file_stats
+
+GPX_EXAMPLES = sorted(str(path) for path in (Path(__file__).parent.parent / "gpx_examples").glob("*.gpx"))
+
+
+def slow_or_fast(value: str) -> str:
+    """Función de prueba (de módulo, para que sea serializable): 'slow' se bloquea."""
+    if value == "slow":
+        time.sleep(30)
+    if value == "boom":
+        raise RuntimeError("boom")
+    return value.upper()
+
+
+def worker_pid(value: str) -> int:
+    """Función de prueba: tarda un poco y devuelve el proceso que la ejecutó."""
+    time.sleep(1)
+    return os.getpid()
+
+
+def flask_app_created(value: str) -> bool:
+    """Función de prueba: si el worker ha creado la aplicación Flask al importar ``app``."""
+    return "app" in vars(sys.modules["app"])
+
+
+@pytest.fixture
+def pool():
+    pool = ParsePool(max_workers=2, timeout=20)
+    yield pool
+    pool.shutdown(kill=True)
+
+
+def test_pool_results_match_inline_parsing(pool):
+    results = pool.map(gpx_file_stats, GPX_EXAMPLES)
+
+    assert [result.path for result in results] == GPX_EXAMPLES
+    assert all(result.ok for result in results)
+    assert [result.value for result in results] == [GPXHandler().compute_stats(path) for path in GPX_EXAMPLES]
+
+
+def test_workers_do_not_create_the_flask_app(pool):
+    results = pool.map(flask_app_created, ["a", "b"])
+
+    assert [result.value for result in results] == [False, False]
+
+
+def test_pool_isolates_errors(pool, tmp_path):
+    broken = tmp_path / "broken.gpx"
+    broken.write_text("<gpx><trk>")
+
+    results = pool.map(gpx_file_stats, [GPX_EXAMPLES[0], str(broken), GPX_EXAMPLES[1]])
+
+    assert [result.ok for result in results] == [True, False, True]
+    assert "XML parsing error" in results[1].error
+
+
+def test_pool_times_out_per_file():
+    pool = ParsePool(max_workers=2, timeout=3)
+    try:
+        started = time.monotonic()
+        results = pool.map(slow_or_fast, ["a", "slow", "b", "boom", "c"])
+    finally:
+        pool.shutdown(kill=True)
+
+    assert time.monotonic() - started < 25
+    assert [result.value for result in results] == ["A", None, "B", None, "C"]
+    assert "Timed out" in results[1].error
+    assert results[3].error == "boom"
+
+
+def test_worker_startup_does_not_count_towards_timeout():
+    pool = ParsePool(max_workers=2, timeout=0.5)
+    try:
+        results = pool.map(slow_or_fast, ["a", "b", "c"])
+    finally:
+        pool.shutdown(kill=True)
+
+    assert [result.value for result in results] == ["A", "B", "C"]
+
+
+def test_timeout_does_not_affect_concurrent_calls():
+    pool = ParsePool(max_workers=2, timeout=3)
+    other_results = {}
+
+    def other_call():
+        other_results.update(pool.imap(worker_pid, ["d", "e", "f", "g"]))
+
+    try:
+        pool.map(slow_or_fast, ["a", "b"])  # Arranca los workers
+        other = threading.Thread(target=other_call)
+        timed_out = pool.imap(slow_or_fast, ["slow", "c"])
+        other.start()
+        results = dict(timed_out)
+        other.join(60)
+    finally:
+        pool.shutdown(kill=True)
+
+    assert "Timed out" in results[0].error and results[1].value == "C"
+    # La otra llamada termina en los workers (no en línea por un pool roto) y sin timeouts
+    assert sorted(other_results) == [0, 1, 2, 3]
+    assert all(result.ok and result.value != os.getpid() for result in other_results.values())
+
+
+def test_pool_without_workers_runs_inline():
+    results = ParsePool(max_workers=0).map(slow_or_fast, ["a", "boom"])
+
+    assert results[0].value == "A"
+    assert results[1].error == "boom"
+
+
+def test_imap_yields_each_result_once_as_it_finishes(pool):
+    results = dict(pool.imap(slow_or_fast, ["a", "boom", "b"]))
+
+    assert sorted(results) == [0, 1, 2]
+    assert results[0].value == "A" and results[2].value == "B"
+    assert not results[1].ok
@@ -5,9 +5,11 @@ Cubre endpoints de versiones, comparaciones, edición, comentarios, etc.
 
 import io
 import json
+import os
 from pathlib import Path
 from unittest.mock import patch
 
+import flask_login
 import pytest
 from flask import Flask
 from flask_login import LoginManager
@@ -699,6 +701,127 @@ def test_get_gpx_data_not_gpx_file(authenticated_client, sample_dataset, app):
     assert response.status_code == 400
 
 
+def test_get_gpx_data_unsupported_format(client):
+    """Test formato de codificación no soportado."""
+    response = client.get("/api/gpx/1?format=xml")
+
+    assert response.status_code == 400
+
+
+def test_get_gpx_data_invalid_precision(client):
+    """Test precisión de polyline no soportada."""
+    response = client.get("/api/gpx/1?format=polyline&precision=9")
+
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def gpx_dataset_dir(app, sample_dataset, tmp_path):
+    """Añade dos tracks GPX al dataset de ejemplo y devuelve su carpeta de uploads."""
+    from app.modules.featuremodel.models import FeatureModel, FMMetaData
+    from app.modules.hubfile.models import Hubfile
+
+    gpx_examples = Path(__file__).parent.parent / "gpx_examples"
+    dataset_dir = tmp_path / "uploads" / f"dataset_{sample_dataset}"
+    dataset_dir.mkdir(parents=True)
+
+    with app.app_context():
+        from app.modules.dataset.models import PublicationType
+
+        for name in ("file1.gpx", "file2.gpx"):
+            (dataset_dir / name).write_bytes((gpx_examples / name).read_bytes())
+            fm_meta = FMMetaData(filename=name, title=name, description="Track", publication_type=PublicationType.NONE)
+            db.session.add(fm_meta)
+            db.session.flush()
+            fm = FeatureModel(data_set_id=sample_dataset, fm_meta_data_id=fm_meta.id)
+            db.session.add(fm)
+            db.session.flush()
+            db.session.add(Hubfile(name=name, checksum=name, size=1, feature_model_id=fm.id))
+        db.session.commit()
+
+    # Otros módulos de test sustituyen routes.current_user; aquí se usa el proxy real de Flask-Login
+    with (
+        patch("app.modules.dataset.routes._gpx_upload_dir", return_value=str(dataset_dir)),
+        patch("app.modules.dataset.routes.current_user", flask_login.current_user),
+    ):
+        yield dataset_dir
+
+
+def test_get_dataset_gpx_data_not_found(client):
+    """Test obtener tracks de un dataset inexistente."""
+    response = client.get("/api/dataset/99999/gpx")
+
+    assert response.status_code == 404
+
+
+def test_get_dataset_gpx_data_unauthorized(client, gpx_dataset_dir, sample_dataset):
+    """Un dataset sin publicar solo lo ve su propietario."""
+    response = client.get(f"/api/dataset/{sample_dataset}/gpx")
+
+    assert response.status_code == 403
+
+
+def test_get_dataset_gpx_data_ndjson(authenticated_client, gpx_dataset_dir, sample_dataset):
+    """Una línea JSON por track con geometría y estadísticas."""
+    response = authenticated_client.get(f"/api/dataset/{sample_dataset}/gpx?zoom=10")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["name"] for line in lines] == ["file1.gpx", "file2.gpx"]
+    for line in lines:
+        assert line["coordinates"]
+        assert line["points_count"] >= len(line["coordinates"])
+        assert "distance" in line
+
+
+def test_get_dataset_gpx_data_geojson(authenticated_client, gpx_dataset_dir, sample_dataset):
+    """FeatureCollection con un LineString [lon, lat] por track."""
+    response = authenticated_client.get(f"/api/dataset/{sample_dataset}/gpx?format=geojson&zoom=10")
+
+    assert response.status_code == 200
+    collection = json.loads(response.get_data(as_text=True))
+    assert collection["type"] == "FeatureCollection"
+    assert len(collection["features"]) == 2
+
+    feature = collection["features"][0]
+    bounds = feature["properties"]["bounds"]
+    lon, lat = feature["geometry"]["coordinates"][0]
+    assert feature["geometry"]["type"] == "LineString"
+    assert bounds["min_lat"] <= lat <= bounds["max_lat"]
+    assert bounds["min_lon"] <= lon <= bounds["max_lon"]
+    assert feature["bbox"] == [bounds["min_lon"], bounds["min_lat"], bounds["max_lon"], bounds["max_lat"]]
+
+
+def test_get_dataset_gpx_data_reports_missing_file(authenticated_client, gpx_dataset_dir, sample_dataset):
+    """Un archivo que falta no corta la respuesta del resto de tracks."""
+    (gpx_dataset_dir / "file1.gpx").unlink()
+
+    response = authenticated_client.get(f"/api/dataset/{sample_dataset}/gpx")
+
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert "error" in lines[0]
+    assert lines[1]["coordinates"]
+
+
+def test_get_dataset_gpx_data_not_modified(authenticated_client, gpx_dataset_dir, sample_dataset):
+    """Con el ETag de la respuesta anterior se contesta 304 sin leer ningún archivo."""
+    from app.modules.dataset.handlers.gpx_handler import GPXHandler
+
+    response = authenticated_client.get(f"/api/dataset/{sample_dataset}/gpx?zoom=10")
+    etag, _ = response.get_etag()
+    assert etag
+
+    with patch.object(GPXHandler, "parse_gpx", side_effect=AssertionError("should not parse")):
+        response = authenticated_client.get(
+            f"/api/dataset/{sample_dataset}/gpx?zoom=10", headers={"If-None-Match": f'"{etag}"'}
+        )
+        assert response.status_code == 304
+
+    response = authenticated_client.get(f"/api/dataset/{sample_dataset}/gpx", headers={"If-None-Match": f'"{etag}"'})
+    assert response.status_code == 200
+
+
 # ==========================================
 # TESTS DE DOWNLOAD DATASET
 # ==========================================
@@ -711,6 +834,141 @@ def test_download_dataset_nonexistent(client):
     assert response.status_code == 404
 
 
+def test_download_dataset_streams_zip(app, client, auth_user, sample_dataset, tmp_path, monkeypatch):
+    """El ZIP se envía en streaming, sin archivo temporal, y omite las carpetas ocultas."""
+    from zipfile import ZipFile
+
+    from app.modules.dataset.archive_cache import ArchiveCache
+    from app.modules.dataset.models import DSDownloadRecord
+
+    monkeypatch.setenv("WORKING_DIR", str(tmp_path))
+    monkeypatch.setattr("app.modules.dataset.archive_cache._cache", ArchiveCache(cache_dir=str(tmp_path / "archives")))
+    dataset_dir = tmp_path / "uploads" / f"user_{auth_user}" / f"dataset_{sample_dataset}"
+    (dataset_dir / ".lod").mkdir(parents=True)
+    (dataset_dir / ".lod" / "cache.json").write_text("{}")
+    (dataset_dir / "model.uvl").write_text("features\n    Root\n")
+
+    with (
+        patch("app.modules.dataset.routes.current_user", flask_login.current_user),
+        patch("tempfile.mkdtemp", side_effect=AssertionError("should not use a temp dir")),
+    ):
+        response = client.get(f"/dataset/download/{sample_dataset}")
+        assert response.is_streamed
+        data = response.get_data()
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/zip"
+    assert f"dataset_{sample_dataset}.zip" in response.headers["Content-Disposition"]
+    assert "download_cookie" in response.headers["Set-Cookie"]
+    with ZipFile(io.BytesIO(data)) as zf:
+        assert zf.namelist() == [f"dataset_{sample_dataset}/model.uvl"]
+        assert zf.read(f"dataset_{sample_dataset}/model.uvl") == b"features\n    Root\n"
+
+    with app.app_context():
+        assert DSDownloadRecord.query.filter_by(dataset_id=sample_dataset).count() == 1
+
+
+def test_download_dataset_is_served_from_archive_cache(app, client, auth_user, sample_dataset, tmp_path, monkeypatch):
+    """La segunda descarga envía el ZIP guardado; un cambio en los archivos genera otro."""
+    from app.modules.dataset.archive_cache import ArchiveCache
+    from app.modules.dataset.services import DataSetService
+
+    monkeypatch.setenv("WORKING_DIR", str(tmp_path))
+    cache = ArchiveCache(cache_dir=str(tmp_path / "archives"))
+    monkeypatch.setattr("app.modules.dataset.archive_cache._cache", cache)
+    dataset_dir = tmp_path / "uploads" / f"user_{auth_user}" / f"dataset_{sample_dataset}"
+    dataset_dir.mkdir(parents=True)
+    (dataset_dir / "model.uvl").write_text("features\n    Root\n")
+
+    with patch("app.modules.dataset.routes.current_user", flask_login.current_user):
+        first = client.get(f"/dataset/download/{sample_dataset}").get_data()
+        with patch.object(DataSetService, "stream_zip", side_effect=AssertionError("should not rebuild")):
+            cached = client.get(f"/dataset/download/{sample_dataset}")
+            assert cached.get_data() == first
+            assert cached.headers["Content-Length"] == str(len(first))
+
+        with patch.object(DataSetService, "archive_fingerprint", return_value="changed"):
+            rebuilt = client.get(f"/dataset/download/{sample_dataset}")
+            assert "Content-Length" not in rebuilt.headers
+            rebuilt.get_data()
+
+    archives = os.listdir(tmp_path / "archives" / f"dataset_{sample_dataset}")
+    assert sorted(name for name in archives if name.endswith(".zip")) == ["changed.zip"]
+
+
+@pytest.fixture
+def archive_dataset(auth_user, sample_dataset, tmp_path, monkeypatch):
+    """Dataset con un archivo en disco y una caché de ZIPs vacía."""
+    from app.modules.dataset.archive_cache import ArchiveCache
+
+    monkeypatch.setenv("WORKING_DIR", str(tmp_path))
+    cache = ArchiveCache(cache_dir=str(tmp_path / "archives"))
+    monkeypatch.setattr("app.modules.dataset.archive_cache._cache", cache)
+    dataset_dir = tmp_path / "uploads" / f"user_{auth_user}" / f"dataset_{sample_dataset}"
+    dataset_dir.mkdir(parents=True)
+    (dataset_dir / "model.uvl").write_bytes(os.urandom(4096))
+
+    with patch("app.modules.dataset.routes.current_user", flask_login.current_user):
+        yield cache
+
+
+def test_download_dataset_revalidation_returns_304(app, client, sample_dataset, archive_dataset):
+    """Con el ETag del ZIP ya descargado se responde 304 sin generar nada ni contar otra descarga."""
+    from app.modules.dataset.models import DSDownloadRecord
+    from app.modules.dataset.services import DataSetService
+
+    first = client.get(f"/dataset/download/{sample_dataset}")
+    first.get_data()
+    etag = first.headers["ETag"]
+
+    with patch.object(DataSetService, "stream_zip", side_effect=AssertionError("should not rebuild")):
+        response = client.get(f"/dataset/download/{sample_dataset}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    with app.app_context():
+        assert DSDownloadRecord.query.filter_by(dataset_id=sample_dataset).count() == 1
+
+
+def test_download_dataset_resumes_with_range(client, sample_dataset, archive_dataset):
+    """Un Range se sirve del ZIP guardado (generándolo antes si hace falta) con 206."""
+    partial = client.get(f"/dataset/download/{sample_dataset}", headers={"Range": "bytes=100-"})
+    full = client.get(f"/dataset/download/{sample_dataset}").get_data()
+
+    assert partial.status_code == 206
+    assert partial.headers["Accept-Ranges"] == "bytes"
+    assert partial.headers["Content-Range"] == f"bytes 100-{len(full) - 1}/{len(full)}"
+    assert partial.get_data() == full[100:]
+
+    resumed = client.get(
+        f"/dataset/download/{sample_dataset}",
+        headers={"Range": "bytes=0-9", "If-Range": partial.headers["ETag"]},
+    )
+    assert resumed.status_code == 206
+    assert resumed.get_data() == full[:10]
+
+
+def test_download_dataset_ignores_range_of_other_content(client, sample_dataset, archive_dataset):
+    """Si el ZIP cambió (If-Range con otro ETag) se envía completo."""
+    response = client.get(f"/dataset/download/{sample_dataset}", headers={"Range": "bytes=10-", "If-Range": '"old"'})
+
+    assert response.status_code == 200
+    assert response.get_data().startswith(b"PK")
+
+
+def test_download_cached_dataset_with_x_accel(client, sample_dataset, archive_dataset, tmp_path, monkeypatch):
+    """Con FILE_DELIVERY=x-accel el ZIP ya guardado lo envía nginx."""
+    archive_dataset.cache_dir = str(tmp_path / "cache" / "archives")
+    client.get(f"/dataset/download/{sample_dataset}").get_data()
+    monkeypatch.setenv("FILE_DELIVERY", "x-accel")
+
+    response = client.get(f"/dataset/download/{sample_dataset}")
+
+    assert response.get_data() == b""
+    assert response.headers["X-Accel-Redirect"].startswith(f"/_protected/cache/archives/dataset_{sample_dataset}/")
+    assert response.headers["Content-Type"] == "application/zip"
+
+
 # ==========================================
 # TESTS DE UNSYNCHRONIZED DATASET
 # ==========================================
@@ -86,18 +86,16 @@ def test_view_version(test_client, dataset, versions):
 
 
 def fake_zip(*args, **kwargs):
-    import tempfile
+    yield b"test zip "
+    yield b"content"
 
-    f = tempfile.NamedTemporaryFile(delete=False)
-    f.write(b"test zip content")
-    f.close()
-    return f.name
 
-
-def test_download_version_zip(test_client, dataset, versions, monkeypatch):
+def test_download_version_zip(test_client, dataset, versions, monkeypatch, tmp_path):
     from app.modules.dataset import services
+    from app.modules.dataset.archive_cache import ArchiveCache
 
     monkeypatch.setattr(services.VersionService, "build_version_zip", fake_zip)
+    monkeypatch.setattr("app.modules.dataset.archive_cache._cache", ArchiveCache(cache_dir=str(tmp_path)))
 
     v = versions[0]
     res = test_client.get(f"/version/{dataset.id}/{v.id}/download")
@@ -0,0 +1,88 @@
+"""
+Tests para la escritura de ZIPs en streaming.
+"""
+
+import io
+from types import SimpleNamespace
+from zipfile import ZIP_STORED, ZipFile
+
+from app.modules.dataset.services import VersionService
+from app.modules.dataset.zip_stream import ZipStream, stream_zip
+from app.modules.hubfile.storage import compress_file
+
+
+def test_stream_produces_valid_zip(tmp_path):
+    big = tmp_path / "big.bin"
+    big.write_bytes(bytes(range(256)) * 1024)
+    small = tmp_path / "small.txt"
+    small.write_text("hello")
+
+    stream = ZipStream()
+    chunks = [
+        *stream.write_file(str(big), "ds/big.bin", chunk_size=4096),
+        *stream.write_file(str(small), "ds/small.txt"),
+        *stream.write_bytes(b"manifest", "ds/manifest.txt"),
+        *stream.close(),
+    ]
+
+    assert len(chunks) > 3
+    with ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["ds/big.bin", "ds/small.txt", "ds/manifest.txt"]
+        assert zf.read("ds/big.bin") == big.read_bytes()
+        assert zf.read("ds/small.txt") == b"hello"
+
+
+def test_stream_sends_data_before_archive_is_finished(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("a" * 1000)
+
+    stream = ZipStream(compression=ZIP_STORED)
+    first = b"".join(stream.write_file(str(path), "a.txt"))
+
+    assert first.startswith(b"PK\x03\x04")
+    assert b"a" * 1000 in first
+
+    rest = b"".join(stream.close())
+    with ZipFile(io.BytesIO(first + rest)) as zf:
+        assert zf.read("a.txt") == b"a" * 1000
+
+
+def test_stream_zip_skips_missing_files(tmp_path):
+    present = tmp_path / "present.txt"
+    present.write_text("here")
+
+    data = b"".join(stream_zip([(str(tmp_path / "gone.txt"), "gone.txt"), (str(present), "present.txt")]))
+
+    with ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["present.txt"]
+
+
+def test_version_zip_is_streamed_from_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORKING_DIR", str(tmp_path))
+    dataset = SimpleNamespace(id=3, user_id=5)
+    dataset_dir = tmp_path / "uploads" / "user_5" / "dataset_3"
+    dataset_dir.mkdir(parents=True)
+    (dataset_dir / "a.uvl").write_text("features\n    A\n")
+    (dataset_dir / "not_in_version.uvl").write_text("features\n    B\n")
+    version = SimpleNamespace(id=9, files_snapshot={"a.uvl": {"size": 13}, "deleted.uvl": {"size": 1}})
+
+    chunks = VersionService.build_version_zip(version, dataset)
+
+    assert not isinstance(chunks, (bytes, str))
+    with ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+        assert zf.namelist() == ["a.uvl"]
+        assert zf.read("a.uvl") == b"features\n    A\n"
+
+
+def test_stream_zip_stores_original_content_of_compressed_uploads(tmp_path):
+    model = tmp_path / "model.uvl"
+    model.write_text("features\n    Root\n")
+    compress_file(str(model))
+
+    data = b"".join(stream_zip([(str(model), "model.uvl")]))
+
+    with ZipFile(io.BytesIO(data)) as zf:
+        assert zf.read("model.uvl") == b"features\n    Root\n"
+        assert zf.getinfo("model.uvl").file_size == len(b"features\n    Root\n")
@@ -0,0 +1,104 @@
+"""
+Escritura de ZIPs en streaming.
+
+``ZipStream`` escribe el archivo sobre un buffer en memoria que se vacía tras
+cada bloque, así que una respuesta puede ir enviando el ZIP a medida que se
+añaden los archivos, sin construirlo entero en disco ni en memoria. Como la
+salida no admite ``seek``, ``zipfile`` escribe los tamaños y CRC en un
+descriptor tras cada entrada (formato estándar que abren todos los clientes).
+"""
+
+import logging
+from typing import Iterable, Iterator, Optional, Tuple
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+from app.modules.hubfile.storage import open_upload, uncompressed_size
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _StreamBuffer:
+    """Destino de escritura sin ``seek`` cuyo contenido se recoge con ``drain()``."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ZipStream:
+    """
+    ZIP generado por partes::
+
+        stream = ZipStream()
+        for path, arcname in files:
+            yield from stream.write_file(path, arcname)
+        yield from stream.close()
+    """
+
+    def __init__(self, compression: int = ZIP_DEFLATED):
+        self._buffer = _StreamBuffer()
+        self._zip = ZipFile(self._buffer, "w", compression=compression)
+        self.compression = compression
+
+    def write_file(self, path: str, arcname: str, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        """Añade el archivo ``path`` como ``arcname`` y va devolviendo los bytes del ZIP generados."""
+        info = ZipInfo.from_file(path, arcname)
+        info.compress_type = self.compression
+        # Los archivos guardados con gzip entran al ZIP con su contenido original
+        info.file_size = uncompressed_size(path)
+        chunk_size = chunk_size or CHUNK_SIZE
+
+        with open_upload(path) as src, self._zip.open(info, "w") as dest:
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                dest.write(chunk)
+                data = self._buffer.drain()
+                if data:
+                    yield data
+        yield from self._drain()
+
+    def write_bytes(self, data: bytes, arcname: str) -> Iterator[bytes]:
+        """Añade una entrada con contenido en memoria (p. ej. un manifiesto o un informe de errores)."""
+        self._zip.writestr(arcname, data, compress_type=self.compression)
+        yield from self._drain()
+
+    def close(self) -> Iterator[bytes]:
+        """Escribe el directorio central y devuelve los últimos bytes."""
+        self._zip.close()
+        yield from self._drain()
+
+    def _drain(self) -> Iterator[bytes]:
+        data = self._buffer.drain()
+        if data:
+            yield data
+
+
+def stream_zip(entries: Iterable[Tuple[str, str]], compression: int = ZIP_DEFLATED) -> Iterator[bytes]:
+    """
+    ZIP completo de ``entries`` (pares ``(ruta, nombre en el ZIP)``) como
+    generador de bloques. Un archivo que ya no existe se omite: el error salta
+    antes de escribir nada de su entrada, así que el ZIP sigue siendo válido.
+    """
+    stream = ZipStream(compression)
+    for path, arcname in entries:
+        try:
+            yield from stream.write_file(path, arcname)
+        except FileNotFoundError:
+            logger.warning(f"File {path} disappeared before being zipped, skipping.")
+    yield from stream.close()
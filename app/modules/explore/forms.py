@@ -25,6 +25,7 @@ class ExploreForm(FlaskForm):
             ("oldest", "Oldest first"),
             ("downloads", "Most downloaded"),
             ("title", "Title A-Z"),
+            ("distance", "Longest distance"),
         ],
         default="newest",
         validators=[Optional()],
@@ -48,6 +49,8 @@ class ExploreForm(FlaskForm):
     # Filtros específicos para GPX
     min_distance = IntegerField("Min Distance (km)", validators=[Optional()])
     max_distance = IntegerField("Max Distance (km)", validators=[Optional()])
+    min_elevation_gain = IntegerField("Min Elevation Gain (m)", validators=[Optional()])
+    max_elevation_gain = IntegerField("Max Elevation Gain (m)", validators=[Optional()])
 
     activity_type = SelectField(
         "Activity Type",
@@ -63,6 +66,12 @@ class ExploreForm(FlaskForm):
         validators=[Optional()],
     )
 
+    # Área del mapa: "west,south,east,north" en grados
+    bbox = StringField("Map Area", validators=[Optional()])
+
     tags = StringField("Tags", validators=[Optional()])
 
+    # Nombre (o prefijo) de feature de algún modelo UVL del dataset
+    feature = StringField("Feature name", validators=[Optional()])
+
     submit = SubmitField("Search")
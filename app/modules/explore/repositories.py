@@ -2,8 +2,11 @@ import logging
 
 from sqlalchemy import or_
 
-from app.modules.dataset.models import BaseDataset, DSMetaData
+from app.modules.dataset.models import BaseDataset, DSMetaData, GPXDataset
+from app.modules.dataset.repositories import GPXTrackCellRepository
+from app.modules.featuremodel.feature_names import normalize_feature_name
 from app.modules.featuremodel.models import FMMetaData
+from app.modules.featuremodel.repositories import FMFeatureNameRepository
 from core.repositories.BaseRepository import BaseRepository
 
 logger = logging.getLogger(__name__)
@@ -48,6 +51,26 @@ class ExploreRepository(BaseRepository):
                 activity = kwargs.get("activity_type")
                 filters.append(FMMetaData.tags.ilike(f"%{activity}%"))
 
+        # Rangos de distancia (km en el formulario, metros en BD) y desnivel positivo (m),
+        # sobre las columnas indexadas con los totales de cada dataset GPX
+        if kwargs.get("min_distance") is not None:
+            filters.append(GPXDataset.total_distance >= kwargs["min_distance"] * 1000)
+        if kwargs.get("max_distance") is not None:
+            filters.append(GPXDataset.total_distance <= kwargs["max_distance"] * 1000)
+        if kwargs.get("min_elevation_gain") is not None:
+            filters.append(GPXDataset.total_elevation_gain >= kwargs["min_elevation_gain"])
+        if kwargs.get("max_elevation_gain") is not None:
+            filters.append(GPXDataset.total_elevation_gain <= kwargs["max_elevation_gain"])
+
+        # Datasets con algún modelo UVL que tiene una feature con ese nombre (o prefijo)
+        feature = normalize_feature_name(kwargs.get("feature") or "")
+        if feature:
+            filters.append(BaseDataset.id.in_(FMFeatureNameRepository().dataset_ids_with_feature(feature)))
+
+        # Filtro espacial: datasets con algún track que intersecta el bbox (west, south, east, north)
+        if kwargs.get("bbox"):
+            filters.append(BaseDataset.id.in_(GPXTrackCellRepository().dataset_ids_in_bbox(kwargs["bbox"])))
+
         # Construir query
         datasets_query = self.model.query.join(BaseDataset.ds_meta_data).filter(*filters)
 
@@ -60,6 +83,9 @@ class ExploreRepository(BaseRepository):
             datasets_query = datasets_query.order_by(DSMetaData.title.asc())
         elif sorting == "downloads":
             datasets_query = datasets_query.order_by(BaseDataset.id.desc())
+        elif sorting == "distance":
+            # DESC deja los NULL (datasets no GPX) al final tanto en MariaDB como en SQLite
+            datasets_query = datasets_query.order_by(GPXDataset.total_distance.desc())
 
         logger.info(f"Query built with {len(filters)} filters")
         return datasets_query.all()
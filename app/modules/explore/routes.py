@@ -1,52 +1,158 @@
-from flask import jsonify, render_template, request
+import logging
+import uuid
+from typing import List, Optional
 
+from flask import Response, jsonify, render_template, request
+from flask_login import current_user
+
+from app.modules.dataset.bulk_download import get_bulk_download_slots, max_bytes, max_datasets
+from app.modules.dataset.handlers.gpx_grid import parse_bbox
+from app.modules.dataset.services import DataSetService, DSDownloadRecordService
 from app.modules.explore import explore_bp
 from app.modules.explore.forms import ExploreForm
 from app.modules.explore.services import ExploreService
+from app.modules.featuremodel.services import FMFeatureNameService
+
+logger = logging.getLogger(__name__)
 
 
 @explore_bp.route("/explore", methods=["GET", "POST"])
 def index():
     if request.method == "GET":
-        # Obtener parámetros de query string
-        query = request.args.get("query", "")
-        dataset_type = request.args.get("dataset_type", "all")
-        sorting = request.args.get("sorting", "newest")
-        publication_type = request.args.get("publication_type", "any")
-        tags_str = request.args.get("tags", "")
-
-        # Filtros específicos GPX
-        min_distance = request.args.get("min_distance", type=int)
-        max_distance = request.args.get("max_distance", type=int)
-        activity_type = request.args.get("activity_type", "any")
-
-        tags = [tag.strip() for tag in tags_str.split(",")] if tags_str else []
+        filters = _filter_kwargs(request.args)
 
         # Buscar datasets
         explore_service = ExploreService()
-        datasets = explore_service.filter(
-            query=query,
-            sorting=sorting,
-            publication_type=publication_type,
-            tags=tags,
-            dataset_type=dataset_type,
-            min_distance=min_distance,
-            max_distance=max_distance,
-            activity_type=activity_type,
-        )
+        datasets = explore_service.filter(**filters)
 
         # Crear formulario con valores actuales
         form = ExploreForm(
-            query=query,
-            dataset_type=dataset_type,
-            sorting=sorting,
-            publication_type=publication_type,
-            tags=tags_str,
-            min_distance=min_distance,
-            max_distance=max_distance,
-            activity_type=activity_type,
+            query=filters["query"],
+            dataset_type=filters["dataset_type"],
+            sorting=filters["sorting"],
+            publication_type=filters["publication_type"],
+            tags=request.args.get("tags", ""),
+            feature=filters["feature"],
+            min_distance=filters["min_distance"],
+            max_distance=filters["max_distance"],
+            min_elevation_gain=filters["min_elevation_gain"],
+            max_elevation_gain=filters["max_elevation_gain"],
+            activity_type=filters["activity_type"],
+            bbox=request.args.get("bbox", ""),
         )
 
-        return render_template("explore/index.html", form=form, datasets=datasets, dataset_type=dataset_type)
+        return render_template("explore/index.html", form=form, datasets=datasets, dataset_type=filters["dataset_type"])
 
     return jsonify({"message": "Explore index"})
+
+
+def _filter_kwargs(args) -> dict:
+    """Argumentos de ``ExploreService.filter`` a partir de la query string de /explore."""
+    # Viewport del mapa: "west,south,east,north"
+    bbox_str = args.get("bbox", "")
+    try:
+        bbox = parse_bbox(bbox_str)
+    except ValueError as e:
+        logger.warning(f"Ignoring invalid bbox '{bbox_str}': {e}")
+        bbox = None
+
+    tags_str = args.get("tags", "")
+
+    return {
+        "query": args.get("query", ""),
+        "dataset_type": args.get("dataset_type", "all"),
+        "sorting": args.get("sorting", "newest"),
+        "publication_type": args.get("publication_type", "any"),
+        "tags": [tag.strip() for tag in tags_str.split(",")] if tags_str else [],
+        "feature": args.get("feature", "").strip(),
+        # Filtros específicos GPX
+        "min_distance": args.get("min_distance", type=int),
+        "max_distance": args.get("max_distance", type=int),
+        "min_elevation_gain": args.get("min_elevation_gain", type=int),
+        "max_elevation_gain": args.get("max_elevation_gain", type=int),
+        "activity_type": args.get("activity_type", "any"),
+        "bbox": bbox,
+    }
+
+
+@explore_bp.route("/explore/download", methods=["GET"])
+def download_datasets():
+    """
+    Descarga varios datasets en un solo ZIP (una carpeta por dataset), generado
+    en streaming. Se eligen con ``ids`` (repetido o separado por comas) o, si no
+    se pasa, con los mismos filtros que /explore.
+    """
+    ids = _parse_ids(request.args.getlist("ids"))
+    if ids is None:
+        return jsonify({"error": "Invalid dataset ids"}), 400
+
+    dataset_service = DataSetService()
+    user_id = current_user.id if current_user.is_authenticated else None
+    if ids:
+        datasets = dataset_service.get_downloadable_by_ids(ids, user_id)
+        # Un id que no existe o es un borrador de otro usuario invalida toda la petición
+        if len(datasets) != len(ids):
+            return jsonify({"error": "Dataset not found"}), 404
+    else:
+        datasets = ExploreService().filter(**_filter_kwargs(request.args))
+    if not datasets:
+        return jsonify({"error": "No datasets to download"}), 404
+
+    if len(datasets) > max_datasets():
+        return jsonify({"error": f"Too many datasets: at most {max_datasets()} per download"}), 413
+
+    dataset_ids = [dataset.id for dataset in datasets]
+    total_size = dataset_service.total_file_size(dataset_ids)
+    if total_size > max_bytes():
+        return jsonify({"error": f"Selection too large ({total_size} bytes): at most {max_bytes()} per download"}), 413
+
+    slots = get_bulk_download_slots()
+    if not slots.try_acquire():
+        response = jsonify({"error": "Too many bulk downloads in progress, try again later"})
+        response.status_code = 429
+        response.headers["Retry-After"] = "30"
+        return response
+
+    try:
+        # Las rutas se resuelven aquí: el ZIP se genera ya fuera del contexto de la petición
+        entries = [entry for dataset in datasets for entry in dataset_service.zip_entries(dataset)]
+
+        user_cookie = request.cookies.get("download_cookie") or str(uuid.uuid4())
+        DSDownloadRecordService().record_downloads(dataset_ids, user_id, user_cookie)
+    except Exception:
+        slots.release()
+        raise
+
+    response = Response(
+        slots.stream(entries),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=datasets_{len(dataset_ids)}.zip"},
+    )
+    response.set_cookie("download_cookie", user_cookie)
+    return response
+
+
+def _parse_ids(values) -> Optional[List[int]]:
+    """``ids=1&ids=2`` o ``ids=1,2`` -> [1, 2] (sin repetidos); None si alguno no es un número."""
+    ids = []
+    for value in values:
+        for part in value.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if not part.isdigit():
+                return None
+            if int(part) not in ids:
+                ids.append(int(part))
+    return ids
+
+
+@explore_bp.route("/explore/features", methods=["GET"])
+def search_features():
+    """Búsqueda por prefijo en el índice de nombres de feature de los modelos UVL publicados."""
+    query = request.args.get("q", "")
+    limit = request.args.get("limit", 50, type=int)
+    exact = request.args.get("exact", "false").lower() in ("1", "true", "yes")
+
+    results = FMFeatureNameService().search(query, limit=limit, exact=exact)
+    return jsonify({"query": query, "count": len(results), "results": results})
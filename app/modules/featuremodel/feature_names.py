@@ -0,0 +1,29 @@
+import re
+import unicodedata
+from typing import List
+
+MAX_NAME_LENGTH = 255
+
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize_feature_name(name: str) -> str:
+    """
+    Forma de búsqueda de un nombre de feature: sin tildes, en minúsculas y con
+    cualquier separador (``_``, ``-``, espacios, puntos...) reducido a un espacio.
+    Así ``Data_Base``, ``data-base`` y ``"Data Base"`` se indexan igual.
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _SEPARATORS.sub(" ", without_accents.casefold()).strip()[:MAX_NAME_LENGTH]
+
+
+def feature_names(fm) -> List[str]:
+    """Nombres de las features de un ``FeatureModel`` de flamapy, sin repetir y en orden del árbol."""
+    seen = set()
+    names = []
+    for feature in fm.get_features():
+        if feature.name not in seen:
+            seen.add(feature.name)
+            names.append(feature.name)
+    return names
@@ -0,0 +1,33 @@
+from typing import Dict
+
+
+def feature_model_metrics(fm) -> Dict:
+    """
+    Métricas estructurales de un ``FeatureModel`` de flamapy:
+
+    - ``features`` / ``constraints``: número de features y de constraints.
+    - ``depth``: profundidad del árbol (aristas del camino raíz-hoja más largo; 0 si solo hay raíz).
+    - ``cross_tree_ratio``: proporción de features que aparecen en alguna
+      constraint cross-tree (CTCR), entre 0 y 1.
+    """
+    features = fm.get_features()
+    constraints = fm.get_constraints()
+
+    depth = 0
+    if fm.root is not None:
+        stack = [(fm.root, 0)]
+        while stack:
+            feature, level = stack.pop()
+            depth = max(depth, level)
+            stack.extend((child, level + 1) for child in feature.get_children())
+
+    in_constraints = set()
+    for constraint in constraints:
+        in_constraints.update(constraint.get_features())
+
+    return {
+        "features": len(features),
+        "constraints": len(constraints),
+        "depth": depth,
+        "cross_tree_ratio": round(len(in_constraints) / len(features), 4) if features else 0.0,
+    }
@@ -44,5 +44,44 @@ class FMMetrics(db.Model):
     solver = db.Column(db.Text)
     not_solver = db.Column(db.Text)
 
+    # Métricas estructurales del UVL, calculadas una vez al ingerir el archivo.
+    # Solo son válidas mientras el checksum coincida con el del Hubfile.
+    checksum = db.Column(db.String(120))
+    features_count = db.Column(db.Integer)
+    constraints_count = db.Column(db.Integer)
+    tree_depth = db.Column(db.Integer)
+    cross_tree_ratio = db.Column(db.Float)
+
+    def to_dict(self):
+        return {
+            "checksum": self.checksum,
+            "features": self.features_count,
+            "constraints": self.constraints_count,
+            "depth": self.tree_depth,
+            "cross_tree_ratio": self.cross_tree_ratio,
+        }
+
     def __repr__(self):
         return f"FMMetrics<solver={self.solver}, not_solver={self.not_solver}>"
+
+
+class FMFeatureName(db.Model):
+    """
+    Índice invertido de nombres de feature: una fila por feature de cada archivo
+    UVL, con el nombre normalizado (``normalize_feature_name``) para buscar por
+    prefijo sobre el índice compuesto sin parsear ningún modelo.
+    """
+
+    __tablename__ = "fm_feature_name"
+    __table_args__ = (db.Index("ix_fm_feature_name_normalized_dataset", "normalized_name", "dataset_id"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    hubfile_id = db.Column(db.Integer, db.ForeignKey("file.id"), nullable=False, index=True)
+    dataset_id = db.Column(db.Integer, db.ForeignKey("data_set.id"), nullable=False, index=True)
+    name = db.Column(db.String(255), nullable=False)
+    normalized_name = db.Column(db.String(255), nullable=False)
+
+    hubfile = db.relationship("Hubfile", backref=db.backref("feature_names", lazy=True, cascade="all, delete-orphan"))
+
+    def __repr__(self):
+        return f"FMFeatureName<{self.name}>"
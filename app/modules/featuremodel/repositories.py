@@ -1,4 +1,11 @@
-from app.modules.featuremodel.models import FeatureModel, FMMetaData
+from typing import List, Optional
+
+from sqlalchemy import func
+
+from app.modules.dataset.models import BaseDataset, DSMetaData
+from app.modules.featuremodel.feature_names import MAX_NAME_LENGTH, normalize_feature_name
+from app.modules.featuremodel.models import FeatureModel, FMFeatureName, FMMetaData, FMMetrics
+from app.modules.hubfile.models import Hubfile
 from core.repositories.BaseRepository import BaseRepository
 
 
@@ -13,3 +20,119 @@ class FeatureModelRepository(BaseRepository):
 class FMMetaDataRepository(BaseRepository):
     def __init__(self):
         super().__init__(FMMetaData)
+
+
+class FMMetricsRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(FMMetrics)
+
+    def _files_with_metrics(self, *columns):
+        """Hubfiles UVL unidos a sus métricas vigentes (mismo checksum)."""
+        return (
+            self.session.query(*columns)
+            .select_from(Hubfile)
+            .join(FeatureModel, FeatureModel.id == Hubfile.feature_model_id)
+            .join(FMMetaData, FMMetaData.id == FeatureModel.fm_meta_data_id)
+        )
+
+    def get_hubfiles_without_metrics(self, dataset_id: Optional[int] = None):
+        """Archivos UVL sin métricas válidas (subidos antes de calcularlas o modificados), de un dataset o de todos."""
+        query = (
+            self._files_with_metrics(Hubfile)
+            .outerjoin(FMMetrics, (FMMetrics.id == FMMetaData.fm_metrics_id) & (FMMetrics.checksum == Hubfile.checksum))
+            .filter(func.lower(Hubfile.name).like("%.uvl"), FMMetrics.id.is_(None))
+        )
+        if dataset_id is not None:
+            query = query.filter(FeatureModel.data_set_id == dataset_id)
+        return query.all()
+
+    def sum_for_dataset(self, dataset_id: int) -> dict:
+        """Suma en SQL las métricas de todos los modelos UVL del dataset."""
+        row = (
+            self._files_with_metrics(
+                func.coalesce(func.sum(FMMetrics.features_count), 0),
+                func.coalesce(func.sum(FMMetrics.constraints_count), 0),
+                func.coalesce(func.max(FMMetrics.tree_depth), 0),
+                func.count(FMMetrics.id),
+            )
+            .join(FMMetrics, (FMMetrics.id == FMMetaData.fm_metrics_id) & (FMMetrics.checksum == Hubfile.checksum))
+            .filter(FeatureModel.data_set_id == dataset_id)
+            .one()
+        )
+        features, constraints, max_depth, models = row
+        return {
+            "features": int(features),
+            "constraints": int(constraints),
+            "max_depth": int(max_depth),
+            "models": int(models),
+        }
+
+
+class FMFeatureNameRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(FMFeatureName)
+
+    def replace_for_hubfile(self, hubfile: Hubfile, dataset_id: int, names: List[str]) -> List[FMFeatureName]:
+        """Sustituye (sin commit) las entradas del índice de un archivo por las de ``names``."""
+        self.model.query.filter_by(hubfile_id=hubfile.id).delete(synchronize_session=False)
+
+        rows = [
+            FMFeatureName(
+                hubfile_id=hubfile.id,
+                dataset_id=dataset_id,
+                name=name[:MAX_NAME_LENGTH],
+                normalized_name=normalize_feature_name(name),
+            )
+            for name in names
+        ]
+        self.session.add_all(rows)
+        return rows
+
+    def _matching(self, *columns, normalized: str, exact: bool = False):
+        """Entradas cuyo nombre normalizado empieza por (o es) ``normalized``, solo de datasets publicados."""
+        if exact:
+            name_filter = FMFeatureName.normalized_name == normalized
+        else:
+            name_filter = FMFeatureName.normalized_name.like(f"{normalized}%")
+        return (
+            self.session.query(*columns)
+            .select_from(FMFeatureName)
+            .join(BaseDataset, BaseDataset.id == FMFeatureName.dataset_id)
+            .join(DSMetaData, DSMetaData.id == BaseDataset.ds_meta_data_id)
+            .filter(name_filter, DSMetaData.dataset_doi.isnot(None), DSMetaData.dataset_doi != "")
+        )
+
+    def search(self, normalized: str, limit: int = 50, exact: bool = False) -> List[tuple]:
+        """Filas (feature, id archivo, nombre archivo, id dataset, título, DOI) ordenadas por nombre."""
+        return (
+            self._matching(
+                FMFeatureName.name,
+                Hubfile.id,
+                Hubfile.name,
+                BaseDataset.id,
+                DSMetaData.title,
+                DSMetaData.dataset_doi,
+                normalized=normalized,
+                exact=exact,
+            )
+            .join(Hubfile, Hubfile.id == FMFeatureName.hubfile_id)
+            .order_by(FMFeatureName.normalized_name, FMFeatureName.dataset_id, Hubfile.id)
+            .limit(limit)
+            .all()
+        )
+
+    def dataset_ids_with_feature(self, normalized: str):
+        """Subconsulta con los ids de datasets que tienen alguna feature con ese prefijo."""
+        return self._matching(FMFeatureName.dataset_id, normalized=normalized).distinct()
+
+    def get_hubfiles_without_names(self, dataset_id: Optional[int] = None) -> List[tuple]:
+        """Pares (Hubfile UVL, dataset_id) que aún no están en el índice."""
+        query = (
+            self.session.query(Hubfile, FeatureModel.data_set_id)
+            .join(FeatureModel, FeatureModel.id == Hubfile.feature_model_id)
+            .outerjoin(FMFeatureName, FMFeatureName.hubfile_id == Hubfile.id)
+            .filter(func.lower(Hubfile.name).like("%.uvl"), FMFeatureName.id.is_(None))
+        )
+        if dataset_id is not None:
+            query = query.filter(FeatureModel.data_set_id == dataset_id)
+        return query.all()
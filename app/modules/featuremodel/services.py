@@ -1,7 +1,20 @@
-from app.modules.featuremodel.repositories import FeatureModelRepository, FMMetaDataRepository
+import logging
+from typing import Dict, List, Optional
+
+from app.modules.featuremodel.feature_names import feature_names, normalize_feature_name
+from app.modules.featuremodel.metrics import feature_model_metrics
+from app.modules.featuremodel.models import FMMetrics
+from app.modules.featuremodel.repositories import (
+    FeatureModelRepository,
+    FMFeatureNameRepository,
+    FMMetaDataRepository,
+    FMMetricsRepository,
+)
 from app.modules.hubfile.services import HubfileService
 from core.services.BaseService import BaseService
 
+logger = logging.getLogger(__name__)
+
 
 class FeatureModelService(BaseService):
     def __init__(self):
@@ -20,3 +33,159 @@ class FeatureModelService(BaseService):
     class FMMetaDataService(BaseService):
         def __init__(self):
             super().__init__(FMMetaDataRepository())
+
+
+class FMMetricsService(BaseService):
+    """Métricas UVL persistidas por archivo (tabla fm_metrics, enlazada desde FMMetaData)."""
+
+    def __init__(self):
+        super().__init__(FMMetricsRepository())
+
+    def record(
+        self, hubfile, file_path: str, commit: bool = False, metrics: Optional[dict] = None, model=None
+    ) -> FMMetrics:
+        """
+        Calcula y guarda las métricas de un Hubfile UVL. Si ya existen para el
+        mismo checksum no se vuelve a parsear el archivo, y si se pasan
+        ``metrics`` (p. ej. las calculadas en el pool de procesos) o el
+        ``model`` ya parseado (el de la ingesta) tampoco.
+        """
+        fmmetadata = hubfile.feature_model.fm_meta_data
+        fm_metrics = fmmetadata.fm_metrics
+        if fm_metrics is not None and fm_metrics.checksum == hubfile.checksum:
+            return fm_metrics
+
+        if metrics is None and model is not None:
+            metrics = feature_model_metrics(model)
+        elif metrics is None:
+            from app.modules.flamapy.cache import get_feature_model_cache
+
+            # El modelo parseado queda en la caché por checksum para análisis y conversiones posteriores
+            metrics = feature_model_metrics(get_feature_model_cache().get(hubfile.checksum, file_path))
+
+        if fm_metrics is None:
+            fm_metrics = self.repository.create(commit=False)
+            fmmetadata.fm_metrics = fm_metrics
+
+        fm_metrics.checksum = hubfile.checksum
+        fm_metrics.features_count = metrics["features"]
+        fm_metrics.constraints_count = metrics["constraints"]
+        fm_metrics.tree_depth = metrics["depth"]
+        fm_metrics.cross_tree_ratio = metrics["cross_tree_ratio"]
+
+        if commit:
+            self.repository.session.commit()
+        return fm_metrics
+
+    def record_safely(self, hubfile, file_path: str, metrics: Optional[dict] = None, model=None) -> Optional[FMMetrics]:
+        """Como record(), pero un fallo no interrumpe la subida (se recalcula más tarde)."""
+        try:
+            return self.record(hubfile, file_path, metrics=metrics, model=model)
+        except Exception as e:
+            logger.warning(f"Could not compute UVL metrics for {hubfile.name}: {e}")
+            return None
+
+    def record_many(self, hubfiles) -> int:
+        """
+        Calcula en paralelo (pool de procesos) y guarda sin commit las métricas de
+        varios Hubfiles. Devuelve cuántos se han guardado; los fallos se registran y se omiten.
+        """
+        from app.modules.dataset.parse_pool import get_parse_pool, uvl_file_metrics
+
+        paths = [hubfile.get_path() for hubfile in hubfiles]
+        checksums = [hubfile.checksum for hubfile in hubfiles]
+        recorded = 0
+        for hubfile, result in zip(hubfiles, get_parse_pool().map(uvl_file_metrics, paths, checksums)):
+            if not result.ok:
+                logger.warning(f"Could not compute UVL metrics for {hubfile.name}: {result.error}")
+                continue
+            if self.record_safely(hubfile, result.path, metrics=result.value):
+                recorded += 1
+        return recorded
+
+    def backfill(self, dataset_id: Optional[int] = None) -> int:
+        """
+        Calcula y guarda las métricas de los archivos UVL que no las tienen (de un
+        dataset o de todos). Se ejecuta desde ``rosemary uvl:metrics``, nunca al leer los totales.
+        """
+        missing = self.repository.get_hubfiles_without_metrics(dataset_id)
+        recorded = self.record_many(missing) if missing else 0
+        self.repository.session.commit()
+        return recorded
+
+    def totals_for_dataset(self, dataset) -> dict:
+        """Totales del dataset con un único SUM en SQL sobre las métricas ya guardadas."""
+        return self.repository.sum_for_dataset(dataset.id)
+
+
+class FMFeatureNameService(BaseService):
+    """Índice invertido nombre de feature -> (archivo, dataset), rellenado al ingerir cada UVL."""
+
+    MAX_RESULTS = 200
+
+    def __init__(self):
+        super().__init__(FMFeatureNameRepository())
+
+    def index(self, hubfile, dataset_id: int, file_path: str, names: Optional[List[str]] = None, model=None) -> int:
+        """
+        Indexa (sin commit) las features de un Hubfile UVL, a partir de ``names``,
+        del ``model`` ya parseado o del archivo. Devuelve cuántas se han guardado.
+        """
+        if names is None and model is not None:
+            names = feature_names(model)
+        elif names is None:
+            from app.modules.flamapy.cache import get_feature_model_cache
+
+            # Normalmente ya está en la caché: las métricas del mismo archivo se acaban de calcular
+            names = feature_names(get_feature_model_cache().get(hubfile.checksum, file_path))
+        return len(self.repository.replace_for_hubfile(hubfile, dataset_id, names))
+
+    def index_safely(self, hubfile, dataset_id: int, file_path: str, model=None) -> int:
+        """Como index(), pero un fallo no interrumpe la subida (el archivo queda pendiente de indexar)."""
+        try:
+            return self.index(hubfile, dataset_id, file_path, model=model)
+        except Exception as e:
+            logger.warning(f"Could not index feature names of {hubfile.name}: {e}")
+            return 0
+
+    def index_pending(self, dataset_id: Optional[int] = None) -> int:
+        """Indexa en el pool de procesos los UVL que aún no están en el índice. Devuelve cuántos archivos."""
+        from app.modules.dataset.parse_pool import get_parse_pool, uvl_feature_names
+
+        pending = self.repository.get_hubfiles_without_names(dataset_id)
+        if not pending:
+            return 0
+
+        hubfiles = [hubfile for hubfile, _ in pending]
+        paths = [hubfile.get_path() for hubfile in hubfiles]
+        checksums = [hubfile.checksum for hubfile in hubfiles]
+
+        indexed = 0
+        for (hubfile, ds_id), result in zip(pending, get_parse_pool().map(uvl_feature_names, paths, checksums)):
+            if not result.ok:
+                logger.warning(f"Could not index feature names of {hubfile.name}: {result.error}")
+                continue
+            self.index(hubfile, ds_id, result.path, names=result.value)
+            indexed += 1
+
+        self.repository.session.commit()
+        return indexed
+
+    def search(self, query: str, limit: int = 50, exact: bool = False) -> List[Dict]:
+        """Features de datasets publicados cuyo nombre empieza por ``query`` (ignorando mayúsculas y separadores)."""
+        normalized = normalize_feature_name(query or "")
+        if not normalized:
+            return []
+
+        rows = self.repository.search(normalized, limit=max(1, min(limit, self.MAX_RESULTS)), exact=exact)
+        return [
+            {
+                "feature": feature,
+                "file_id": file_id,
+                "file_name": file_name,
+                "dataset_id": dataset_id,
+                "dataset_title": title,
+                "dataset_doi": doi,
+            }
+            for feature, file_id, file_name, dataset_id, title, doi in rows
+        ]
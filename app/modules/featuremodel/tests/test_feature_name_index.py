@@ -0,0 +1,144 @@
+"""
+Tests para el índice invertido de nombres de feature de los modelos UVL.
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+import app.modules.flamapy.cache as cache_mod
+from app import db
+from app.modules.auth.models import User
+from app.modules.dataset.models import DSMetaData, PublicationType, UVLDataset
+from app.modules.explore import explore_bp
+from app.modules.explore.repositories import ExploreRepository
+from app.modules.featuremodel.feature_names import normalize_feature_name
+from app.modules.featuremodel.models import FeatureModel, FMFeatureName, FMMetaData
+from app.modules.featuremodel.services import FMFeatureNameService
+from app.modules.flamapy.cache import FeatureModelCache
+from app.modules.hubfile.models import Hubfile
+
+UVL_EXAMPLES = Path(__file__).parents[2] / "dataset" / "uvl_examples"
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Crear aplicación Flask de test."""
+    monkeypatch.setenv("WORKING_DIR", str(tmp_path))
+    monkeypatch.setenv("PARSE_POOL_WORKERS", "0")
+    monkeypatch.setattr(cache_mod, "_cache", FeatureModelCache(cache_dir=str(tmp_path / "fm_cache")))
+
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+    db.init_app(app)
+    app.register_blueprint(explore_bp)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _create_dataset(tmp_path, title, doi, files):
+    user = User(email=f"{title}@example.com", password="hashed")
+    db.session.add(user)
+    db.session.flush()
+
+    ds_meta = DSMetaData(title=title, description="Models", publication_type=PublicationType.NONE, dataset_doi=doi)
+    db.session.add(ds_meta)
+    db.session.flush()
+
+    dataset = UVLDataset(user_id=user.id, ds_meta_data_id=ds_meta.id)
+    db.session.add(dataset)
+    db.session.flush()
+
+    dataset_dir = tmp_path / "uploads" / f"user_{user.id}" / f"dataset_{dataset.id}"
+    dataset_dir.mkdir(parents=True)
+
+    hubfiles = []
+    for name in files:
+        shutil.copy(UVL_EXAMPLES / name, dataset_dir / name)
+
+        fm_meta = FMMetaData(filename=name, title=name, description="Model", publication_type=PublicationType.NONE)
+        db.session.add(fm_meta)
+        db.session.flush()
+
+        fm = FeatureModel(data_set_id=dataset.id, fm_meta_data_id=fm_meta.id)
+        db.session.add(fm)
+        db.session.flush()
+
+        hubfile = Hubfile(name=name, checksum=f"{title}-{name}", size=1, feature_model_id=fm.id)
+        db.session.add(hubfile)
+        db.session.flush()
+        hubfiles.append(hubfile)
+
+    db.session.commit()
+    return dataset, hubfiles
+
+
+@pytest.fixture
+def datasets(app, tmp_path):
+    published, _ = _create_dataset(tmp_path, "published", "10.1234/published", ["file1.uvl"])
+    draft, _ = _create_dataset(tmp_path, "draft", None, ["file1.uvl"])
+    return published, draft
+
+
+def test_normalization_ignores_case_accents_and_separators():
+    assert normalize_feature_name("Data_Storage") == "data storage"
+    assert normalize_feature_name('  "Peer-2-Peer" ') == "peer 2 peer"
+    assert normalize_feature_name("Canción") == "cancion"
+
+
+def test_index_pending_populates_index(datasets):
+    assert FMFeatureNameService().index_pending() == 2
+
+    names = {row.name for row in FMFeatureName.query.filter_by(dataset_id=datasets[0].id)}
+    assert {"Chat", "Peer 2 Peer", "Data Storage", "Media Player"} <= names
+    assert FMFeatureNameService().index_pending() == 0
+
+
+def test_reindexing_a_file_replaces_its_entries(datasets):
+    hubfile = datasets[0].files()[0]
+    service = FMFeatureNameService()
+
+    service.index(hubfile, datasets[0].id, hubfile.get_path(), names=["Old"])
+    service.index(hubfile, datasets[0].id, hubfile.get_path(), names=["New"])
+    db.session.commit()
+
+    assert [row.name for row in FMFeatureName.query.filter_by(hubfile_id=hubfile.id)] == ["New"]
+
+
+def test_search_by_prefix_only_returns_published_datasets(datasets):
+    FMFeatureNameService().index_pending()
+
+    results = FMFeatureNameService().search("data_sto")
+
+    assert [(r["feature"], r["dataset_title"]) for r in results] == [("Data Storage", "published")]
+    assert results[0]["dataset_doi"] == "10.1234/published"
+    assert FMFeatureNameService().search("") == []
+    assert FMFeatureNameService().search("Data", exact=True) == []
+
+
+def test_explore_filters_datasets_by_feature(datasets):
+    FMFeatureNameService().index_pending()
+
+    assert [d.id for d in ExploreRepository().filter(feature="media")] == [datasets[0].id]
+    assert ExploreRepository().filter(feature="nonexistent") == []
+
+
+def test_features_json_api(app, datasets):
+    FMFeatureNameService().index_pending()
+
+    response = app.test_client().get("/explore/features?q=peer&limit=5")
+
+    assert response.status_code == 200
+    assert response.json["count"] == 1
+    assert response.json["results"][0]["feature"] == "Peer 2 Peer"
+    assert response.json["results"][0]["file_name"] == "file1.uvl"
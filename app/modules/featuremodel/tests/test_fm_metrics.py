@@ -0,0 +1,164 @@
+"""
+Tests para las métricas UVL persistidas por archivo (tabla fm_metrics).
+"""
+
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+
+import app.modules.flamapy.cache as cache_mod
+from app import db
+from app.modules.auth.models import User
+from app.modules.dataset.models import DSMetaData, PublicationType, UVLDataset
+from app.modules.dataset.registry import get_descriptor
+from app.modules.dataset.services import DataSetService, VersionService
+from app.modules.featuremodel.metrics import feature_model_metrics
+from app.modules.featuremodel.models import FeatureModel, FMFeatureName, FMMetaData, FMMetrics
+from app.modules.featuremodel.services import FMMetricsService
+from app.modules.flamapy.cache import FeatureModelCache
+from app.modules.hubfile.models import Hubfile
+
+UVL_EXAMPLES = Path(__file__).parents[2] / "dataset" / "uvl_examples"
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Crear aplicación Flask de test."""
+    monkeypatch.setenv("WORKING_DIR", str(tmp_path))
+    monkeypatch.setenv("PARSE_POOL_WORKERS", "0")
+    monkeypatch.setattr(cache_mod, "_cache", FeatureModelCache(cache_dir=str(tmp_path / "fm_cache")))
+
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def uvl_dataset(app, tmp_path):
+    """Dataset UVL con dos modelos copiados a la carpeta de uploads."""
+    user = User(email="uvl@example.com", password="hashed")
+    db.session.add(user)
+    db.session.flush()
+
+    ds_meta = DSMetaData(title="UVL Dataset", description="Models", publication_type=PublicationType.NONE)
+    db.session.add(ds_meta)
+    db.session.flush()
+
+    dataset = UVLDataset(user_id=user.id, ds_meta_data_id=ds_meta.id)
+    db.session.add(dataset)
+    db.session.flush()
+
+    dataset_dir = tmp_path / "uploads" / f"user_{user.id}" / f"dataset_{dataset.id}"
+    dataset_dir.mkdir(parents=True)
+
+    for name in ("file1.uvl", "file3.uvl"):
+        shutil.copy(UVL_EXAMPLES / name, dataset_dir / name)
+
+        fm_meta = FMMetaData(filename=name, title=name, description="Model", publication_type=PublicationType.NONE)
+        db.session.add(fm_meta)
+        db.session.flush()
+
+        fm = FeatureModel(data_set_id=dataset.id, fm_meta_data_id=fm_meta.id)
+        db.session.add(fm)
+        db.session.flush()
+
+        db.session.add(Hubfile(name=name, checksum=f"checksum-{name}", size=1, feature_model_id=fm.id))
+
+    db.session.commit()
+    return dataset
+
+
+def _expected(name):
+    fm = FeatureModelCache(memory_items=0, disk_budget=0)._parse(str(UVL_EXAMPLES / name))
+    return feature_model_metrics(fm)
+
+
+def test_feature_model_metrics():
+    metrics = _expected("file1.uvl")
+
+    # Chat -> Connection -> Server; 5 de las 10 features aparecen en constraints
+    assert metrics == {"features": 10, "constraints": 2, "depth": 2, "cross_tree_ratio": 0.5}
+
+
+def test_record_persists_metrics_once(app, uvl_dataset):
+    hubfile = uvl_dataset.feature_models[0].files[0]
+
+    stored = FMMetricsService().record(hubfile, hubfile.get_path(), commit=True)
+
+    assert stored.checksum == hubfile.checksum
+    assert hubfile.feature_model.fm_meta_data.fm_metrics is stored
+    assert stored.to_dict()["features"] == _expected("file1.uvl")["features"]
+
+    with patch.object(FeatureModelCache, "get", side_effect=AssertionError("should not parse")):
+        assert FMMetricsService().record(hubfile, hubfile.get_path()) is stored
+
+
+def test_totals_backfill_then_read_from_table(app, uvl_dataset):
+    expected_features = _expected("file1.uvl")["features"] + _expected("file3.uvl")["features"]
+
+    # Leer los totales no parsea ni guarda nada
+    assert uvl_dataset.uvl_metrics()["models"] == 0
+    assert FMMetrics.query.count() == 0
+
+    assert FMMetricsService().backfill(uvl_dataset.id) == 2
+    totals = uvl_dataset.uvl_metrics()
+
+    assert totals["features"] == expected_features
+    assert totals["models"] == 2
+    assert FMMetrics.query.count() == 2
+
+    with patch.object(FeatureModelCache, "get", side_effect=AssertionError("should not parse")):
+        assert uvl_dataset.calculate_total_features() == expected_features
+
+
+def test_changed_checksum_invalidates_metrics(app, uvl_dataset):
+    FMMetricsService().backfill(uvl_dataset.id)
+    hubfile = uvl_dataset.feature_models[0].files[0]
+    hubfile.checksum = "changed"
+    db.session.commit()
+
+    assert uvl_dataset.uvl_metrics()["models"] == 1
+    assert FMMetricsService().repository.get_hubfiles_without_metrics() == [hubfile]
+    assert FMMetricsService().backfill() == 1
+    assert uvl_dataset.uvl_metrics()["models"] == 2
+    assert FMMetrics.query.count() == 2
+
+
+def test_create_version_reads_persisted_metrics(app, uvl_dataset):
+    FMMetricsService().backfill(uvl_dataset.id)
+    totals = uvl_dataset.uvl_metrics()
+    user = User.query.first()
+
+    with patch.object(FeatureModelCache, "get", side_effect=AssertionError("should not parse")):
+        version = VersionService.create_version(uvl_dataset, "Test", user)
+
+    assert version.total_features == totals["features"]
+    assert version.total_constraints == totals["constraints"]
+
+
+def test_ingested_model_is_not_parsed_again(app, uvl_dataset):
+    hubfile = uvl_dataset.feature_models[0].files[0]
+    ingested = get_descriptor("uvl").ingest(hubfile.get_path())
+    hubfile.checksum = ingested.checksum
+
+    # Métricas, índice de features y árbol salen del modelo parseado en la ingesta
+    with patch.object(FeatureModelCache, "_parse", side_effect=AssertionError("should not parse")):
+        DataSetService().record_ingested(hubfile, uvl_dataset.id, hubfile.get_path(), ingested)
+        db.session.commit()
+
+    assert hubfile.feature_model.fm_meta_data.fm_metrics.to_dict()["features"] == _expected("file1.uvl")["features"]
+    assert FMFeatureName.query.filter_by(hubfile_id=hubfile.id).count() == _expected("file1.uvl")["features"]
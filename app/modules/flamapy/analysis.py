@@ -0,0 +1,270 @@
+"""
+Análisis SAT de modelos UVL en segundo plano.
+
+Las operaciones (número de configuraciones, features core/muertas, modelo
+vacío...) pueden tardar minutos, así que nunca se ejecutan dentro de una
+petición: cada trabajo corre en su propio proceso, lanzado por un
+``AnalysisWorkerPool`` que limita cuántos hay a la vez, aplica un timeout por
+trabajo y permite cancelarlos (terminando el proceso).
+
+El pool no sabe nada de la base de datos: avisa a un ``listener`` cuando un
+trabajo empieza o termina y le pregunta periódicamente qué trabajos se han
+cancelado (ver ``AnalysisService``).
+
+Configuración (variables de entorno):
+
+- ``ANALYSIS_WORKERS``: trabajos simultáneos por proceso web (por defecto 2).
+- ``ANALYSIS_TIMEOUT``: segundos máximos por trabajo (por defecto 300).
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+DEFAULT_TIMEOUT = 300.0
+POLL_INTERVAL = 0.2  # segundos entre comprobaciones del supervisor
+CANCEL_CHECK_INTERVAL = 1.0  # segundos entre consultas de cancelaciones al listener
+
+# operación -> (clase de flamapy.metamodels.pysat_metamodel.operations, descripción)
+ANALYSIS_OPERATIONS = {
+    "satisfiable": ("PySATSatisfiable", "Void model check (is there any valid configuration?)"),
+    "configurations_number": ("PySATConfigurationsNumber", "Number of valid configurations"),
+    "core_features": ("PySATCoreFeatures", "Features present in every configuration"),
+    "dead_features": ("PySATDeadFeatures", "Features that can never be selected"),
+    "false_optional_features": ("PySATFalseOptionalFeatures", "Optional features that are always selected"),
+}
+
+
+def run_analysis(file_path: str, checksum: Optional[str], operation: str) -> Any:
+    """Ejecuta una operación sobre el modelo (vía la caché de modelos) y devuelve un resultado serializable en JSON."""
+    from flamapy.metamodels.pysat_metamodel import operations
+    from flamapy.metamodels.pysat_metamodel.transformations import FmToPysat
+
+    from app.modules.flamapy.cache import get_feature_model_cache
+
+    class_name, _ = ANALYSIS_OPERATIONS[operation]
+    sat = FmToPysat(get_feature_model_cache().get(checksum, file_path)).transform()
+    result = getattr(operations, class_name)().execute(sat).get_result()
+
+    if isinstance(result, (list, set, tuple)):
+        return sorted(str(item) for item in result)
+    return result
+
+
+def _job_main(conn, file_path: str, checksum: Optional[str], operation: str) -> None:
+    """Punto de entrada del proceso de un trabajo: envía ("ok", resultado, duración) o ("error", mensaje)."""
+    started = time.monotonic()
+    try:
+        result = run_analysis(file_path, checksum, operation)
+        conn.send(("ok", result, time.monotonic() - started))
+    except Exception as e:
+        conn.send(("error", f"{e.__class__.__name__}: {e}", time.monotonic() - started))
+    finally:
+        conn.close()
+
+
+class AnalysisListener:
+    """Interfaz que el pool usa para informar del estado de los trabajos."""
+
+    def started(self, job_id: int) -> None:
+        pass
+
+    def finished(self, job_id: int, status: str, value: Any = None, error: str = None, duration: float = None):
+        """``status`` es uno de "done", "failed", "timeout" o "cancelled"."""
+        pass
+
+    def cancelled(self, job_ids: list) -> list:
+        """De los trabajos indicados, los que se han cancelado desde fuera (p. ej. desde otro proceso web)."""
+        return []
+
+
+class _RunningJob:
+    __slots__ = ("process", "conn", "deadline")
+
+    def __init__(self, process, conn, deadline: float):
+        self.process = process
+        self.conn = conn
+        self.deadline = deadline
+
+
+class AnalysisWorkerPool:
+    """
+    Ejecuta trabajos de análisis en procesos independientes (``spawn``).
+
+    Un hilo supervisor arranca los trabajos en cola mientras haya hueco, recoge
+    los resultados y termina los procesos que superan el timeout o se cancelan.
+    El hilo se para cuando no queda nada pendiente y vuelve a arrancar con el
+    siguiente ``submit``.
+    """
+
+    def __init__(
+        self,
+        listener: AnalysisListener,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        if max_workers is None:
+            max_workers = int(os.getenv("ANALYSIS_WORKERS", DEFAULT_WORKERS))
+        if timeout is None:
+            timeout = float(os.getenv("ANALYSIS_TIMEOUT", DEFAULT_TIMEOUT))
+
+        self.listener = listener
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+
+        self._context = multiprocessing.get_context("spawn")
+        self._queue: "OrderedDict[int, tuple]" = OrderedDict()
+        self._running = {}  # job_id -> _RunningJob
+        self._cancel = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._last_cancel_check = 0.0
+
+    def submit(self, job_id: int, file_path: str, checksum: Optional[str], operation: str) -> None:
+        if operation not in ANALYSIS_OPERATIONS:
+            raise ValueError(f"Unknown analysis operation: {operation}")
+
+        with self._lock:
+            self._queue[job_id] = (file_path, checksum, operation)
+            self._ensure_supervisor()
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancela un trabajo de este pool. Devuelve False si no lo conoce (ya terminó o es de otro proceso)."""
+        with self._lock:
+            if job_id in self._queue:
+                del self._queue[job_id]
+                queued = True
+            elif job_id in self._running:
+                self._cancel.add(job_id)
+                return True
+            else:
+                return False
+
+        if queued:
+            self._notify_finished(job_id, "cancelled", error="Cancelled before starting")
+        return True
+
+    def tracks(self, job_id: int) -> bool:
+        with self._lock:
+            return job_id in self._queue or job_id in self._running
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que no quede ningún trabajo (útil en tests y al apagar). Devuelve False si vence el timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._queue and not self._running:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(POLL_INTERVAL)
+
+    def _ensure_supervisor(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._supervise, name="analysis-pool", daemon=True)
+            self._thread.start()
+
+    def _supervise(self) -> None:
+        while True:
+            try:
+                self._check_cancelled()
+                self._collect()
+                self._start_queued()
+            except Exception as e:
+                logger.exception(f"Analysis pool supervisor error: {e}")
+
+            with self._lock:
+                if not self._queue and not self._running:
+                    self._thread = None
+                    return
+            time.sleep(POLL_INTERVAL)
+
+    def _check_cancelled(self) -> None:
+        now = time.monotonic()
+        if now - self._last_cancel_check < CANCEL_CHECK_INTERVAL:
+            return
+        self._last_cancel_check = now
+
+        with self._lock:
+            job_ids = list(self._queue) + list(self._running)
+        if not job_ids:
+            return
+
+        for job_id in self.listener.cancelled(job_ids):
+            self.cancel(job_id)
+
+    def _collect(self) -> None:
+        with self._lock:
+            running = list(self._running.items())
+
+        for job_id, job in running:
+            outcome = None
+            if job.conn.poll():
+                try:
+                    message = job.conn.recv()
+                except (EOFError, OSError) as e:
+                    outcome = ("failed", None, f"Worker exited without a result: {e}", None)
+                else:
+                    if message[0] == "ok":
+                        outcome = ("done", message[1], None, message[2])
+                    else:
+                        outcome = ("failed", None, message[1], message[2])
+                job.process.join(timeout=5)
+            elif not job.process.is_alive():
+                outcome = ("failed", None, f"Worker exited with code {job.process.exitcode}", None)
+            elif job_id in self._cancel:
+                self._terminate(job)
+                outcome = ("cancelled", None, "Cancelled while running", None)
+            elif time.monotonic() > job.deadline:
+                self._terminate(job)
+                outcome = ("timeout", None, f"Timed out after {self.timeout:g}s", self.timeout)
+
+            if outcome is None:
+                continue
+
+            job.conn.close()
+            status, value, error, duration = outcome
+            # Se avisa antes de soltar el trabajo: wait_idle() no vuelve hasta que el resultado está guardado
+            self._notify_finished(job_id, status, value=value, error=error, duration=duration)
+            with self._lock:
+                self._running.pop(job_id, None)
+                self._cancel.discard(job_id)
+
+    def _start_queued(self) -> None:
+        while True:
+            with self._lock:
+                if not self._queue or len(self._running) >= self.max_workers:
+                    return
+                job_id, args = self._queue.popitem(last=False)
+
+                parent_conn, child_conn = self._context.Pipe(duplex=False)
+                process = self._context.Process(target=_job_main, args=(child_conn, *args), daemon=True)
+                process.start()
+                child_conn.close()
+                self._running[job_id] = _RunningJob(process, parent_conn, time.monotonic() + self.timeout)
+
+            try:
+                self.listener.started(job_id)
+            except Exception as e:
+                logger.error(f"Analysis listener failed on start of job {job_id}: {e}")
+
+    @staticmethod
+    def _terminate(job: _RunningJob) -> None:
+        job.process.terminate()
+        job.process.join(timeout=5)
+        if job.process.is_alive():
+            job.process.kill()
+            job.process.join()
+
+    def _notify_finished(self, job_id: int, status: str, **kwargs) -> None:
+        try:
+            self.listener.finished(job_id, status, **kwargs)
+        except Exception as e:
+            logger.error(f"Analysis listener failed on finish of job {job_id}: {e}")
@@ -0,0 +1,164 @@
+"""
+Almacén de conversiones de modelos UVL direccionado por contenido.
+
+La salida de ``to_glencoe``, ``to_splot`` y ``to_cnf`` solo depende del
+contenido del UVL, del formato y de la versión de flamapy, así que se guarda
+una vez en ``<WORKING_DIR>/cache/artifacts/<versión flamapy>/<ab>/<checksum>.<formato>``
+y las siguientes peticiones la sirven directamente, con un ETag fuerte derivado
+de esa misma clave. El almacén tiene un presupuesto de disco
+(``ARTIFACT_CACHE_MAX_BYTES``) y al superarlo se borran las conversiones menos usadas.
+
+Además de los formatos de exportación, guarda el árbol de features en JSON
+(formato ``tree``) que pinta la vista de datasets UVL.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from typing import Optional, Tuple
+
+from app.modules.flamapy.cache import cache_root, evict_lru, flamapy_version, get_feature_model_cache, touch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DISK_BUDGET = 512 * 1024 * 1024  # 512 MB
+
+
+def _write_glencoe(fm, path: str) -> None:
+    from flamapy.metamodels.fm_metamodel.transformations import GlencoeWriter
+
+    GlencoeWriter(path, fm).transform()
+
+
+def _write_splot(fm, path: str) -> None:
+    from flamapy.metamodels.fm_metamodel.transformations import SPLOTWriter
+
+    SPLOTWriter(path, fm).transform()
+
+
+def _write_cnf(fm, path: str) -> None:
+    from flamapy.metamodels.pysat_metamodel.transformations import DimacsWriter, FmToPysat
+
+    sat = FmToPysat(fm).transform()
+    DimacsWriter(path, sat).transform()
+
+
+def _write_tree(fm, path: str) -> None:
+    from app.modules.flamapy.feature_tree import feature_tree
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(feature_tree(fm), f, ensure_ascii=False, separators=(",", ":"))
+
+
+# formato -> función que escribe la conversión de un FeatureModel en una ruta
+ARTIFACT_WRITERS = {
+    "glencoe": _write_glencoe,
+    "splot": _write_splot,
+    "cnf": _write_cnf,
+    "tree": _write_tree,  # árbol de features en JSON para la vista del dataset
+}
+
+# Formatos que se ofrecen como descarga/exportación (el resto son de uso interno)
+CONVERSION_FORMATS = ("glencoe", "splot", "cnf")
+
+
+class ArtifactCache:
+    """Conversiones generadas con flamapy guardadas por (checksum, formato, versión de flamapy)."""
+
+    def __init__(self, cache_dir: Optional[str] = None, disk_budget: Optional[int] = None):
+        self.cache_dir = cache_dir or os.path.join(cache_root(), "artifacts", flamapy_version())
+        self.disk_budget = (
+            disk_budget if disk_budget is not None else int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", DEFAULT_DISK_BUDGET))
+        )
+
+    def path_for(self, checksum: str, fmt: str) -> str:
+        return os.path.join(self.cache_dir, checksum[:2], f"{checksum}.{fmt}")
+
+    @staticmethod
+    def etag(checksum: str, fmt: str) -> str:
+        """ETag (sin comillas) de una conversión: cambia con el contenido, el formato o flamapy."""
+        return f"{checksum}-{fmt}-{flamapy_version()}"
+
+    def get(self, hubfile, fmt: str) -> str:
+        """Ruta de la conversión del Hubfile al formato pedido, generándola si no existe."""
+        if not hubfile.checksum:
+            raise ValueError(f"Hubfile {hubfile.id} has no checksum")
+        return self.get_for(hubfile.checksum, hubfile.get_path(), fmt)
+
+    def get_for(self, checksum: str, file_path: str, fmt: str) -> str:
+        """Como ``get()``, a partir del checksum y la ruta del UVL (lo que reciben los workers)."""
+        if fmt not in ARTIFACT_WRITERS:
+            raise ValueError(f"Unknown conversion format: {fmt}")
+
+        path = self.path_for(checksum, fmt)
+        if os.path.exists(path):
+            touch(path)
+            return path
+
+        self._build(checksum, file_path, fmt, path)
+        return path
+
+    def _build(self, checksum: str, file_path: str, fmt: str, path: str) -> None:
+        """
+        Escribe la conversión en un temporal de la misma carpeta y la publica con
+        un rename atómico, así una petición concurrente nunca ve un archivo a medias.
+        """
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            ARTIFACT_WRITERS[fmt](get_feature_model_cache().get(checksum, file_path), tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        logger.info(f"Stored {fmt} conversion of {checksum}")
+        evict_lru(self.cache_dir, self.disk_budget, suffix=tuple(f".{name}" for name in ARTIFACT_WRITERS), keep=path)
+
+
+_cache: Optional[ArtifactCache] = None
+
+
+def get_artifact_cache() -> ArtifactCache:
+    """Almacén compartido por todo el proceso."""
+    global _cache
+    if _cache is None:
+        _cache = ArtifactCache()
+    return _cache
+
+
+def prebuild_artifacts(checksum: Optional[str], file_path: str, formats=("tree",)) -> None:
+    """
+    Genera en la ingesta los artefactos que se piden en cada visita (el árbol de
+    features), con el modelo ya en la caché. Un fallo solo se registra: el
+    artefacto se generará en la primera petición.
+    """
+    if not checksum:
+        return
+    for fmt in formats:
+        try:
+            get_artifact_cache().get_for(checksum, file_path, fmt)
+        except Exception as e:
+            logger.warning(f"Could not prebuild {fmt} artifact for {checksum}: {e}")
+
+
+def export_conversion(file_path: str, checksum: Optional[str], fmt: str) -> Tuple[str, bool]:
+    """
+    Conversión de un UVL para exportar un dataset completo (se ejecuta en el
+    pool de procesos). Devuelve ``(ruta, temporal)``: con checksum la ruta es la
+    del almacén; sin él se escribe en un temporal que debe borrar quien lo use.
+    """
+    if checksum:
+        return get_artifact_cache().get_for(checksum, file_path, fmt), False
+
+    fd, tmp_path = tempfile.mkstemp(suffix=f".{fmt}")
+    os.close(fd)
+    try:
+        ARTIFACT_WRITERS[fmt](get_feature_model_cache().get(None, file_path), tmp_path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, True
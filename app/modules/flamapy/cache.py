@@ -0,0 +1,244 @@
+"""
+Caché de modelos de características de flamapy indexada por checksum.
+
+Parsear un UVL con ANTLR (``UVLReader(...).transform()``) es lo más caro de
+cualquier análisis o conversión, y el resultado solo depende del contenido del
+archivo. Los ``FeatureModel`` transformados se guardan por ``Hubfile.checksum``
+en dos niveles:
+
+- memoria: LRU por proceso (``FEATURE_MODEL_CACHE_ITEMS`` modelos).
+- disco: ``<WORKING_DIR>/cache/feature_models/<versión flamapy>/<ab>/<checksum>.pickle``,
+  compartido entre procesos y con un presupuesto de tamaño
+  (``FEATURE_MODEL_CACHE_MAX_BYTES``); al superarlo se borran los menos usados.
+
+Los modelos devueltos se comparten entre llamadas: no deben modificarse.
+"""
+
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from importlib.metadata import PackageNotFoundError, version
+from typing import Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_ITEMS = 64
+DEFAULT_DISK_BUDGET = 256 * 1024 * 1024  # 256 MB
+
+
+def flamapy_version() -> str:
+    """Versión de flamapy instalada (forma parte de las claves de caché)."""
+    try:
+        return version("flamapy-fm")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def cache_root() -> str:
+    """Carpeta base de las cachés en disco (junto a ``uploads``)."""
+    working_dir = os.getenv("WORKING_DIR")
+    if not working_dir:
+        working_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    return os.path.join(working_dir, "cache")
+
+
+def evict_lru(directory: str, budget: int, suffix: Union[str, Tuple[str, ...]] = "", keep: Optional[str] = None) -> int:
+    """
+    Borra los archivos menos usados (mtime más antiguo) de ``directory`` hasta que
+    el total quede por debajo de ``budget`` bytes, sin tocar ``keep`` (el que se
+    acaba de escribir). Devuelve los bytes liberados.
+    """
+    entries = []
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(suffix):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    freed = 0
+    for _, size, path in sorted(entries):
+        if total - freed <= budget:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            freed += size
+        except OSError:
+            continue
+    return freed
+
+
+def touch(path: str) -> None:
+    """Marca un archivo como usado (las cachés en disco usan el mtime como orden LRU)."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+class FeatureModelCache:
+    """LRU en memoria + pickles en disco de ``FeatureModel`` transformados, por checksum."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        memory_items: Optional[int] = None,
+        disk_budget: Optional[int] = None,
+    ):
+        self.cache_dir = cache_dir or os.path.join(cache_root(), "feature_models", flamapy_version())
+        self.memory_items = (
+            memory_items
+            if memory_items is not None
+            else int(os.getenv("FEATURE_MODEL_CACHE_ITEMS", DEFAULT_MEMORY_ITEMS))
+        )
+        self.disk_budget = (
+            disk_budget
+            if disk_budget is not None
+            else int(os.getenv("FEATURE_MODEL_CACHE_MAX_BYTES", DEFAULT_DISK_BUDGET))
+        )
+        self._memory: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def disk_path(self, checksum: str) -> str:
+        return os.path.join(self.cache_dir, checksum[:2], f"{checksum}.pickle")
+
+    def get(self, checksum: Optional[str], file_path: str):
+        """
+        ``FeatureModel`` del archivo: de memoria, de disco o, si no está en
+        ninguna, parseando el UVL (y guardándolo en ambas).
+        """
+        if not checksum:
+            return self._parse(file_path)
+
+        fm = self._get_memory(checksum)
+        if fm is not None:
+            return fm
+
+        fm = self._load_disk(checksum)
+        if fm is None:
+            fm = self._parse(file_path)
+            self._store_disk(checksum, fm)
+
+        self._put_memory(checksum, fm)
+        return fm
+
+    def put(self, checksum: str, fm) -> None:
+        """Guarda un modelo ya transformado (p. ej. el de la ingesta) para no tener que parsear el archivo."""
+        self._store_disk(checksum, fm)
+        self._put_memory(checksum, fm)
+
+    def invalidate(self, checksum: str) -> None:
+        with self._lock:
+            self._memory.pop(checksum, None)
+        try:
+            os.remove(self.disk_path(checksum))
+        except OSError:
+            pass
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    @staticmethod
+    def _parse(file_path: str):
+        from flamapy.metamodels.fm_metamodel.transformations import UVLReader
+
+        from app.modules.hubfile.storage import decompressed_path
+
+        # UVLReader solo acepta una ruta: un UVL guardado comprimido se lee desde un temporal
+        with decompressed_path(file_path) as path:
+            return UVLReader(path).transform()
+
+    def _get_memory(self, checksum: str):
+        with self._lock:
+            fm = self._memory.get(checksum)
+            if fm is not None:
+                self._memory.move_to_end(checksum)
+            return fm
+
+    def _put_memory(self, checksum: str, fm) -> None:
+        if self.memory_items <= 0:
+            return
+        with self._lock:
+            self._memory[checksum] = fm
+            self._memory.move_to_end(checksum)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _load_disk(self, checksum: str):
+        path = self.disk_path(checksum)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                fm = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable feature model cache {path}: {e}")
+            self.invalidate(checksum)
+            return None
+
+        touch(path)
+        return fm
+
+    def _store_disk(self, checksum: str, fm) -> None:
+        """Escritura atómica (archivo temporal + rename); si falla solo se registra."""
+        if self.disk_budget <= 0:
+            return
+
+        path = self.disk_path(checksum)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(fm, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not write feature model cache {path}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        evict_lru(self.cache_dir, self.disk_budget, suffix=".pickle", keep=path)
+
+
+def feature_model_from_tree(parse_tree):
+    """``FeatureModel`` a partir del árbol ANTLR de un UVL ya parseado (ver ``validation.parse_uvl_text``)."""
+    from flamapy.metamodels.fm_metamodel.transformations import UVLReader
+
+    class ParsedUVLReader(UVLReader):
+        # UVLReader usa la misma gramática (uvlparser): se salta su parseo del archivo
+        def set_parse_tree(self) -> None:
+            pass
+
+    reader = ParsedUVLReader("")
+    reader.parse_tree = parse_tree
+    return reader.transform()
+
+
+_cache: Optional[FeatureModelCache] = None
+
+
+def get_feature_model_cache() -> FeatureModelCache:
+    """Caché compartida por todo el proceso."""
+    global _cache
+    if _cache is None:
+        _cache = FeatureModelCache()
+    return _cache
+
+
+def load_feature_model(hubfile):
+    """``FeatureModel`` de un Hubfile UVL a través de la caché."""
+    return get_feature_model_cache().get(hubfile.checksum, hubfile.get_path())
@@ -0,0 +1,74 @@
+from typing import Dict, List
+
+
+def _relation_type(relation) -> str:
+    if relation.is_mandatory():
+        return "mandatory"
+    if relation.is_optional():
+        return "optional"
+    if relation.is_alternative():
+        return "alternative"
+    if relation.is_or():
+        return "or"
+    if relation.is_mutex():
+        return "mutex"
+    return "cardinality"
+
+
+def _groups(feature) -> List[Dict]:
+    """
+    Grupos de hijos de una feature. flamapy guarda una relación por cada hijo
+    obligatorio u opcional: las consecutivas del mismo tipo se agrupan, como en el UVL.
+    """
+    groups = []
+    for relation in feature.get_relations():
+        kind = _relation_type(relation)
+        if kind in ("mandatory", "optional") and groups and groups[-1]["type"] == kind:
+            groups[-1]["children"].extend(relation.children)
+            continue
+
+        group = {"type": kind, "children": list(relation.children)}
+        if kind == "cardinality":
+            group["min"], group["max"] = relation.card_min, relation.card_max
+        groups.append(group)
+    return groups
+
+
+def feature_tree(fm) -> Dict:
+    """
+    Forma JSON compacta de un ``FeatureModel`` para pintar el árbol sin parsear el UVL::
+
+        {"root": {"name": "Chat", "groups": [{"type": "mandatory", "children": [...]}]},
+         "constraints": ["Server IMPLIES \"Data Storage\""], "features": 12}
+
+    Las hojas no llevan ``groups`` y ``abstract`` solo aparece si es True. Se
+    recorre con una pila (sin recursión) para soportar árboles muy profundos.
+    """
+    if fm.root is None:
+        return {"root": None, "constraints": [], "features": 0}
+
+    root = {"name": fm.root.name}
+    stack = [(fm.root, root)]
+    while stack:
+        feature, node = stack.pop()
+        if feature.is_abstract:
+            node["abstract"] = True
+
+        groups = _groups(feature)
+        if not groups:
+            continue
+
+        node["groups"] = []
+        for group in groups:
+            children = []
+            for child in group["children"]:
+                child_node = {"name": child.name}
+                children.append(child_node)
+                stack.append((child, child_node))
+            node["groups"].append({**group, "children": children})
+
+    return {
+        "root": root,
+        "constraints": [constraint.ast.pretty_str() for constraint in fm.get_constraints()],
+        "features": len(fm.get_features()),
+    }
@@ -0,0 +1,122 @@
+import json
+from datetime import datetime
+from enum import Enum
+
+from sqlalchemy import Enum as SQLAlchemyEnum
+
+from app import db
+
+
+class AnalysisStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = (AnalysisStatus.DONE, AnalysisStatus.FAILED, AnalysisStatus.TIMEOUT, AnalysisStatus.CANCELLED)
+
+
+class AnalysisResult(db.Model):
+    """
+    Resultado de una operación de análisis sobre un modelo UVL.
+    Se indexa por contenido (checksum) y versión de flamapy, así que el mismo
+    modelo subido a varios datasets solo se analiza una vez.
+    """
+
+    __tablename__ = "fm_analysis_result"
+    __table_args__ = (
+        db.UniqueConstraint("checksum", "operation", "flamapy_version", name="uq_fm_analysis_result_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    checksum = db.Column(db.String(120), nullable=False)
+    operation = db.Column(db.String(40), nullable=False)
+    flamapy_version = db.Column(db.String(40), nullable=False)
+    result = db.Column(db.Text, nullable=False)  # JSON
+    duration = db.Column(db.Float)  # segundos
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @property
+    def value(self):
+        return json.loads(self.result)
+
+    def __repr__(self):
+        return f"AnalysisResult<{self.operation} {self.checksum}>"
+
+
+class AnalysisJob(db.Model):
+    """Petición de análisis de un archivo UVL, ejecutada en segundo plano por el pool de análisis."""
+
+    __tablename__ = "fm_analysis_job"
+
+    id = db.Column(db.Integer, primary_key=True)
+    hubfile_id = db.Column(db.Integer, db.ForeignKey("file.id"), nullable=False, index=True)
+    checksum = db.Column(db.String(120), nullable=False)
+    operation = db.Column(db.String(40), nullable=False)
+    status = db.Column(SQLAlchemyEnum(AnalysisStatus), nullable=False, default=AnalysisStatus.QUEUED, index=True)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    error = db.Column(db.Text)
+
+    result_id = db.Column(db.Integer, db.ForeignKey("fm_analysis_result.id"))
+    created_by_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+
+    # "<checksum>:<operación>" mientras está en cola o en ejecución y NULL al terminar: el índice
+    # único impide que dos procesos lancen a la vez el mismo análisis
+    active_key = db.Column(db.String(170), unique=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    result = db.relationship("AnalysisResult")
+    hubfile = db.relationship("Hubfile")
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @staticmethod
+    def active_key_for(checksum: str, operation: str) -> str:
+        return f"{checksum}:{operation}"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "hubfile_id": self.hubfile_id,
+            "operation": self.operation,
+            "status": self.status.value,
+            "result": self.result.value if self.result else None,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f"AnalysisJob<{self.id}:{self.operation}:{self.status.value}>"
+
+
+class UVLValidation(db.Model):
+    """Veredicto de la gramática UVL (ANTLR) para un contenido, calculado al subir el archivo."""
+
+    __tablename__ = "uvl_validation"
+
+    id = db.Column(db.Integer, primary_key=True)
+    checksum = db.Column(db.String(120), nullable=False, unique=True)
+    valid = db.Column(db.Boolean, nullable=False)
+    errors = db.Column(db.Text, nullable=False, default="[]")  # JSON
+    parser_version = db.Column(db.String(40), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @property
+    def error_list(self):
+        return json.loads(self.errors)
+
+    def to_dict(self):
+        return {"valid": self.valid, "errors": self.error_list}
+
+    def __repr__(self):
+        return f"UVLValidation<{self.checksum} {'valid' if self.valid else 'invalid'}>"
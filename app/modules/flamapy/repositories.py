@@ -1,7 +1,55 @@
-from app.modules.flamapy.models import Flamapy  # type: ignore
+from typing import Dict, List, Optional
+
+from app.modules.flamapy.models import AnalysisJob, AnalysisResult, AnalysisStatus, UVLValidation
 from core.repositories.BaseRepository import BaseRepository
 
 
-class FlamapyRepository(BaseRepository):
+class AnalysisResultRepository(BaseRepository):
     def __init__(self):
-        super().__init__(Flamapy)
+        super().__init__(AnalysisResult)
+
+    def get_for(self, checksum: str, operation: str, flamapy_version: str) -> Optional[AnalysisResult]:
+        return self.model.query.filter_by(
+            checksum=checksum, operation=operation, flamapy_version=flamapy_version
+        ).first()
+
+
+class AnalysisJobRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(AnalysisJob)
+
+    def get_active_for(self, checksum: str, operation: str) -> Optional[AnalysisJob]:
+        """Trabajo en cola o en ejecución para el mismo modelo y operación (para no duplicarlo)."""
+        return self.model.query.filter_by(active_key=AnalysisJob.active_key_for(checksum, operation)).first()
+
+    def get_done_for(self, result_id: int, hubfile_id: int) -> Optional[AnalysisJob]:
+        """Último trabajo terminado con ese resultado, preferiblemente del mismo archivo."""
+        return (
+            self.model.query.filter(AnalysisJob.result_id == result_id, AnalysisJob.status == AnalysisStatus.DONE)
+            .order_by((AnalysisJob.hubfile_id == hubfile_id).desc(), AnalysisJob.id.desc())
+            .first()
+        )
+
+    def get_cancel_requested(self, job_ids: List[int]) -> List[int]:
+        if not job_ids:
+            return []
+        rows = (
+            self.session.query(AnalysisJob.id)
+            .filter(AnalysisJob.id.in_(job_ids), AnalysisJob.cancel_requested.is_(True))
+            .all()
+        )
+        return [row.id for row in rows]
+
+
+class UVLValidationRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(UVLValidation)
+
+    def get_by_checksum(self, checksum: str) -> Optional[UVLValidation]:
+        return self.model.query.filter_by(checksum=checksum).first()
+
+    def get_by_checksums(self, checksums: List[str]) -> Dict[str, UVLValidation]:
+        if not checksums:
+            return {}
+        rows = self.model.query.filter(UVLValidation.checksum.in_(set(checksums))).all()
+        return {row.checksum: row for row in rows}
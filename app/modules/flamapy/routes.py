@@ -2,62 +2,34 @@ import logging
 import os
 import tempfile
 
-from antlr4 import CommonTokenStream, FileStream
-from antlr4.error.ErrorListener import ErrorListener
-from flamapy.metamodels.fm_metamodel.transformations import GlencoeWriter, SPLOTWriter, UVLReader
-from flamapy.metamodels.pysat_metamodel.transformations import DimacsWriter, FmToPysat
-from flask import jsonify, send_file
-from uvl.UVLCustomLexer import UVLCustomLexer
-from uvl.UVLPythonParser import UVLPythonParser
+from flask import Response, abort, jsonify, request, send_file, url_for
+from flask_login import current_user, login_required
 
+from app.modules.dataset.parse_pool import get_parse_pool
+from app.modules.dataset.services import DataSetService
+from app.modules.dataset.zip_stream import ZipStream
 from app.modules.flamapy import flamapy_bp
+from app.modules.flamapy.analysis import ANALYSIS_OPERATIONS
+from app.modules.flamapy.artifacts import ARTIFACT_WRITERS, CONVERSION_FORMATS, export_conversion, get_artifact_cache
+from app.modules.flamapy.cache import load_feature_model
+from app.modules.flamapy.feature_tree import feature_tree
+from app.modules.flamapy.services import AnalysisService, UVLValidationService
 from app.modules.hubfile.services import HubfileService
 
 logger = logging.getLogger(__name__)
 
+TREE_MAX_AGE = 365 * 24 * 3600  # el árbol de un checksum no cambia nunca
+
 
 @flamapy_bp.route("/flamapy/check_uvl/<int:file_id>", methods=["GET"])
 def check_uvl(file_id):
-    class CustomErrorListener(ErrorListener):
-        def __init__(self):
-            self.errors = []
-
-        def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
-            if "\\t" in msg:
-                warning_message = (
-                    f"The UVL has the following warning that prevents reading it: " f"Line {line}:{column} - {msg}"
-                )
-                print(warning_message)
-                self.errors.append(warning_message)
-            else:
-                error_message = (
-                    f"The UVL has the following error that prevents reading it: " f"Line {line}:{column} - {msg}"
-                )
-                self.errors.append(error_message)
-
+    """Veredicto de la gramática UVL, calculado al subir el archivo y guardado por checksum."""
     try:
         hubfile = HubfileService().get_by_id(file_id)
-        input_stream = FileStream(hubfile.get_path())
-        lexer = UVLCustomLexer(input_stream)
-
-        error_listener = CustomErrorListener()
-
-        lexer.removeErrorListeners()
-        lexer.addErrorListener(error_listener)
-
-        stream = CommonTokenStream(lexer)
-        parser = UVLPythonParser(stream)
+        validation = UVLValidationService().verdict(hubfile)
 
-        parser.removeErrorListeners()
-        parser.addErrorListener(error_listener)
-
-        # tree = parser.featureModel()
-
-        if error_listener.errors:
-            return jsonify({"errors": error_listener.errors}), 400
-
-        # Optional: Print the parse tree
-        # print(tree.toStringTree(recog=parser))
+        if not validation.valid:
+            return jsonify({"errors": validation.error_list}), 400
 
         return jsonify({"message": "Valid Model"}), 200
 
@@ -65,52 +37,202 @@ def check_uvl(file_id):
         return jsonify({"error": str(e)}), 500
 
 
+@flamapy_bp.route("/flamapy/dataset/<int:dataset_id>/check_uvl", methods=["GET"])
+def check_dataset_uvl(dataset_id):
+    """Veredictos de todos los UVL de un dataset en una sola llamada."""
+    dataset = DataSetService().get_or_404(dataset_id)
+    hubfiles = [hubfile for hubfile in dataset.files() if hubfile.name.lower().endswith(".uvl")]
+
+    verdicts = UVLValidationService().verdicts_for(hubfiles)
+    return jsonify(
+        {
+            "valid": all(validation.valid for validation in verdicts.values()),
+            "files": {
+                str(hubfile.id): {"name": hubfile.name, **verdicts[hubfile.id].to_dict()} for hubfile in hubfiles
+            },
+        }
+    )
+
+
 @flamapy_bp.route("/flamapy/valid/<int:file_id>", methods=["GET"])
 def valid(file_id):
     return jsonify({"success": True, "file_id": file_id})
 
 
-@flamapy_bp.route("/flamapy/to_glencoe/<int:file_id>", methods=["GET"])
-def to_glencoe(file_id):
-    temp_file = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+def _send_conversion(hubfile, fmt: str, download_name: str):
+    """
+    Sirve la conversión desde el almacén por contenido. El ETag depende del
+    checksum, el formato y la versión de flamapy, así que si el cliente ya la
+    tiene se responde 304 sin generar ni leer nada.
+    """
+    if not hubfile.checksum:
+        return _send_uncached_conversion(hubfile, fmt, download_name)
+
+    cache = get_artifact_cache()
+    etag = cache.etag(hubfile.checksum, fmt)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    return send_file(cache.get(hubfile, fmt), as_attachment=True, download_name=download_name, etag=etag)
+
+
+def _send_uncached_conversion(hubfile, fmt: str, download_name: str):
+    """Archivos antiguos sin checksum: se convierte en un temporal como antes."""
+    temp_file = tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False)
     try:
-        hubfile = HubfileService().get_or_404(file_id)
-        fm = UVLReader(hubfile.get_path()).transform()
-        GlencoeWriter(temp_file.name, fm).transform()
+        ARTIFACT_WRITERS[fmt](load_feature_model(hubfile), temp_file.name)
 
         # Return the file in the response
-        return send_file(temp_file.name, as_attachment=True, download_name=f"{hubfile.name}_glencoe.txt")
+        return send_file(temp_file.name, as_attachment=True, download_name=download_name)
     finally:
         # Clean up the temporary file
         os.remove(temp_file.name)
 
 
+@flamapy_bp.route("/flamapy/to_glencoe/<int:file_id>", methods=["GET"])
+def to_glencoe(file_id):
+    hubfile = HubfileService().get_or_404(file_id)
+    return _send_conversion(hubfile, "glencoe", f"{hubfile.name}_glencoe.txt")
+
+
 @flamapy_bp.route("/flamapy/to_splot/<int:file_id>", methods=["GET"])
 def to_splot(file_id):
-    temp_file = tempfile.NamedTemporaryFile(suffix=".splx", delete=False)
-    try:
-        hubfile = HubfileService().get_by_id(file_id)
-        fm = UVLReader(hubfile.get_path()).transform()
-        SPLOTWriter(temp_file.name, fm).transform()
-
-        # Return the file in the response
-        return send_file(temp_file.name, as_attachment=True, download_name=f"{hubfile.name}_splot.txt")
-    finally:
-        # Clean up the temporary file
-        os.remove(temp_file.name)
+    hubfile = HubfileService().get_by_id(file_id)
+    return _send_conversion(hubfile, "splot", f"{hubfile.name}_splot.txt")
 
 
 @flamapy_bp.route("/flamapy/to_cnf/<int:file_id>", methods=["GET"])
 def to_cnf(file_id):
-    temp_file = tempfile.NamedTemporaryFile(suffix=".cnf", delete=False)
+    hubfile = HubfileService().get_by_id(file_id)
+    return _send_conversion(hubfile, "cnf", f"{hubfile.name}_cnf.txt")
+
+
+@flamapy_bp.route("/flamapy/tree/<int:file_id>", methods=["GET"])
+def uvl_tree(file_id):
+    """
+    Árbol de features en JSON, generado una sola vez por checksum. Con
+    ``?v=<checksum>`` (como lo pide la vista del dataset) la URL identifica el
+    contenido y se cachea como inmutable; sin él se revalida con el ETag.
+    """
+    hubfile = HubfileService().get_or_404(file_id)
     try:
-        hubfile = HubfileService().get_by_id(file_id)
-        fm = UVLReader(hubfile.get_path()).transform()
-        sat = FmToPysat(fm).transform()
-        DimacsWriter(temp_file.name, sat).transform()
+        if not hubfile.checksum:
+            return jsonify(feature_tree(load_feature_model(hubfile)))
+
+        cache = get_artifact_cache()
+        etag = cache.etag(hubfile.checksum, "tree")
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+        else:
+            response = send_file(cache.get(hubfile, "tree"), mimetype="application/json", etag=etag)
+    except Exception as e:
+        logger.error(f"Could not build feature tree of hubfile {file_id}: {e}")
+        return jsonify({"error": str(e)}), 500
 
-        # Return the file in the response
-        return send_file(temp_file.name, as_attachment=True, download_name=f"{hubfile.name}_cnf.txt")
-    finally:
-        # Clean up the temporary file
-        os.remove(temp_file.name)
+    response.cache_control.public = True
+    if request.args.get("v") == hubfile.checksum:
+        response.cache_control.max_age = TREE_MAX_AGE
+        response.cache_control.immutable = True
+        response.cache_control.no_cache = None  # send_file lo añade por defecto
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+@flamapy_bp.route("/flamapy/dataset/<int:dataset_id>/export", methods=["GET"])
+def export_dataset(dataset_id):
+    """
+    Convierte todos los UVL del dataset al formato pedido en el pool de procesos
+    y los envía en un ZIP que se va generando según termina cada conversión.
+    """
+    fmt = request.args.get("format", "")
+    if fmt not in CONVERSION_FORMATS:
+        return jsonify({"error": f"Unknown conversion format: {fmt}"}), 400
+
+    dataset = DataSetService().get_or_404(dataset_id)
+    hubfiles = [hubfile for hubfile in dataset.files() if hubfile.name.lower().endswith(".uvl")]
+    if not hubfiles:
+        return jsonify({"error": "Dataset has no UVL models"}), 404
+
+    # Las rutas se resuelven aquí: el generador se ejecuta ya fuera del contexto de la petición
+    entries = [(hubfile.name, hubfile.get_path(), hubfile.checksum) for hubfile in hubfiles]
+    archive_name = f"dataset_{dataset_id}_{fmt}"
+
+    return Response(
+        _stream_export(entries, fmt, archive_name),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={archive_name}.zip"},
+    )
+
+
+def _stream_export(entries, fmt: str, archive_name: str):
+    stream = ZipStream()
+    names = [name for name, _, _ in entries]
+    paths = [path for _, path, _ in entries]
+    checksums = [checksum for _, _, checksum in entries]
+    errors = []
+
+    for index, result in get_parse_pool().imap(export_conversion, paths, checksums, [fmt] * len(entries)):
+        if not result.ok:
+            errors.append(f"{names[index]}: {result.error}")
+            continue
+
+        path, is_temp = result.value
+        try:
+            yield from stream.write_file(path, f"{archive_name}/{names[index]}_{fmt}.txt")
+        finally:
+            if is_temp:
+                os.remove(path)
+
+    if errors:
+        # Un modelo que no se puede convertir no invalida el resto de la exportación
+        yield from stream.write_bytes("\n".join(errors).encode("utf-8"), f"{archive_name}/errors.txt")
+    yield from stream.close()
+
+
+def _job_response(job, status_code: int = 200):
+    data = job.to_dict()
+    data["poll_url"] = url_for("flamapy.analysis_job", job_id=job.id)
+    return jsonify(data), status_code
+
+
+@flamapy_bp.route("/flamapy/analysis/<int:file_id>/<operation>", methods=["POST"])
+@login_required
+def analyze(file_id, operation):
+    """
+    Lanza (o reutiliza) un análisis en segundo plano. Responde 200 si el
+    resultado ya estaba calculado y 202 con la URL de consulta si no.
+    """
+    if operation not in ANALYSIS_OPERATIONS:
+        return jsonify({"error": f"Unknown analysis operation: {operation}"}), 400
+
+    hubfile = HubfileService().get_or_404(file_id)
+    try:
+        job = AnalysisService().submit(hubfile, operation, user=current_user)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return _job_response(job, 200 if job.is_finished else 202)
+
+
+@flamapy_bp.route("/flamapy/analysis/jobs/<int:job_id>", methods=["GET"])
+def analysis_job(job_id):
+    job = AnalysisService().get_job(job_id)
+    if job is None:
+        abort(404)
+    return _job_response(job)
+
+
+@flamapy_bp.route("/flamapy/analysis/jobs/<int:job_id>/cancel", methods=["POST"])
+@login_required
+def cancel_analysis_job(job_id):
+    service = AnalysisService()
+    job = service.get_job(job_id)
+    if job is None:
+        abort(404)
+    if job.created_by_id is not None and job.created_by_id != current_user.id:
+        abort(403)
+    return _job_response(service.cancel(job))
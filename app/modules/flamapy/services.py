@@ -1,7 +1,264 @@
-from app.modules.flamapy.repositories import FlamapyRepository
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app.modules.dataset.parse_pool import get_parse_pool, uvl_file_errors
+from app.modules.flamapy.analysis import ANALYSIS_OPERATIONS, AnalysisListener, AnalysisWorkerPool
+from app.modules.flamapy.cache import flamapy_version
+from app.modules.flamapy.models import AnalysisJob, AnalysisResult, AnalysisStatus, UVLValidation
+from app.modules.flamapy.repositories import AnalysisJobRepository, AnalysisResultRepository, UVLValidationRepository
+from app.modules.flamapy.validation import uvl_parser_version
 from core.services.BaseService import BaseService
 
+logger = logging.getLogger(__name__)
+
+# Trabajos en cola más antiguos que esto se dan por perdidos (p. ej. el proceso web se reinició)
+STALE_QUEUED_AFTER = timedelta(hours=6)
+
+
+class AnalysisService(BaseService):
+    """
+    Trabajos de análisis SAT sobre archivos UVL. Los resultados se guardan por
+    (checksum, operación, versión de flamapy): si ya existen, se devuelve el
+    trabajo terminado que los calculó y no se lanza ningún proceso.
+    """
+
+    def __init__(self):
+        super().__init__(AnalysisJobRepository())
+        self.result_repository = AnalysisResultRepository()
+
+    def submit(self, hubfile, operation: str, user=None) -> AnalysisJob:
+        if operation not in ANALYSIS_OPERATIONS:
+            raise ValueError(f"Unknown analysis operation: {operation}")
+        if not hubfile.checksum:
+            raise ValueError(f"Hubfile {hubfile.id} has no checksum")
+
+        user_id = user.id if user is not None else None
+
+        cached = self.result_repository.get_for(hubfile.checksum, operation, flamapy_version())
+        if cached is not None:
+            done = self.repository.get_done_for(cached.id, hubfile.id)
+            if done is not None:
+                return done
+            # Resultado sin ningún trabajo que lo referencie: se crea uno (una sola vez)
+            now = datetime.utcnow()
+            return self.repository.create(
+                hubfile_id=hubfile.id,
+                checksum=hubfile.checksum,
+                operation=operation,
+                status=AnalysisStatus.DONE,
+                result_id=cached.id,
+                created_by_id=user_id,
+                started_at=now,
+                finished_at=now,
+            )
+
+        active = self.repository.get_active_for(hubfile.checksum, operation)
+        if active is not None:
+            self._expire_if_stale(active)
+            if not active.is_finished:
+                return active
+
+        try:
+            with self.repository.session.begin_nested():
+                job = self.repository.create(
+                    commit=False,
+                    hubfile_id=hubfile.id,
+                    checksum=hubfile.checksum,
+                    operation=operation,
+                    status=AnalysisStatus.QUEUED,
+                    created_by_id=user_id,
+                    active_key=AnalysisJob.active_key_for(hubfile.checksum, operation),
+                )
+        except IntegrityError:
+            # Otro proceso lo ha lanzado a la vez: se devuelve el suyo (o su resultado si ya terminó)
+            return self.repository.get_active_for(hubfile.checksum, operation) or self.submit(
+                hubfile, operation, user=user
+            )
+        self.repository.session.commit()
+
+        get_analysis_pool().submit(job.id, hubfile.get_path(), hubfile.checksum, operation)
+        return job
+
+    def get_job(self, job_id: int) -> Optional[AnalysisJob]:
+        """Trabajo para consultar su estado; los que quedaron huérfanos se marcan como terminados."""
+        job = self.repository.get_by_id(job_id)
+        if job is not None and not job.is_finished:
+            self._expire_if_stale(job)
+        return job
+
+    def cancel(self, job: AnalysisJob) -> AnalysisJob:
+        """
+        Marca el trabajo como cancelado. Si lo ejecuta este proceso se cancela ya;
+        si no, el pool que lo tenga lo verá en su próxima consulta a la base de datos.
+        """
+        if job.is_finished:
+            return job
+
+        job.cancel_requested = True
+        self.repository.session.commit()
+        get_analysis_pool().cancel(job.id)
+        return job
+
+    def mark_started(self, job_id: int) -> None:
+        job = self.repository.get_by_id(job_id)
+        if job is None or job.is_finished:
+            return
+        job.status = AnalysisStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        self.repository.session.commit()
+
+    def mark_finished(
+        self, job_id: int, status: str, value: Any = None, error: str = None, duration: float = None
+    ) -> None:
+        job = self.repository.get_by_id(job_id)
+        if job is None:
+            return
+
+        job.status = AnalysisStatus(status)
+        job.error = error
+        job.finished_at = datetime.utcnow()
+        job.active_key = None
+        if job.status == AnalysisStatus.DONE:
+            job.result = self._store_result(job.checksum, job.operation, value, duration)
+        self.repository.session.commit()
+        logger.info(f"Analysis job {job_id} ({job.operation}) finished: {status}")
+
+    def cancelled_job_ids(self, job_ids: List[int]) -> List[int]:
+        return self.repository.get_cancel_requested(job_ids)
+
+    def _store_result(self, checksum: str, operation: str, value: Any, duration: Optional[float]) -> AnalysisResult:
+        version = flamapy_version()
+        existing = self.result_repository.get_for(checksum, operation, version)
+        if existing is not None:
+            return existing
+
+        try:
+            with self.repository.session.begin_nested():
+                return self.result_repository.create(
+                    commit=False,
+                    checksum=checksum,
+                    operation=operation,
+                    flamapy_version=version,
+                    result=json.dumps(value),
+                    duration=duration,
+                )
+        except IntegrityError:
+            # Otro proceso guardó el mismo resultado a la vez
+            return self.result_repository.get_for(checksum, operation, version)
+
+    def _expire_if_stale(self, job: AnalysisJob) -> None:
+        pool = get_analysis_pool()
+        if pool.tracks(job.id):
+            return
+
+        now = datetime.utcnow()
+        if job.status == AnalysisStatus.RUNNING and job.started_at:
+            stale = job.started_at + timedelta(seconds=pool.timeout * 2) < now
+        else:
+            stale = job.created_at + STALE_QUEUED_AFTER < now
+        if not stale:
+            return
+
+        job.status = AnalysisStatus.FAILED
+        job.error = "Analysis worker was lost"
+        job.finished_at = now
+        job.active_key = None
+        self.repository.session.commit()
+
+
+class UVLValidationService(BaseService):
+    """Veredictos de la gramática UVL guardados por checksum (se calculan en la ingesta)."""
 
-class FlamapyService(BaseService):
     def __init__(self):
-        super().__init__(FlamapyRepository())
+        super().__init__(UVLValidationRepository())
+
+    def record(self, checksum: str, errors: List[str], commit: bool = False) -> UVLValidation:
+        fields = {"valid": not errors, "errors": json.dumps(errors), "parser_version": uvl_parser_version()}
+
+        validation = self.repository.get_by_checksum(checksum)
+        if validation is None:
+            validation = self.repository.create(commit=False, checksum=checksum, **fields)
+        else:
+            for key, value in fields.items():
+                setattr(validation, key, value)
+
+        if commit:
+            self.repository.session.commit()
+        return validation
+
+    def record_safely(self, checksum: str, errors: List[str]) -> Optional[UVLValidation]:
+        """Como record(), pero un fallo no interrumpe la subida (el veredicto se calcula al consultarlo)."""
+        try:
+            return self.record(checksum, errors)
+        except Exception as e:
+            logger.warning(f"Could not store UVL validation for {checksum}: {e}")
+            return None
+
+    def verdict(self, hubfile) -> UVLValidation:
+        """
+        Veredicto de un Hubfile. Los archivos subidos antes de validar en la
+        ingesta (o con otra versión de la gramática) se validan ahora y se guardan.
+        """
+        return self.verdicts_for([hubfile])[hubfile.id]
+
+    def verdicts_for(self, hubfiles) -> Dict[int, UVLValidation]:
+        """Veredictos de varios Hubfiles con una consulta; los que faltan se validan en el pool de procesos."""
+        stored = self.repository.get_by_checksums([hubfile.checksum for hubfile in hubfiles if hubfile.checksum])
+        current_version = uvl_parser_version()
+
+        missing = []
+        for hubfile in hubfiles:
+            validation = stored.get(hubfile.checksum) if hubfile.checksum else None
+            if validation is None or validation.parser_version != current_version:
+                missing.append(hubfile)
+
+        verdicts = {}
+        if missing:
+            results = get_parse_pool().map(uvl_file_errors, [hubfile.get_path() for hubfile in missing])
+            for hubfile, result in zip(missing, results):
+                errors = result.value if result.ok else [f"The UVL could not be read: {result.error}"]
+                if hubfile.checksum:
+                    stored[hubfile.checksum] = self.record(hubfile.checksum, errors)
+                else:
+                    verdicts[hubfile.id] = UVLValidation(valid=not errors, errors=json.dumps(errors))
+            self.repository.session.commit()
+
+        for hubfile in hubfiles:
+            if hubfile.id not in verdicts:
+                verdicts[hubfile.id] = stored[hubfile.checksum]
+        return verdicts
+
+
+class _ServiceListener(AnalysisListener):
+    """Traslada los avisos del pool (que llegan desde su hilo supervisor) a la base de datos."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def started(self, job_id: int) -> None:
+        with self.app.app_context():
+            AnalysisService().mark_started(job_id)
+
+    def finished(self, job_id: int, status: str, value: Any = None, error: str = None, duration: float = None):
+        with self.app.app_context():
+            AnalysisService().mark_finished(job_id, status, value=value, error=error, duration=duration)
+
+    def cancelled(self, job_ids: list) -> list:
+        with self.app.app_context():
+            return AnalysisService().cancelled_job_ids(job_ids)
+
+
+_pool: Optional[AnalysisWorkerPool] = None
+
+
+def get_analysis_pool() -> AnalysisWorkerPool:
+    """Pool de análisis del proceso, ligado a la aplicación Flask actual."""
+    global _pool
+    if _pool is None:
+        _pool = AnalysisWorkerPool(_ServiceListener(current_app._get_current_object()))
+    return _pool
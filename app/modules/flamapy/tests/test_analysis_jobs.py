@@ -0,0 +1,270 @@
+"""
+Tests para los análisis SAT en segundo plano (pool de procesos, trabajos y resultados por checksum).
+"""
+
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from sqlalchemy.exc import IntegrityError
+
+import app.modules.flamapy.cache as cache_mod
+import app.modules.flamapy.services as services_mod
+from app import db
+from app.modules.auth.models import User
+from app.modules.dataset.models import DSMetaData, PublicationType, UVLDataset
+from app.modules.featuremodel.models import FeatureModel, FMMetaData
+from app.modules.flamapy import flamapy_bp
+from app.modules.flamapy.analysis import AnalysisListener, AnalysisWorkerPool, run_analysis
+from app.modules.flamapy.cache import FeatureModelCache
+from app.modules.flamapy.models import AnalysisJob, AnalysisResult, AnalysisStatus
+from app.modules.flamapy.services import AnalysisService, _ServiceListener
+from app.modules.hubfile.models import Hubfile
+
+UVL_EXAMPLES = Path(__file__).parents[2] / "dataset" / "uvl_examples"
+
+
+class RecordingListener(AnalysisListener):
+    def __init__(self):
+        self.started_ids = []
+        self.results = {}
+
+    def started(self, job_id):
+        self.started_ids.append(job_id)
+
+    def finished(self, job_id, status, value=None, error=None, duration=None):
+        self.results[job_id] = (status, value, error)
+
+
+@pytest.fixture
+def uvl_path(tmp_path, monkeypatch):
+    # Los procesos de análisis importan ``app`` desde WORKING_DIR, así que no se cambia;
+    # en su lugar se desactiva la caché en disco de modelos (heredan el entorno)
+    monkeypatch.setenv("FEATURE_MODEL_CACHE_MAX_BYTES", "0")
+    monkeypatch.setattr(cache_mod, "_cache", FeatureModelCache(cache_dir=str(tmp_path / "fm_cache")))
+    path = tmp_path / "model.uvl"
+    shutil.copy(UVL_EXAMPLES / "file1.uvl", path)
+    return str(path)
+
+
+@pytest.fixture
+def app(uvl_path, tmp_path, monkeypatch):
+    """Crear aplicación Flask de test."""
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        # En archivo (no en memoria): el hilo del pool guarda los resultados con su propia conexión
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'analysis.db'}",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+    db.init_app(app)
+    app.register_blueprint(flamapy_bp)
+
+    monkeypatch.setattr(services_mod, "_pool", AnalysisWorkerPool(_ServiceListener(app), max_workers=1, timeout=60))
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        services_mod._pool.wait_idle(timeout=60)
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def hubfile(app, uvl_path, monkeypatch):
+    user = User(email="analysis@example.com", password="hashed")
+    db.session.add(user)
+    db.session.flush()
+
+    ds_meta = DSMetaData(title="UVL Dataset", description="Models", publication_type=PublicationType.NONE)
+    db.session.add(ds_meta)
+    db.session.flush()
+
+    dataset = UVLDataset(user_id=user.id, ds_meta_data_id=ds_meta.id)
+    db.session.add(dataset)
+    db.session.flush()
+
+    fm_meta = FMMetaData(
+        filename="model.uvl", title="model", description="Model", publication_type=PublicationType.NONE
+    )
+    db.session.add(fm_meta)
+    db.session.flush()
+
+    fm = FeatureModel(data_set_id=dataset.id, fm_meta_data_id=fm_meta.id)
+    db.session.add(fm)
+    db.session.flush()
+
+    hubfile = Hubfile(name="model.uvl", checksum="abc123", size=1, feature_model_id=fm.id)
+    db.session.add(hubfile)
+    db.session.commit()
+
+    monkeypatch.setattr(Hubfile, "get_path", lambda self: uvl_path)
+    return hubfile
+
+
+def test_run_analysis_returns_json_friendly_values(uvl_path):
+    assert run_analysis(uvl_path, "abc123", "satisfiable") is True
+    assert run_analysis(uvl_path, "abc123", "configurations_number") > 0
+    assert run_analysis(uvl_path, "abc123", "dead_features") == []
+    assert isinstance(run_analysis(uvl_path, "abc123", "core_features"), list)
+
+
+def test_pool_runs_job_in_worker_process(uvl_path):
+    listener = RecordingListener()
+    pool = AnalysisWorkerPool(listener, max_workers=1, timeout=60)
+
+    pool.submit(1, uvl_path, "abc123", "satisfiable")
+
+    assert pool.wait_idle(timeout=60)
+    assert listener.started_ids == [1]
+    assert listener.results[1] == ("done", True, None)
+
+
+def test_pool_reports_worker_errors(tmp_path):
+    listener = RecordingListener()
+    pool = AnalysisWorkerPool(listener, max_workers=1, timeout=60)
+
+    pool.submit(1, str(tmp_path / "missing.uvl"), None, "satisfiable")
+
+    assert pool.wait_idle(timeout=60)
+    status, value, error = listener.results[1]
+    assert status == "failed"
+    assert error
+
+
+def test_pool_terminates_jobs_over_timeout(uvl_path):
+    listener = RecordingListener()
+    # Arrancar el proceso e importar flamapy ya supera este timeout
+    pool = AnalysisWorkerPool(listener, max_workers=1, timeout=0.05)
+
+    pool.submit(1, uvl_path, "abc123", "configurations_number")
+
+    assert pool.wait_idle(timeout=60)
+    assert listener.results[1][0] == "timeout"
+
+
+def test_pool_cancels_queued_and_running_jobs(uvl_path):
+    listener = RecordingListener()
+    pool = AnalysisWorkerPool(listener, max_workers=1, timeout=60)
+
+    pool.submit(1, uvl_path, "abc123", "configurations_number")
+    pool.submit(2, uvl_path, "abc123", "core_features")
+
+    assert pool.cancel(2)
+    assert listener.results[2][0] == "cancelled"
+
+    pool.cancel(1)
+    assert pool.wait_idle(timeout=60)
+    assert listener.results[1][0] in ("cancelled", "done")
+    assert pool.cancel(1) is False
+
+
+def test_pool_rejects_unknown_operation(uvl_path):
+    pool = AnalysisWorkerPool(RecordingListener(), max_workers=1, timeout=60)
+
+    with pytest.raises(ValueError):
+        pool.submit(1, uvl_path, "abc123", "explode")
+
+
+def test_job_result_is_cached_by_checksum(app, hubfile):
+    service = AnalysisService()
+
+    job = service.submit(hubfile, "satisfiable")
+    assert job.status == AnalysisStatus.QUEUED
+    assert services_mod._pool.wait_idle(timeout=60)
+
+    db.session.expire_all()
+    job = service.get_job(job.id)
+    assert job.status == AnalysisStatus.DONE
+    assert job.to_dict()["result"] is True
+    assert job.started_at is not None and job.finished_at is not None
+
+    again = service.submit(hubfile, "satisfiable")
+    assert again.id == job.id
+    assert again.result_id == job.result_id
+    assert job.active_key is None
+    assert AnalysisResult.query.count() == 1
+
+    # Consultar un resultado ya calculado no inserta trabajos
+    service.submit(hubfile, "satisfiable")
+    assert AnalysisJob.query.count() == 1
+
+
+def test_active_job_is_reused(app, hubfile):
+    service = AnalysisService()
+
+    first = service.submit(hubfile, "configurations_number")
+    second = service.submit(hubfile, "configurations_number")
+
+    assert second.id == first.id
+    assert AnalysisJob.query.count() == 1
+
+
+def test_active_job_started_by_another_process_is_reused(app, hubfile):
+    """La deduplicación es por base de datos: vale aunque el pool de este proceso no conozca el trabajo."""
+    other = AnalysisJob(
+        hubfile_id=hubfile.id,
+        checksum=hubfile.checksum,
+        operation="core_features",
+        status=AnalysisStatus.RUNNING,
+        started_at=datetime.utcnow(),
+        active_key=AnalysisJob.active_key_for(hubfile.checksum, "core_features"),
+    )
+    db.session.add(other)
+    db.session.commit()
+
+    assert AnalysisService().submit(hubfile, "core_features").id == other.id
+    assert not services_mod._pool.tracks(other.id)
+    assert AnalysisJob.query.count() == 1
+
+
+def test_only_one_active_job_per_checksum_and_operation(app, hubfile):
+    key = AnalysisJob.active_key_for(hubfile.checksum, "satisfiable")
+    db.session.add(
+        AnalysisJob(hubfile_id=hubfile.id, checksum=hubfile.checksum, operation="satisfiable", active_key=key)
+    )
+    db.session.commit()
+
+    db.session.add(
+        AnalysisJob(hubfile_id=hubfile.id, checksum=hubfile.checksum, operation="satisfiable", active_key=key)
+    )
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+
+def test_cancel_marks_job_cancelled(app, hubfile):
+    service = AnalysisService()
+
+    service.submit(hubfile, "configurations_number")
+    queued = service.submit(hubfile, "core_features")
+    service.cancel(queued)
+
+    db.session.expire_all()
+    job = service.get_job(queued.id)
+    assert job.cancel_requested
+    assert job.status == AnalysisStatus.CANCELLED
+
+
+def test_submit_requires_checksum(app, hubfile):
+    hubfile.checksum = ""
+
+    with pytest.raises(ValueError):
+        AnalysisService().submit(hubfile, "satisfiable")
+
+
+def test_poll_endpoint(app, hubfile):
+    job = AnalysisService().submit(hubfile, "satisfiable")
+    assert services_mod._pool.wait_idle(timeout=60)
+    db.session.expire_all()
+
+    response = app.test_client().get(f"/flamapy/analysis/jobs/{job.id}")
+
+    assert response.status_code == 200
+    assert response.json["status"] == "done"
+    assert response.json["result"] is True
+    assert response.json["poll_url"].endswith(f"/flamapy/analysis/jobs/{job.id}")
+
+    assert app.test_client().get("/flamapy/analysis/jobs/999").status_code == 404
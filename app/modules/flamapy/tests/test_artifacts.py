@@ -0,0 +1,196 @@
+"""
+Tests para el almacén de conversiones (glencoe/splot/cnf) y su servicio con ETag.
+"""
+
+import io
+import os
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+from zipfile import ZipFile
+
+import pytest
+from flask import Flask
+
+import app.modules.flamapy.artifacts as artifacts_mod
+import app.modules.flamapy.routes as routes_mod
+from app.modules.dataset.parse_pool import ParsePool
+from app.modules.flamapy import flamapy_bp
+from app.modules.flamapy.artifacts import ArtifactCache
+from app.modules.flamapy.cache import FeatureModelCache
+
+UVL_EXAMPLES = Path(__file__).parents[2] / "dataset" / "uvl_examples"
+
+
+@pytest.fixture
+def hubfile(tmp_path):
+    path = tmp_path / "model.uvl"
+    shutil.copy(UVL_EXAMPLES / "file1.uvl", path)
+    return SimpleNamespace(id=7, name="model.uvl", checksum="d41d8cd98f00", get_path=lambda: str(path))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ArtifactCache(cache_dir=str(tmp_path / "artifacts"), disk_budget=10 * 1024 * 1024)
+    monkeypatch.setattr(artifacts_mod, "_cache", store)
+    fm_cache = FeatureModelCache(cache_dir=str(tmp_path / "fm"))
+    monkeypatch.setattr("app.modules.flamapy.cache._cache", fm_cache)
+    return store
+
+
+@pytest.fixture
+def client(hubfile, store, monkeypatch):
+    class StubHubfileService:
+        def get_or_404(self, file_id):
+            return hubfile
+
+        get_by_id = get_or_404
+
+    monkeypatch.setattr(routes_mod, "HubfileService", StubHubfileService)
+
+    app = Flask(__name__)
+    app.config.update(TESTING=True)
+    app.register_blueprint(flamapy_bp)
+    return app.test_client()
+
+
+@pytest.mark.parametrize("fmt", ["glencoe", "splot", "cnf"])
+def test_conversion_is_built_once(store, hubfile, fmt):
+    path = store.get(hubfile, fmt)
+
+    assert path == store.path_for(hubfile.checksum, fmt)
+    assert os.path.getsize(path) > 0
+
+    with patch.dict(artifacts_mod.ARTIFACT_WRITERS, {fmt: lambda *args: pytest.fail("should not convert")}):
+        assert store.get(hubfile, fmt) == path
+
+
+def test_unknown_format_is_rejected(store, hubfile):
+    with pytest.raises(ValueError):
+        store.get(hubfile, "xml")
+
+
+def test_store_respects_disk_budget(tmp_path, hubfile, store):
+    store.disk_budget = 1
+    store.get(hubfile, "glencoe")
+
+    os.utime(store.path_for(hubfile.checksum, "glencoe"), (1000, 1000))
+
+    store.get(hubfile, "cnf")
+
+    # La conversión recién generada se conserva aunque por sí sola supere el presupuesto
+    assert not os.path.exists(store.path_for(hubfile.checksum, "glencoe"))
+    assert os.path.exists(store.path_for(hubfile.checksum, "cnf"))
+
+
+def test_route_serves_with_etag_and_304(client, store, hubfile):
+    first = client.get("/flamapy/to_cnf/7")
+    etag = first.headers["ETag"]
+
+    assert first.status_code == 200
+    assert first.headers["Content-Disposition"].endswith("model.uvl_cnf.txt")
+    assert etag == f'"{store.etag(hubfile.checksum, "cnf")}"'
+    assert first.data == Path(store.path_for(hubfile.checksum, "cnf")).read_bytes()
+
+    with patch.object(ArtifactCache, "get", side_effect=AssertionError("should not read the store")):
+        second = client.get("/flamapy/to_cnf/7", headers={"If-None-Match": etag})
+
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+
+
+def test_route_without_checksum_converts_on_the_fly(client, store, hubfile):
+    hubfile.checksum = None
+
+    response = client.get("/flamapy/to_glencoe/7")
+
+    assert response.status_code == 200
+    assert not os.path.exists(store.cache_dir)
+
+
+@pytest.fixture
+def export_client(client, hubfile, tmp_path, monkeypatch):
+    broken = tmp_path / "broken.uvl"
+    broken.write_text("features\n    Root {\n")
+    broken_hubfile = SimpleNamespace(id=8, name="broken.uvl", checksum=None, get_path=lambda: str(broken))
+    gpx_hubfile = SimpleNamespace(id=9, name="track.gpx", checksum="gpx", get_path=lambda: "track.gpx")
+
+    class StubDataSetService:
+        def get_or_404(self, dataset_id):
+            return SimpleNamespace(id=dataset_id, files=lambda: [hubfile, broken_hubfile, gpx_hubfile])
+
+    monkeypatch.setattr(routes_mod, "DataSetService", StubDataSetService)
+    monkeypatch.setattr(routes_mod, "get_parse_pool", lambda: ParsePool(max_workers=0))
+    return client
+
+
+def test_dataset_export_streams_zip_of_conversions(export_client, store, hubfile):
+    response = export_client.get("/flamapy/dataset/3/export?format=cnf")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/zip"
+    assert "dataset_3_cnf.zip" in response.headers["Content-Disposition"]
+    assert response.is_streamed
+
+    with ZipFile(io.BytesIO(response.get_data())) as zf:
+        assert zf.namelist() == ["dataset_3_cnf/model.uvl_cnf.txt", "dataset_3_cnf/errors.txt"]
+        with open(store.path_for(hubfile.checksum, "cnf"), "rb") as f:
+            assert zf.read("dataset_3_cnf/model.uvl_cnf.txt") == f.read()
+        assert zf.read("dataset_3_cnf/errors.txt").startswith(b"broken.uvl: ")
+
+
+def test_dataset_export_rejects_unknown_format(export_client):
+    assert export_client.get("/flamapy/dataset/3/export?format=xml").status_code == 400
+
+
+def test_dataset_export_rejects_internal_formats(export_client):
+    assert export_client.get("/flamapy/dataset/3/export?format=tree").status_code == 400
+
+
+def test_feature_tree_of_model(store, hubfile):
+    from app.modules.flamapy.cache import load_feature_model
+    from app.modules.flamapy.feature_tree import feature_tree
+
+    tree = feature_tree(load_feature_model(hubfile))
+    root = tree["root"]
+
+    assert root["name"] == "Chat"
+    assert [group["type"] for group in root["groups"]] == ["mandatory", "optional"]
+    assert [child["name"] for child in root["groups"][0]["children"]] == ["Connection", "Messages"]
+    assert [child["name"] for child in root["groups"][1]["children"]] == ["Data Storage", "Media Player"]
+    connection = root["groups"][0]["children"][0]
+    assert connection["groups"] == [{"type": "alternative", "children": [{"name": "Peer 2 Peer"}, {"name": "Server"}]}]
+    assert len(tree["constraints"]) == 2
+    assert tree["features"] == 10
+
+
+def test_tree_route_is_immutable_with_checksum_in_url(client, store, hubfile):
+    response = client.get(f"/flamapy/tree/7?v={hubfile.checksum}")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    assert response.get_json()["root"]["name"] == "Chat"
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == routes_mod.TREE_MAX_AGE
+    assert not response.cache_control.no_cache
+
+    with patch.dict(artifacts_mod.ARTIFACT_WRITERS, {"tree": lambda *args: pytest.fail("should not rebuild")}):
+        assert client.get(f"/flamapy/tree/7?v={hubfile.checksum}").status_code == 200
+
+
+def test_tree_route_revalidates_without_version(client, store, hubfile):
+    response = client.get("/flamapy/tree/7")
+
+    assert response.status_code == 200
+    assert response.cache_control.no_cache
+    assert not response.cache_control.immutable
+
+    revalidated = client.get("/flamapy/tree/7", headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+def test_tree_is_prebuilt_at_ingest(store, hubfile):
+    artifacts_mod.prebuild_artifacts(hubfile.checksum, hubfile.get_path())
+
+    assert os.path.exists(store.path_for(hubfile.checksum, "tree"))
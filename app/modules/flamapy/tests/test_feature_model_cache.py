@@ -0,0 +1,81 @@
+"""
+Tests para la caché de FeatureModel de flamapy indexada por checksum.
+"""
+
+import os
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.modules.flamapy.cache import FeatureModelCache, evict_lru
+
+UVL_EXAMPLES = Path(__file__).parents[2] / "dataset" / "uvl_examples"
+
+
+@pytest.fixture
+def uvl_file(tmp_path):
+    path = tmp_path / "model.uvl"
+    shutil.copy(UVL_EXAMPLES / "file1.uvl", path)
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FeatureModelCache(cache_dir=str(tmp_path / "cache"), memory_items=2, disk_budget=10 * 1024 * 1024)
+
+
+def test_second_get_skips_parsing(cache, uvl_file):
+    first = cache.get("abc123", uvl_file)
+
+    with patch.object(FeatureModelCache, "_parse", side_effect=AssertionError("should not parse")):
+        second = cache.get("abc123", uvl_file)
+
+    assert second is first
+    assert len(first.get_features()) > 0
+
+
+def test_disk_tier_survives_a_new_process(cache, uvl_file, tmp_path):
+    expected = len(cache.get("abc123", uvl_file).get_features())
+    assert os.path.exists(cache.disk_path("abc123"))
+
+    fresh = FeatureModelCache(cache_dir=cache.cache_dir, memory_items=2)
+    with patch.object(FeatureModelCache, "_parse", side_effect=AssertionError("should not parse")):
+        fm = fresh.get("abc123", uvl_file)
+
+    assert len(fm.get_features()) == expected
+
+
+def test_memory_tier_is_lru(cache, uvl_file):
+    for checksum in ("a1", "b2", "c3"):
+        cache.get(checksum, uvl_file)
+
+    assert list(cache._memory) == ["b2", "c3"]
+
+
+def test_unreadable_pickle_is_reparsed(cache, uvl_file):
+    cache.get("abc123", uvl_file)
+    cache.clear_memory()
+    with open(cache.disk_path("abc123"), "wb") as f:
+        f.write(b"not a pickle")
+
+    assert len(cache.get("abc123", uvl_file).get_features()) > 0
+
+
+def test_without_checksum_always_parses(cache, uvl_file):
+    cache.get(None, uvl_file)
+
+    assert not os.path.exists(cache.cache_dir)
+
+
+def test_evict_lru_removes_oldest_files(tmp_path):
+    for i, name in enumerate(("old", "middle", "new")):
+        path = tmp_path / f"{name}.pickle"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+
+    freed = evict_lru(str(tmp_path), budget=150, suffix=".pickle")
+
+    assert freed == 200
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["new.pickle"]
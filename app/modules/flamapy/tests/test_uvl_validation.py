@@ -0,0 +1,137 @@
+"""
+Tests para la validación UVL (gramática ANTLR) en la ingesta y sus veredictos por checksum.
+"""
+
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+import app.modules.flamapy.routes as routes_mod
+import app.modules.flamapy.services as services_mod
+from app import db
+from app.modules.dataset.parse_pool import ParsePool
+from app.modules.flamapy import flamapy_bp
+from app.modules.flamapy.models import UVLValidation
+from app.modules.flamapy.services import UVLValidationService
+from app.modules.flamapy.validation import validate_uvl_file, validate_uvl_text
+
+UVL_EXAMPLES = Path(__file__).parents[2] / "dataset" / "uvl_examples"
+
+INVALID_UVL = "features\n    Root\n        mandatory\n            A B\n"
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """Crear aplicación Flask de test."""
+    monkeypatch.setattr(services_mod, "get_parse_pool", lambda: ParsePool(max_workers=0))
+
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+    db.init_app(app)
+    app.register_blueprint(flamapy_bp)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def hubfiles(tmp_path):
+    valid = tmp_path / "valid.uvl"
+    shutil.copy(UVL_EXAMPLES / "file1.uvl", valid)
+    invalid = tmp_path / "invalid.uvl"
+    invalid.write_text(INVALID_UVL)
+
+    return [
+        SimpleNamespace(id=1, name="valid.uvl", checksum="valid-sum", get_path=lambda: str(valid)),
+        SimpleNamespace(id=2, name="invalid.uvl", checksum="invalid-sum", get_path=lambda: str(invalid)),
+        SimpleNamespace(id=3, name="legacy.uvl", checksum=None, get_path=lambda: str(valid)),
+    ]
+
+
+@pytest.fixture
+def client(app, hubfiles, monkeypatch):
+    by_id = {hubfile.id: hubfile for hubfile in hubfiles}
+
+    class StubHubfileService:
+        def get_by_id(self, file_id):
+            return by_id[file_id]
+
+    class StubDataSetService:
+        def get_or_404(self, dataset_id):
+            return SimpleNamespace(id=dataset_id, files=lambda: hubfiles)
+
+    monkeypatch.setattr(routes_mod, "HubfileService", StubHubfileService)
+    monkeypatch.setattr(routes_mod, "DataSetService", StubDataSetService)
+    return app.test_client()
+
+
+def test_grammar_errors_are_reported():
+    assert validate_uvl_file(str(UVL_EXAMPLES / "file1.uvl")) == []
+
+    errors = validate_uvl_text(INVALID_UVL)
+    assert len(errors) == 1
+    assert errors[0].startswith("The UVL has the following error that prevents reading it: Line 4:14")
+
+
+def test_record_upserts_by_checksum(app):
+    service = UVLValidationService()
+
+    service.record("abc", ["boom"], commit=True)
+    service.record("abc", [], commit=True)
+
+    assert UVLValidation.query.count() == 1
+    assert UVLValidation.query.one().to_dict() == {"valid": True, "errors": []}
+
+
+def test_stored_verdict_is_used_without_parsing(app, hubfiles, monkeypatch):
+    UVLValidationService().record("invalid-sum", ["stored error"], commit=True)
+    monkeypatch.setattr(services_mod, "uvl_file_errors", lambda path: pytest.fail("should not parse"))
+
+    verdict = UVLValidationService().verdict(hubfiles[1])
+
+    assert verdict.error_list == ["stored error"]
+
+
+def test_missing_verdicts_are_computed_and_stored(app, hubfiles):
+    verdicts = UVLValidationService().verdicts_for(hubfiles)
+
+    assert verdicts[1].valid
+    assert not verdicts[2].valid
+    assert verdicts[3].valid
+    # El archivo sin checksum no se guarda
+    assert {row.checksum for row in UVLValidation.query.all()} == {"valid-sum", "invalid-sum"}
+
+
+def test_check_uvl_is_a_lookup(client, monkeypatch):
+    UVLValidationService().record("invalid-sum", ["stored error"], commit=True)
+    UVLValidationService().record("valid-sum", [], commit=True)
+    monkeypatch.setattr(services_mod, "uvl_file_errors", lambda path: pytest.fail("should not parse"))
+
+    response = client.get("/flamapy/check_uvl/2")
+    assert response.status_code == 400
+    assert response.json == {"errors": ["stored error"]}
+
+    response = client.get("/flamapy/check_uvl/1")
+    assert response.status_code == 200
+    assert response.json == {"message": "Valid Model"}
+
+
+def test_check_dataset_uvl_returns_all_verdicts(client):
+    response = client.get("/flamapy/dataset/5/check_uvl")
+
+    assert response.status_code == 200
+    assert response.json["valid"] is False
+    assert set(response.json["files"]) == {"1", "2", "3"}
+    assert response.json["files"]["2"]["name"] == "invalid.uvl"
+    assert response.json["files"]["2"]["errors"]
+    assert response.json["files"]["1"] == {"name": "valid.uvl", "valid": True, "errors": []}
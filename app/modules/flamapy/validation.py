@@ -0,0 +1,70 @@
+"""
+Validación sintáctica de modelos UVL con la gramática ANTLR del paquete ``uvlparser``.
+
+Se ejecuta durante la ingesta (ver ``UVLIngestSink``) y el veredicto se guarda
+por checksum en ``uvl_validation``, así que ``/flamapy/check_uvl`` solo tiene
+que consultarlo.
+"""
+
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, List, Tuple
+
+from antlr4 import CommonTokenStream, InputStream
+from antlr4.error.ErrorListener import ErrorListener
+from uvl.UVLCustomLexer import UVLCustomLexer
+from uvl.UVLPythonParser import UVLPythonParser
+
+from app.modules.hubfile.storage import open_upload
+
+
+class UVLErrorListener(ErrorListener):
+    def __init__(self):
+        self.errors = []
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        if "\\t" in msg:
+            self.errors.append(
+                f"The UVL has the following warning that prevents reading it: " f"Line {line}:{column} - {msg}"
+            )
+        else:
+            self.errors.append(
+                f"The UVL has the following error that prevents reading it: " f"Line {line}:{column} - {msg}"
+            )
+
+
+def uvl_parser_version() -> str:
+    """Versión de la gramática instalada (un cambio invalida los veredictos guardados)."""
+    try:
+        return version("uvlparser")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def parse_uvl_text(text: str) -> Tuple[Any, List[str]]:
+    """
+    Parsea el modelo completo y devuelve ``(árbol, errores)``. Sin errores, el
+    árbol sirve para construir el modelo de flamapy sin volver a parsear (ver
+    ``cache.feature_model_from_tree``).
+    """
+    error_listener = UVLErrorListener()
+
+    lexer = UVLCustomLexer(InputStream(text))
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(error_listener)
+
+    parser = UVLPythonParser(CommonTokenStream(lexer))
+    parser.removeErrorListeners()
+    parser.addErrorListener(error_listener)
+    tree = parser.featureModel()
+
+    return tree, error_listener.errors
+
+
+def validate_uvl_text(text: str) -> List[str]:
+    """Parsea el modelo completo y devuelve la lista de errores (vacía si es válido)."""
+    return parse_uvl_text(text)[1]
+
+
+def validate_uvl_file(file_path: str) -> List[str]:
+    with open_upload(file_path, "r", encoding="utf-8") as f:
+        return validate_uvl_text(f.read())
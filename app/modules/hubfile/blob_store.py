@@ -0,0 +1,108 @@
+"""
+Almacén de contenidos (direccionado por SHA-256) de los archivos subidos.
+
+Cada contenido distinto se guarda una sola vez en
+``uploads/.blobs/<aa>/<bb>/<sha256>`` (los dos primeros pares de dígitos del
+hash reparten los blobs en carpetas). Los archivos de
+``uploads/user_<id>/dataset_<id>/`` se materializan como enlaces duros a su
+blob (o como copias si el sistema de archivos no admite enlaces), así que:
+
+- un mismo archivo subido a varios datasets ocupa disco una sola vez;
+- las versiones guardan el SHA-256 de cada archivo en ``files_snapshot`` y su
+  ZIP se genera desde los blobs: es exactamente el de entonces aunque los
+  archivos del dataset hayan cambiado después, sin copiar nada.
+
+Un blob está en el formato en que se guardan los archivos (ver ``storage.py``):
+con ``UPLOAD_COMPRESSION=gzip`` el archivo del dataset se comprime antes de
+incorporarlo, así que el blob es ese gzip y el archivo sigue siendo un enlace
+a él. El nombre del blob es siempre el SHA-256 del contenido original; como la
+compresión es determinista (``mtime=0``), el mismo contenido da el mismo blob.
+Si un contenido ya estaba guardado en el otro formato (p. ej. de antes de
+activar la compresión) se enlaza a ese blob: quien lee un archivo subido lo
+hace con ``open_upload``, que descomprime si hace falta.
+
+Un blob nunca se modifica: quien necesite otro contenido escribe un archivo
+nuevo y lo sustituye con un rename (como ``storage.compress_file``), lo que
+rompe el enlace sin tocar el blob. La tabla ``file_blob`` cuenta las
+referencias de cada blob (ver ``BlobService``), que se borra al llegar a cero.
+"""
+
+import os
+import shutil
+import uuid
+from typing import Optional
+
+BLOBS_DIRNAME = ".blobs"
+
+
+def _uploads_dir() -> str:
+    working_dir = os.getenv("WORKING_DIR")
+    if not working_dir:
+        working_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    return os.path.join(working_dir, "uploads")
+
+
+class BlobStore:
+    """Blobs en disco por SHA-256; las referencias se cuentan aparte, en la base de datos."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.path.join(_uploads_dir(), BLOBS_DIRNAME)
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def lookup(self, sha256: Optional[str]) -> Optional[str]:
+        """Ruta del blob si está guardado."""
+        if not sha256:
+            return None
+        path = self.path_for(sha256)
+        return path if os.path.exists(path) else None
+
+    def add(self, path: str, sha256: str) -> str:
+        """
+        Incorpora el archivo ``path`` (ya en su carpeta definitiva y en su formato
+        de almacenamiento) al almacén. Si el contenido ya estaba, ``path`` pasa a
+        ser un enlace al blob existente y su copia deja de ocupar disco.
+        """
+        blob_path = self.path_for(sha256)
+        if os.path.exists(blob_path):
+            if not os.path.samefile(blob_path, path):
+                link_or_copy(blob_path, path)
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            link_or_copy(path, blob_path)
+        return blob_path
+
+    def materialize(self, sha256: str, dest: str) -> str:
+        """Deja en ``dest`` el contenido del blob (enlace duro o copia)."""
+        blob_path = self.lookup(sha256)
+        if blob_path is None:
+            raise FileNotFoundError(f"Blob {sha256} is not stored")
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        link_or_copy(blob_path, dest)
+        return dest
+
+    def remove(self, sha256: str) -> None:
+        """Borra el blob. Los archivos materializados con enlaces duros no se ven afectados."""
+        try:
+            os.remove(self.path_for(sha256))
+        except FileNotFoundError:
+            pass
+
+
+def link_or_copy(src: str, dest: str) -> None:
+    """
+    ``dest`` pasa a tener el contenido de ``src``: enlace duro si se puede y
+    copia si no (otro sistema de archivos). Se escribe en un temporal y se
+    publica con un rename atómico, así que nadie ve ``dest`` a medias.
+    """
+    tmp_path = f"{dest}.{uuid.uuid4().hex}.tmp"
+    try:
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dest)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
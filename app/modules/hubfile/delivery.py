@@ -0,0 +1,177 @@
+"""
+Envío de archivos del disco (uploads y cachés) en las descargas.
+
+Las vistas siguen haciendo la autorización y el registro de descargas; el envío
+de los bytes depende de ``FILE_DELIVERY``:
+
+- ``send_file`` (por defecto, desarrollo): Flask envía el archivo, con
+  ETag/304 y Range/206.
+- ``x-accel``: la respuesta va vacía con una cabecera ``X-Accel-Redirect`` y es
+  nginx quien envía el archivo (y atiende los Range) desde una ``location``
+  ``internal``, así que el worker de gunicorn queda libre al momento. Los
+  prefijos internos son ``<X_ACCEL_PREFIX>/uploads/`` y ``<X_ACCEL_PREFIX>/cache/``
+  (ver ``docker/nginx/nginx.prod.conf``).
+
+Un archivo fuera de esas carpetas se envía siempre con ``send_file``.
+
+Los archivos guardados con gzip (``UPLOAD_COMPRESSION=gzip``, ver ``storage``)
+se envían tal cual con ``Content-Encoding: gzip`` a los clientes que lo aceptan
+(con x-accel, desde ``<X_ACCEL_PREFIX>/uploads-gzip/``, que añade la cabecera);
+al resto se les envía el contenido original descomprimiéndolo al vuelo.
+"""
+
+import mimetypes
+import os
+import unicodedata
+from typing import Iterator, List, Optional, Tuple, Union
+from urllib.parse import quote
+
+from flask import Response, abort, request, send_file
+
+from app.modules.flamapy.cache import cache_root
+from app.modules.hubfile.storage import COPY_CHUNK_SIZE, is_compressed, open_upload
+
+DEFAULT_ACCEL_PREFIX = "/_protected"
+
+
+def delivery_mode() -> str:
+    return os.getenv("FILE_DELIVERY", "send_file").lower()
+
+
+def _working_dir() -> str:
+    working_dir = os.getenv("WORKING_DIR")
+    if not working_dir:
+        working_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    return working_dir
+
+
+def accel_locations(gzip: bool = False) -> List[Tuple[str, str]]:
+    """
+    Pares ``(carpeta local, location interna de nginx)`` que nginx puede servir.
+    Con ``gzip``, las que envían el archivo con ``Content-Encoding: gzip``.
+    """
+    prefix = os.getenv("X_ACCEL_PREFIX", DEFAULT_ACCEL_PREFIX).rstrip("/")
+    if gzip:
+        return [(os.path.realpath(os.path.join(_working_dir(), "uploads")), f"{prefix}/uploads-gzip/")]
+    return [
+        (os.path.realpath(os.path.join(_working_dir(), "uploads")), f"{prefix}/uploads/"),
+        (os.path.realpath(cache_root()), f"{prefix}/cache/"),
+    ]
+
+
+def accel_uri(path: str, gzip: bool = False) -> Optional[str]:
+    """URI interna de nginx para ``path`` o ``None`` si no está en ninguna carpeta servida."""
+    real_path = os.path.realpath(path)
+    for root, location in accel_locations(gzip):
+        if real_path.startswith(root + os.sep):
+            return location + quote(os.path.relpath(real_path, root).replace(os.sep, "/"))
+    return None
+
+
+def deliver_file(
+    path: str,
+    mimetype: Optional[str] = None,
+    as_attachment: bool = False,
+    download_name: Optional[str] = None,
+    etag: Union[str, bool] = True,
+) -> Response:
+    """
+    Respuesta que envía ``path`` según ``FILE_DELIVERY``. ``etag`` (sin comillas)
+    identifica el contenido: una revalidación con él recibe 304 sin tocar el archivo.
+    """
+    if not os.path.isfile(path):
+        abort(404)
+
+    compressed = is_compressed(path)
+    if compressed:
+        if not _accepts_gzip():
+            return _send_decompressed(path, mimetype, as_attachment, download_name, etag)
+        # Cada codificación es una representación distinta, con su propio ETag fuerte
+        if isinstance(etag, str):
+            etag = f"{etag}-gzip"
+
+    uri = accel_uri(path, gzip=compressed) if delivery_mode() == "x-accel" else None
+    if uri is None:
+        response = send_file(
+            path,
+            mimetype=mimetype,
+            as_attachment=as_attachment,
+            download_name=download_name,
+            etag=etag,
+            conditional=True,
+        )
+        response.accept_ranges = "bytes"
+        if compressed:
+            response.content_encoding = "gzip"
+            response.vary.add("Accept-Encoding")
+        return response
+
+    not_modified = _not_modified(etag, compressed)
+    if not_modified is not None:
+        return not_modified
+
+    name = download_name or os.path.basename(path)
+    response = Response(mimetype=mimetype or mimetypes.guess_type(name)[0] or "application/octet-stream")
+    if as_attachment:
+        response.headers["Content-Disposition"] = _content_disposition(name)
+    # Content-Encoding y Vary de los comprimidos los pone la location de nginx
+    response.headers["X-Accel-Redirect"] = uri
+    if isinstance(etag, str):
+        response.set_etag(etag)
+    return response
+
+
+def _accepts_gzip() -> bool:
+    return request.accept_encodings["gzip"] > 0
+
+
+def _send_decompressed(
+    path: str, mimetype: Optional[str], as_attachment: bool, download_name: Optional[str], etag: Union[str, bool]
+) -> Response:
+    """Archivo comprimido para un cliente sin gzip: se descomprime al enviarlo (sin Range)."""
+    not_modified = _not_modified(etag, compressed=True)
+    if not_modified is not None:
+        return not_modified
+
+    name = download_name or os.path.basename(path)
+    response = Response(
+        _iter_decompressed(path), mimetype=mimetype or mimetypes.guess_type(name)[0] or "application/octet-stream"
+    )
+    if as_attachment:
+        response.headers["Content-Disposition"] = _content_disposition(name)
+    if isinstance(etag, str):
+        response.set_etag(etag)
+    response.accept_ranges = "none"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def _iter_decompressed(path: str) -> Iterator[bytes]:
+    with open_upload(path) as f:
+        while True:
+            chunk = f.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _not_modified(etag: Union[str, bool], compressed: bool) -> Optional[Response]:
+    """304 si el cliente ya tiene la representación con ``etag``; ``None`` si hay que enviarla."""
+    if not isinstance(etag, str) or not request.if_none_match.contains(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    if compressed:
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+def _content_disposition(name: str) -> str:
+    """Mismo formato que ``send_file``: ``filename*`` en UTF-8 si el nombre no es ASCII."""
+    name = name.replace('"', "")
+    try:
+        name.encode("ascii")
+    except UnicodeEncodeError:
+        fallback = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+        return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(name, safe='!#$&+^`|~')}"
+    return f'attachment; filename="{name}"'
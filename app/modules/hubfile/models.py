@@ -13,6 +13,8 @@ class Hubfile(db.Model):
     name = db.Column(db.String(120), nullable=False)
     checksum = db.Column(db.String(120), nullable=False)
     size = db.Column(db.Integer, nullable=False)
+    # Contenido en el almacén de blobs (ver blob_store.py); None en los archivos anteriores a él
+    sha256 = db.Column(db.String(64), index=True)
     feature_model_id = db.Column(db.Integer, db.ForeignKey("feature_model.id"), nullable=False)
 
     def get_formatted_size(self):
@@ -49,6 +51,20 @@ class Hubfile(db.Model):
         return f"File<{self.id}>"
 
 
+class FileBlob(db.Model):
+    """Contenido del almacén de blobs y cuántos Hubfiles y versiones lo referencian."""
+
+    __tablename__ = "file_blob"
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, unique=True)
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"FileBlob<{self.sha256[:12]} refs={self.ref_count}>"
+
+
 class HubfileViewRecord(db.Model):
     __tablename__ = "file_view_record"
     id = db.Column(db.Integer, primary_key=True)
@@ -1,10 +1,13 @@
+from typing import Optional
+
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 
 from app import db
 from app.modules.auth.models import User
 from app.modules.dataset.models import BaseDataset
 from app.modules.featuremodel.models import FeatureModel
-from app.modules.hubfile.models import Hubfile, HubfileDownloadRecord, HubfileViewRecord
+from app.modules.hubfile.models import FileBlob, Hubfile, HubfileDownloadRecord, HubfileViewRecord
 from core.repositories.BaseRepository import BaseRepository
 
 
@@ -25,6 +28,16 @@ class HubfileRepository(BaseRepository):
     def get_dataset_by_hubfile(self, hubfile: Hubfile) -> BaseDataset:
         return db.session.query(BaseDataset).join(FeatureModel).join(Hubfile).filter(Hubfile.id == hubfile.id).first()
 
+    def get_gpx_files_by_dataset(self, dataset_id: int) -> list:
+        """Pares (hubfile, fm_meta_data_id) de todos los archivos GPX de un dataset en una sola consulta."""
+        return (
+            db.session.query(Hubfile, FeatureModel.fm_meta_data_id)
+            .join(FeatureModel, Hubfile.feature_model_id == FeatureModel.id)
+            .filter(FeatureModel.data_set_id == dataset_id, func.lower(Hubfile.name).like("%.gpx"))
+            .order_by(Hubfile.id)
+            .all()
+        )
+
 
 class HubfileViewRecordRepository(BaseRepository):
     def __init__(self):
@@ -42,3 +55,34 @@ class HubfileDownloadRecordRepository(BaseRepository):
     def total_hubfile_downloads(self) -> int:
         max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
         return max_id if max_id is not None else 0
+
+
+class FileBlobRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(FileBlob)
+
+    def get_by_sha256(self, sha256: str) -> Optional[FileBlob]:
+        return self.model.query.filter_by(sha256=sha256).first()
+
+    def acquire(self, sha256: str, size: int, count: int = 1) -> None:
+        """Suma ``count`` referencias al blob (creando su fila con la primera). No hace commit."""
+        if self._add_refs(sha256, count):
+            return
+        try:
+            with self.session.begin_nested():
+                self.create(commit=False, sha256=sha256, size=size, ref_count=count)
+        except IntegrityError:
+            # Otro proceso registró el mismo blob a la vez
+            self._add_refs(sha256, count)
+
+    def release(self, sha256: str, count: int = 1) -> Optional[int]:
+        """Resta ``count`` referencias y devuelve las que quedan (None si el blob no está registrado)."""
+        if not self._add_refs(sha256, -count):
+            return None
+        return self.model.query.with_entities(self.model.ref_count).filter_by(sha256=sha256).scalar()
+
+    def _add_refs(self, sha256: str, count: int) -> bool:
+        updated = self.model.query.filter_by(sha256=sha256).update(
+            {self.model.ref_count: self.model.ref_count + count}, synchronize_session=False
+        )
+        return updated > 0
@@ -2,13 +2,16 @@ import os
 import uuid
 from datetime import datetime, timezone
 
-from flask import current_app, jsonify, make_response, request, send_from_directory
+from flask import abort, current_app, jsonify, make_response, request
 from flask_login import current_user
+from werkzeug.security import safe_join
 
 from app import db
 from app.modules.hubfile import hubfile_bp
+from app.modules.hubfile.delivery import deliver_file
 from app.modules.hubfile.models import HubfileDownloadRecord, HubfileViewRecord
 from app.modules.hubfile.services import HubfileDownloadRecordService, HubfileService
+from app.modules.hubfile.storage import open_upload
 
 
 @hubfile_bp.route("/file/download/<int:file_id>", methods=["GET"])
@@ -18,7 +21,13 @@ def download_file(file_id):
 
     directory_path = f"uploads/user_{file.feature_model.data_set.user_id}/dataset_{file.feature_model.data_set_id}/"
     parent_directory_path = os.path.dirname(current_app.root_path)
-    file_path = os.path.join(parent_directory_path, directory_path)
+    file_path = safe_join(os.path.join(parent_directory_path, directory_path), filename)
+    if file_path is None:
+        abort(404)
+
+    # El checksum identifica el contenido (ETag fuerte): se responde 304 a
+    # If-None-Match y 206 a Range; con FILE_DELIVERY=x-accel el envío lo hace nginx
+    resp = deliver_file(file_path, as_attachment=True, download_name=filename, etag=file.checksum or True)
 
     # Get the cookie from the request or generate a new one if it does not exist
     user_cookie = request.cookies.get("file_download_cookie")
@@ -30,7 +39,8 @@ def download_file(file_id):
         user_id=current_user.id if current_user.is_authenticated else None, file_id=file_id, download_cookie=user_cookie
     ).first()
 
-    if not existing_record:
+    # Una revalidación (304) no es una descarga
+    if not existing_record and resp.status_code != 304:
         # Record the download in your database
         HubfileDownloadRecordService().create(
             user_id=current_user.id if current_user.is_authenticated else None,
@@ -40,7 +50,6 @@ def download_file(file_id):
         )
 
     # Save the cookie to the user's browser
-    resp = make_response(send_from_directory(directory=file_path, path=filename, as_attachment=True))
     resp.set_cookie("file_download_cookie", user_cookie)
 
     return resp
@@ -57,7 +66,8 @@ def view_file(file_id):
 
     try:
         if os.path.exists(file_path):
-            with open(file_path, "r") as f:
+            # El contenido va dentro del JSON: un archivo guardado con gzip se descomprime al leerlo
+            with open_upload(file_path, "r") as f:
                 content = f.read()
 
             user_cookie = request.cookies.get("view_cookie")
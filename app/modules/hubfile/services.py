@@ -1,15 +1,21 @@
+import logging
 import os
+from typing import Dict, Iterable, List, Optional
 
 from app.modules.auth.models import User
 from app.modules.dataset.models import BaseDataset
+from app.modules.hubfile.blob_store import BlobStore
 from app.modules.hubfile.models import Hubfile
 from app.modules.hubfile.repositories import (
+    FileBlobRepository,
     HubfileDownloadRecordRepository,
     HubfileRepository,
     HubfileViewRecordRepository,
 )
 from core.services.BaseService import BaseService
 
+logger = logging.getLogger(__name__)
+
 
 class HubfileService(BaseService):
     def __init__(self):
@@ -24,6 +30,11 @@ class HubfileService(BaseService):
         return self.repository.get_dataset_by_hubfile(hubfile)
 
     def get_path_by_hubfile(self, hubfile: Hubfile) -> str:
+        # El blob tiene exactamente el contenido de este Hubfile; los archivos
+        # anteriores al almacén de blobs se leen de la carpeta del dataset
+        blob_path = BlobStore().lookup(hubfile.sha256)
+        if blob_path is not None:
+            return blob_path
 
         hubfile_user = self.get_owner_user_by_hubfile(hubfile)
         hubfile_dataset = self.get_dataset_by_hubfile(hubfile)
@@ -38,6 +49,18 @@ class HubfileService(BaseService):
 
         return path
 
+    def delete(self, id):
+        """Borra el Hubfile y suelta su referencia al blob."""
+        hubfile = self.repository.get_by_id(id)
+        if hubfile is None:
+            return False
+        sha256 = hubfile.sha256
+        self.repository.session.delete(hubfile)
+        self.repository.session.commit()
+        if sha256:
+            BlobService().release([sha256])
+        return True
+
     def total_hubfile_views(self) -> int:
         return self.hubfile_view_record_repository.total_hubfile_views()
 
@@ -49,3 +72,76 @@ class HubfileService(BaseService):
 class HubfileDownloadRecordService(BaseService):
     def __init__(self):
         super().__init__(HubfileDownloadRecordRepository())
+
+
+class BlobService(BaseService):
+    """
+    Almacén de contenidos de los archivos subidos (ver ``blob_store.py``) y sus
+    referencias: una por Hubfile y una por cada entrada de un ``files_snapshot``.
+    Salvo ``release``, no hace commit: las referencias se guardan en la misma
+    transacción que el Hubfile o la versión que las crea.
+    """
+
+    def __init__(self):
+        super().__init__(FileBlobRepository())
+        self.store = BlobStore()
+
+    def path_for(self, sha256: Optional[str]) -> Optional[str]:
+        return self.store.lookup(sha256)
+
+    def store_file(self, hubfile: Hubfile, path: str) -> Optional[str]:
+        """Incorpora al almacén el archivo ya guardado de un Hubfile (deduplicándolo) y cuenta su referencia."""
+        if not hubfile.sha256:
+            return None
+        blob_path = self.store.add(path, hubfile.sha256)
+        self.repository.acquire(hubfile.sha256, hubfile.size)
+        return blob_path
+
+    def store_safely(self, hubfile: Hubfile, path: str) -> Optional[str]:
+        """Como store_file(), pero un fallo no interrumpe la subida: el archivo queda solo en la carpeta del dataset."""
+        try:
+            return self.store_file(hubfile, path)
+        except Exception as e:
+            logger.warning(f"Could not add {path} to the blob store: {e}")
+            return None
+
+    def retain(self, files_snapshot: Dict[str, Dict]) -> None:
+        """Cuenta las referencias de las entradas de un ``files_snapshot`` con SHA-256."""
+        for entry in files_snapshot.values():
+            if entry.get("sha256"):
+                self.repository.acquire(entry["sha256"], entry.get("size") or 0)
+
+    def dataset_references(self, dataset: BaseDataset) -> List[str]:
+        """Hashes que referencia un dataset: uno por archivo y uno por entrada de cada versión."""
+        sha256s = [file.sha256 for file in dataset.files() if file.sha256]
+        for version in dataset.versions:
+            sha256s.extend(entry["sha256"] for entry in (version.files_snapshot or {}).values() if entry.get("sha256"))
+        return sha256s
+
+    def release(self, sha256s: Iterable[str]) -> None:
+        """
+        Quita una referencia por cada hash (una vez borrados los Hubfiles o
+        versiones que las tenían) y borra los blobs que se quedan sin ninguna.
+        """
+        orphaned = []
+        for sha256 in sha256s:
+            remaining = self.repository.release(sha256)
+            if remaining is not None and remaining <= 0 and sha256 not in orphaned:
+                orphaned.append(sha256)
+
+        for sha256 in orphaned:
+            self.repository.session.delete(self.repository.get_by_sha256(sha256))
+        self.repository.session.commit()
+
+        # Los archivos se borran cuando las filas ya no existen
+        for sha256 in orphaned:
+            self.store.remove(sha256)
+
+    def discard(self, sha256s: Iterable[str]) -> None:
+        """
+        Tras un rollback: borra los blobs de esos hashes que se quedaron sin
+        fila en ``file_blob`` (sus referencias no llegaron a guardarse).
+        """
+        for sha256 in set(sha256s):
+            if self.repository.get_by_sha256(sha256) is None:
+                self.store.remove(sha256)
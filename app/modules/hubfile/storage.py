@@ -0,0 +1,125 @@
+"""
+Almacenamiento comprimido (gzip) de los archivos subidos.
+
+GPX y UVL son texto muy redundante (XML, identificadores repetidos) que ocupa
+entre 8 y 15 veces menos comprimido. Con ``UPLOAD_COMPRESSION=gzip`` los
+archivos que llegan a ``uploads/user_<id>/dataset_<id>/`` se comprimen al
+guardarlos, con el mismo nombre: las rutas, el checksum y el tamaño del Hubfile
+siguen siendo los del archivo original.
+
+Un archivo comprimido se reconoce por su cabecera gzip (ningún UVL o GPX válido
+empieza por esos bytes), así que conviven sin problemas con los que se
+guardaron sin comprimir (``UPLOAD_COMPRESSION`` sin definir o ``none``, o
+datasets anteriores). Quien lea un archivo subido debe hacerlo con
+``open_upload`` (o ``decompressed_path`` si la librería solo acepta una ruta,
+como el ``UVLReader`` de flamapy); las descargas envían los bytes comprimidos
+tal cual con ``Content-Encoding: gzip`` (ver ``delivery.deliver_file``).
+"""
+
+import gzip
+import logging
+import os
+import shutil
+import struct
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b"\x1f\x8b"
+COMPRESSIBLE_EXTENSIONS = (".uvl", ".gpx")
+DEFAULT_COMPRESSION_LEVEL = 6
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+def compression_mode() -> str:
+    return os.getenv("UPLOAD_COMPRESSION", "none").lower()
+
+
+def is_compressed(path: str) -> bool:
+    """Si el archivo está guardado comprimido con gzip."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+    except OSError:
+        return False
+
+
+def uncompressed_size(path: str) -> int:
+    """Tamaño del contenido original (campo ISIZE del gzip, módulo 4 GB) o el del archivo si no está comprimido."""
+    if not is_compressed(path):
+        return os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.seek(-4, os.SEEK_END)
+        return struct.unpack("<I", f.read(4))[0]
+
+
+def open_upload(path: str, mode: str = "rb", encoding: Optional[str] = None) -> IO:
+    """
+    Abre un archivo subido para leerlo, descomprimiéndolo si hace falta.
+    ``mode`` es ``"rb"`` (bytes) o ``"r"``/``"rt"`` (texto, con ``encoding``).
+    """
+    if mode not in ("rb", "r", "rt"):
+        raise ValueError(f"Uploads can only be opened for reading, not with mode {mode!r}")
+
+    if is_compressed(path):
+        return gzip.open(path, "rb" if mode == "rb" else "rt", encoding=encoding)
+    return open(path, mode, encoding=encoding)
+
+
+@contextmanager
+def decompressed_path(path: str) -> Iterator[str]:
+    """
+    Ruta con el contenido original para las librerías que solo abren rutas. Si
+    el archivo no está comprimido es la misma; si lo está, un temporal con la
+    misma extensión que se borra al salir.
+    """
+    if not is_compressed(path):
+        yield path
+        return
+
+    fd, tmp_path = tempfile.mkstemp(suffix=os.path.splitext(path)[1])
+    try:
+        with os.fdopen(fd, "wb") as dest, gzip.open(path, "rb") as src:
+            shutil.copyfileobj(src, dest, COPY_CHUNK_SIZE)
+        yield tmp_path
+    finally:
+        os.remove(tmp_path)
+
+
+def compress_file(path: str, level: Optional[int] = None) -> bool:
+    """
+    Comprime el archivo en su sitio (temporal en la misma carpeta y rename
+    atómico). Devuelve False si ya estaba comprimido o no es un tipo de texto.
+    """
+    if not path.lower().endswith(COMPRESSIBLE_EXTENSIONS) or is_compressed(path):
+        return False
+    if level is None:
+        level = int(os.getenv("UPLOAD_COMPRESSION_LEVEL", DEFAULT_COMPRESSION_LEVEL))
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, open(path, "rb") as src:
+            # mtime=0: el mismo contenido produce siempre los mismos bytes
+            with gzip.GzipFile(filename="", mode="wb", compresslevel=level, fileobj=raw, mtime=0) as dest:
+                shutil.copyfileobj(src, dest, COPY_CHUNK_SIZE)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return True
+
+
+def store_upload(path: str) -> bool:
+    """
+    Deja un archivo recién movido a ``uploads`` en el formato configurado. Un
+    fallo al comprimir no interrumpe la subida: el archivo se queda sin comprimir.
+    """
+    if compression_mode() != "gzip":
+        return False
+    try:
+        return compress_file(path)
+    except OSError as e:
+        logger.warning(f"Could not compress {path}, keeping it uncompressed: {e}")
+        return False
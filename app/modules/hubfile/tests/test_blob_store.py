@@ -0,0 +1,279 @@
+"""
+Tests para el almacén de blobs por SHA-256 (deduplicación, referencias y versiones exactas).
+"""
+
+import hashlib
+import io
+import os
+from zipfile import ZipFile
+
+import pytest
+from flask import Flask
+
+import app.modules.hubfile.blob_store as blob_store_mod
+from app import db
+from app.modules.auth.models import User
+from app.modules.dataset.models import DSMetaData, PublicationType, UVLDataset
+from app.modules.dataset.services import DataSetService, VersionService
+from app.modules.featuremodel.models import FeatureModel
+from app.modules.hubfile.blob_store import BlobStore
+from app.modules.hubfile.models import FileBlob, Hubfile
+from app.modules.hubfile.services import BlobService, HubfileService
+from app.modules.hubfile.storage import compress_file, is_compressed, open_upload, store_upload
+
+OLD = b"features\n    Old\n"
+NEW = b"features\n    New\n"
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORKING_DIR", str(tmp_path))
+
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _create_dataset(tmp_path, title):
+    user = User(email=f"{title}@example.com", password="hashed")
+    meta = DSMetaData(title=title, description="Models", publication_type=PublicationType.NONE)
+    db.session.add_all([user, meta])
+    db.session.flush()
+    dataset = UVLDataset(user_id=user.id, ds_meta_data_id=meta.id)
+    db.session.add(dataset)
+    db.session.flush()
+    dataset_dir = tmp_path / "uploads" / f"user_{user.id}" / f"dataset_{dataset.id}"
+    dataset_dir.mkdir(parents=True)
+    return user, dataset, dataset_dir
+
+
+def _add_file(dataset, dataset_dir, name, content):
+    fm = FeatureModel(data_set_id=dataset.id)
+    db.session.add(fm)
+    db.session.flush()
+    hubfile = Hubfile(name=name, checksum="md5", sha256=sha256(content), size=len(content), feature_model_id=fm.id)
+    db.session.add(hubfile)
+    db.session.flush()
+    path = dataset_dir / name
+    path.write_bytes(content)
+    BlobService().store_file(hubfile, str(path))
+    db.session.commit()
+    return hubfile, path
+
+
+def test_blobs_are_fanned_out_by_hash(tmp_path):
+    store = BlobStore(root=str(tmp_path / "blobs"))
+    digest = sha256(OLD)
+
+    assert store.path_for(digest) == str(tmp_path / "blobs" / digest[:2] / digest[2:4] / digest)
+    assert store.lookup(digest) is None
+    assert store.lookup(None) is None
+
+
+def test_identical_files_share_one_blob(app, tmp_path):
+    _, first, first_dir = _create_dataset(tmp_path, "first")
+    _, second, second_dir = _create_dataset(tmp_path, "second")
+
+    first_file, first_path = _add_file(first, first_dir, "a.uvl", OLD)
+    second_file, second_path = _add_file(second, second_dir, "b.uvl", OLD)
+
+    blob_path = BlobService().path_for(sha256(OLD))
+    assert os.path.samefile(blob_path, first_path)
+    assert os.path.samefile(blob_path, second_path)
+    assert FileBlob.query.one().ref_count == 2
+    assert first_file.get_path() == blob_path
+
+
+def test_copies_when_hardlinks_are_not_supported(tmp_path, monkeypatch):
+    def no_links(src, dst):
+        raise OSError("Invalid cross-device link")
+
+    monkeypatch.setattr(blob_store_mod.os, "link", no_links)
+    store = BlobStore(root=str(tmp_path / "blobs"))
+    source = tmp_path / "a.uvl"
+    source.write_bytes(OLD)
+
+    blob_path = store.add(str(source), sha256(OLD))
+
+    assert not os.path.samefile(blob_path, source)
+    with open(blob_path, "rb") as f:
+        assert f.read() == OLD
+    assert sorted(os.listdir(os.path.dirname(blob_path))) == [sha256(OLD)]
+
+
+def test_compressed_upload_is_stored_compressed_and_linked(tmp_path):
+    store = BlobStore(root=str(tmp_path / "blobs"))
+    source = tmp_path / "a.uvl"
+    source.write_bytes(OLD)
+    compress_file(str(source))
+
+    blob_path = store.add(str(source), sha256(OLD))
+
+    assert blob_path == store.path_for(sha256(OLD))
+    assert is_compressed(blob_path)
+    assert os.path.samefile(blob_path, source)
+    with open_upload(blob_path) as f:
+        assert f.read() == OLD
+
+
+def test_compressed_uploads_of_same_content_share_one_blob(app, tmp_path, monkeypatch):
+    monkeypatch.setenv("UPLOAD_COMPRESSION", "gzip")
+    _, first, first_dir = _create_dataset(tmp_path, "first-gzip")
+    _, second, second_dir = _create_dataset(tmp_path, "second-gzip")
+
+    paths = []
+    for dataset, dataset_dir in ((first, first_dir), (second, second_dir)):
+        fm = FeatureModel(data_set_id=dataset.id)
+        db.session.add(fm)
+        db.session.flush()
+        hubfile = Hubfile(name="m.uvl", checksum="md5", sha256=sha256(OLD), size=len(OLD), feature_model_id=fm.id)
+        db.session.add(hubfile)
+        path = dataset_dir / "m.uvl"
+        path.write_bytes(OLD)
+        store_upload(str(path))
+        BlobService().store_file(hubfile, str(path))
+        paths.append(path)
+    db.session.commit()
+
+    blob_path = BlobService().path_for(sha256(OLD))
+    assert is_compressed(blob_path)
+    assert all(os.path.samefile(blob_path, path) for path in paths)
+    assert FileBlob.query.one().ref_count == 2
+
+
+def test_upload_in_other_format_is_linked_to_existing_blob(app, tmp_path):
+    _, first, first_dir = _create_dataset(tmp_path, "raw")
+    _, second, second_dir = _create_dataset(tmp_path, "gzip")
+    _, first_path = _add_file(first, first_dir, "a.uvl", OLD)
+
+    # El mismo contenido, llegado ya comprimido, se enlaza al blob sin comprimir que ya estaba
+    second_path = second_dir / "b.uvl"
+    second_path.write_bytes(OLD)
+    compress_file(str(second_path))
+    blob_path = BlobStore().add(str(second_path), sha256(OLD))
+
+    assert os.path.samefile(blob_path, first_path)
+    assert os.path.samefile(blob_path, second_path)
+    with open_upload(str(second_path)) as f:
+        assert f.read() == OLD
+
+
+def test_version_zip_keeps_historical_content(app, tmp_path):
+    user, dataset, dataset_dir = _create_dataset(tmp_path, "history")
+    hubfile, path = _add_file(dataset, dataset_dir, "model.uvl", OLD)
+    version = VersionService.create_version(dataset, "Initial", user)
+    assert version.files_snapshot["model.uvl"]["sha256"] == sha256(OLD)
+
+    # El archivo del dataset se sustituye (rename): el blob de la versión no cambia
+    tmp = dataset_dir / "model.uvl.new"
+    tmp.write_bytes(NEW)
+    os.replace(tmp, path)
+
+    with ZipFile(io.BytesIO(b"".join(VersionService.build_version_zip(version, dataset)))) as zf:
+        assert zf.read("model.uvl") == OLD
+
+
+def test_blob_is_removed_with_its_last_reference(app, tmp_path):
+    user, dataset, dataset_dir = _create_dataset(tmp_path, "deleted")
+    _add_file(dataset, dataset_dir, "model.uvl", OLD)
+    VersionService.create_version(dataset, "Initial", user)
+    blob_path = BlobService().path_for(sha256(OLD))
+    assert FileBlob.query.one().ref_count == 2
+
+    BlobService().release([sha256(OLD)])
+    assert FileBlob.query.one().ref_count == 1
+    assert os.path.exists(blob_path)
+
+    BlobService().release([sha256(OLD)])
+    assert FileBlob.query.count() == 0
+    assert not os.path.exists(blob_path)
+
+
+def test_failed_store_keeps_upload(app, tmp_path, monkeypatch):
+    _, dataset, dataset_dir = _create_dataset(tmp_path, "failed")
+    fm = FeatureModel(data_set_id=dataset.id)
+    db.session.add(fm)
+    db.session.flush()
+    hubfile = Hubfile(name="a.uvl", checksum="md5", sha256=sha256(OLD), size=len(OLD), feature_model_id=fm.id)
+    db.session.add(hubfile)
+    path = dataset_dir / "a.uvl"
+    path.write_bytes(OLD)
+
+    def broken(self, path, digest):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(BlobStore, "add", broken)
+
+    assert BlobService().store_safely(hubfile, str(path)) is None
+    assert FileBlob.query.count() == 0
+    assert hubfile.get_path() == str(path)
+
+
+def test_deleting_dataset_releases_its_blobs(app, tmp_path):
+    user, dataset, dataset_dir = _create_dataset(tmp_path, "gone")
+    _add_file(dataset, dataset_dir, "model.uvl", OLD)
+    VersionService.create_version(dataset, "Initial", user)
+    blob_path = BlobService().path_for(sha256(OLD))
+
+    dataset.delete()
+
+    assert FileBlob.query.count() == 0
+    assert not os.path.exists(blob_path)
+
+
+def test_deleting_dataset_through_service_releases_its_blobs(app, tmp_path):
+    _, dataset, dataset_dir = _create_dataset(tmp_path, "service")
+    _add_file(dataset, dataset_dir, "model.uvl", OLD)
+    blob_path = BlobService().path_for(sha256(OLD))
+
+    assert DataSetService().delete(dataset.id)
+
+    assert FileBlob.query.count() == 0
+    assert not os.path.exists(blob_path)
+    assert DataSetService().delete(dataset.id) is False
+
+
+def test_deleting_hubfile_releases_its_blob(app, tmp_path):
+    user, dataset, dataset_dir = _create_dataset(tmp_path, "hubfile")
+    hubfile, _ = _add_file(dataset, dataset_dir, "model.uvl", OLD)
+    VersionService.create_version(dataset, "Initial", user)
+    blob_path = BlobService().path_for(sha256(OLD))
+
+    assert HubfileService().delete(hubfile.id)
+
+    # La versión sigue referenciando el blob
+    assert FileBlob.query.one().ref_count == 1
+    assert os.path.exists(blob_path)
+
+
+def test_rolled_back_upload_discards_its_blob(app, tmp_path):
+    _, dataset, dataset_dir = _create_dataset(tmp_path, "rollback")
+    db.session.commit()
+    fm = FeatureModel(data_set_id=dataset.id)
+    db.session.add(fm)
+    db.session.flush()
+    hubfile = Hubfile(name="a.uvl", checksum="md5", sha256=sha256(NEW), size=len(NEW), feature_model_id=fm.id)
+    db.session.add(hubfile)
+    path = dataset_dir / "a.uvl"
+    path.write_bytes(NEW)
+    blob_path = BlobService().store_file(hubfile, str(path))
+
+    db.session.rollback()
+    BlobService().discard([sha256(NEW)])
+
+    assert not os.path.exists(blob_path)
+    assert path.read_bytes() == NEW
@@ -0,0 +1,207 @@
+"""
+Tests para las descargas condicionales (ETag/304) y parciales (Range/206) de archivos.
+"""
+
+import gzip
+import os
+
+import pytest
+from flask import Flask
+from flask_login import LoginManager
+
+from app import db
+from app.modules.auth.models import User
+from app.modules.dataset.models import DSMetaData, PublicationType, UVLDataset
+from app.modules.featuremodel.models import FeatureModel
+from app.modules.hubfile.models import Hubfile, HubfileDownloadRecord
+from app.modules.hubfile.routes import hubfile_bp
+from app.modules.hubfile.storage import compress_file
+
+# Contenido binario que no empieza por la cabecera gzip (se tomaría por un archivo comprimido)
+CONTENT = b"features\n" + os.urandom(2039)
+
+
+@pytest.fixture
+def app(tmp_path):
+    # Las descargas se sirven desde <padre de root_path>/uploads
+    app = Flask(__name__, root_path=str(tmp_path / "app"))
+    app.config.update(
+        TESTING=True,
+        SECRET_KEY="test-secret-key",
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+    login_manager = LoginManager()
+    login_manager.init_app(app)
+    login_manager.user_loader(lambda user_id: None)
+    app.register_blueprint(hubfile_bp)
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def hubfile_id(app, tmp_path):
+    user = User(email="files@example.com", password="password")
+    meta = DSMetaData(title="Files", description="Files", publication_type=PublicationType.NONE)
+    db.session.add_all([user, meta])
+    db.session.flush()
+    dataset = UVLDataset(user_id=user.id, ds_meta_data_id=meta.id)
+    db.session.add(dataset)
+    db.session.flush()
+    fm = FeatureModel(data_set_id=dataset.id)
+    db.session.add(fm)
+    db.session.flush()
+    hubfile = Hubfile(name="model.uvl", checksum="abc123", size=len(CONTENT), feature_model_id=fm.id)
+    db.session.add(hubfile)
+    db.session.commit()
+
+    dataset_dir = tmp_path / "uploads" / f"user_{user.id}" / f"dataset_{dataset.id}"
+    dataset_dir.mkdir(parents=True)
+    (dataset_dir / "model.uvl").write_bytes(CONTENT)
+    return hubfile.id
+
+
+def test_download_uses_checksum_as_etag(app, hubfile_id):
+    response = app.test_client().get(f"/file/download/{hubfile_id}")
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"abc123"'
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert "Last-Modified" in response.headers
+    assert response.get_data() == CONTENT
+
+
+def test_revalidation_returns_304_and_is_not_a_download(app, hubfile_id):
+    response = app.test_client().get(f"/file/download/{hubfile_id}", headers={"If-None-Match": '"abc123"'})
+
+    assert response.status_code == 304
+    assert response.get_data() == b""
+    assert HubfileDownloadRecord.query.count() == 0
+
+
+def test_range_resumes_download(app, hubfile_id):
+    response = app.test_client().get(
+        f"/file/download/{hubfile_id}", headers={"Range": "bytes=1000-", "If-Range": '"abc123"'}
+    )
+
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 1000-{len(CONTENT) - 1}/{len(CONTENT)}"
+    assert response.get_data() == CONTENT[1000:]
+
+
+def test_range_of_changed_file_sends_everything(app, hubfile_id):
+    response = app.test_client().get(
+        f"/file/download/{hubfile_id}", headers={"Range": "bytes=1000-", "If-Range": '"old-checksum"'}
+    )
+
+    assert response.status_code == 200
+    assert response.get_data() == CONTENT
+
+
+@pytest.fixture
+def x_accel(monkeypatch, tmp_path):
+    monkeypatch.setenv("FILE_DELIVERY", "x-accel")
+    monkeypatch.setenv("WORKING_DIR", str(tmp_path))
+
+
+def test_x_accel_delegates_file_to_nginx(app, hubfile_id, x_accel):
+    response = app.test_client().get(f"/file/download/{hubfile_id}")
+
+    assert response.status_code == 200
+    assert response.headers["X-Accel-Redirect"] == "/_protected/uploads/user_1/dataset_1/model.uvl"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="model.uvl"'
+    assert response.headers["ETag"] == '"abc123"'
+    assert response.get_data() == b""
+    assert HubfileDownloadRecord.query.count() == 1
+
+
+def test_x_accel_still_answers_revalidation(app, hubfile_id, x_accel):
+    response = app.test_client().get(f"/file/download/{hubfile_id}", headers={"If-None-Match": '"abc123"'})
+
+    assert response.status_code == 304
+    assert "X-Accel-Redirect" not in response.headers
+
+
+def test_x_accel_only_serves_known_folders(tmp_path, x_accel):
+    from app.modules.hubfile.delivery import accel_uri
+
+    assert accel_uri(str(tmp_path / "cache" / "archives" / "dataset_1" / "a b.zip")) == (
+        "/_protected/cache/archives/dataset_1/a%20b.zip"
+    )
+    assert accel_uri(str(tmp_path / "uploads" / ".." / "secret.txt")) is None
+    assert accel_uri("/etc/passwd") is None
+
+
+def test_missing_file_is_404(app, hubfile_id, tmp_path):
+    os.remove(tmp_path / "uploads" / "user_1" / "dataset_1" / "model.uvl")
+
+    assert app.test_client().get(f"/file/download/{hubfile_id}").status_code == 404
+
+
+@pytest.fixture
+def compressed(tmp_path, hubfile_id):
+    path = tmp_path / "uploads" / "user_1" / "dataset_1" / "model.uvl"
+    compress_file(str(path))
+    return path
+
+
+def test_compressed_file_is_sent_as_stored_to_gzip_clients(app, compressed, hubfile_id):
+    response = app.test_client().get(f"/file/download/{hubfile_id}", headers={"Accept-Encoding": "gzip, deflate"})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert response.headers["ETag"] == '"abc123-gzip"'
+    assert response.get_data() == compressed.read_bytes()
+    assert gzip.decompress(response.get_data()) == CONTENT
+
+
+def test_compressed_file_is_decompressed_for_other_clients(app, compressed, hubfile_id):
+    client = app.test_client()
+    response = client.get(f"/file/download/{hubfile_id}", headers={"Accept-Encoding": "gzip;q=0, identity"})
+
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] == '"abc123"'
+    assert response.headers["Accept-Ranges"] == "none"
+    assert response.get_data() == CONTENT
+
+    revalidation = client.get(f"/file/download/{hubfile_id}", headers={"If-None-Match": '"abc123"'})
+    assert revalidation.status_code == 304
+
+
+def test_x_accel_sends_compressed_file_through_gzip_location(app, compressed, hubfile_id, x_accel):
+    response = app.test_client().get(f"/file/download/{hubfile_id}", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["X-Accel-Redirect"] == "/_protected/uploads-gzip/user_1/dataset_1/model.uvl"
+    assert response.headers["ETag"] == '"abc123-gzip"'
+
+
+def test_view_reads_compressed_file(app, tmp_path):
+    user = User(email="view@example.com", password="password")
+    meta = DSMetaData(title="View", description="View", publication_type=PublicationType.NONE)
+    db.session.add_all([user, meta])
+    db.session.flush()
+    dataset = UVLDataset(user_id=user.id, ds_meta_data_id=meta.id)
+    db.session.add(dataset)
+    db.session.flush()
+    fm = FeatureModel(data_set_id=dataset.id)
+    db.session.add(fm)
+    db.session.flush()
+    hubfile = Hubfile(name="view.uvl", checksum="def456", size=20, feature_model_id=fm.id)
+    db.session.add(hubfile)
+    db.session.commit()
+
+    path = tmp_path / "uploads" / f"user_{user.id}" / f"dataset_{dataset.id}" / "view.uvl"
+    path.parent.mkdir(parents=True)
+    path.write_text("features\n    Root\n")
+    compress_file(str(path))
+
+    response = app.test_client().get(f"/file/view/{hubfile.id}")
+
+    assert response.get_json() == {"success": True, "content": "features\n    Root\n"}
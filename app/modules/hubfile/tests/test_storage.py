@@ -0,0 +1,107 @@
+"""
+Tests para el almacenamiento comprimido (gzip) de los archivos subidos.
+"""
+
+import gzip
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.modules.dataset.handlers.gpx_handler import GPXHandler
+from app.modules.flamapy.cache import FeatureModelCache
+from app.modules.flamapy.validation import validate_uvl_file
+from app.modules.hubfile.storage import (
+    compress_file,
+    decompressed_path,
+    is_compressed,
+    open_upload,
+    store_upload,
+    uncompressed_size,
+)
+
+DATASET_DIR = Path(__file__).parents[2] / "dataset"
+UVL_EXAMPLE = DATASET_DIR / "uvl_examples" / "file1.uvl"
+GPX_EXAMPLE = DATASET_DIR / "gpx_examples" / "file1.gpx"
+
+
+@pytest.fixture
+def uvl_file(tmp_path):
+    path = tmp_path / "model.uvl"
+    shutil.copy(UVL_EXAMPLE, path)
+    return path
+
+
+def test_compress_file_in_place(uvl_file):
+    original = uvl_file.read_bytes()
+
+    assert compress_file(str(uvl_file))
+
+    assert is_compressed(str(uvl_file))
+    assert gzip.decompress(uvl_file.read_bytes()) == original
+    assert uvl_file.stat().st_size < len(original)
+    assert uncompressed_size(str(uvl_file)) == len(original)
+    assert list(uvl_file.parent.iterdir()) == [uvl_file]
+
+    # Ya comprimido: no se vuelve a comprimir
+    assert not compress_file(str(uvl_file))
+
+
+def test_only_text_models_are_compressed(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("not a model")
+
+    assert not compress_file(str(path))
+    assert not is_compressed(str(path))
+
+
+def test_open_upload_reads_both_formats(uvl_file, tmp_path):
+    raw = tmp_path / "raw.uvl"
+    shutil.copy(UVL_EXAMPLE, raw)
+    compress_file(str(uvl_file))
+
+    for path in (raw, uvl_file):
+        with open_upload(str(path)) as f:
+            assert f.read() == UVL_EXAMPLE.read_bytes()
+        with open_upload(str(path), "r", encoding="utf-8") as f:
+            assert f.read() == UVL_EXAMPLE.read_text(encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        open_upload(str(raw), "wb")
+
+
+def test_decompressed_path_is_temporary(uvl_file):
+    with decompressed_path(str(uvl_file)) as path:
+        assert path == str(uvl_file)
+
+    compress_file(str(uvl_file))
+    with decompressed_path(str(uvl_file)) as path:
+        assert path != str(uvl_file)
+        assert path.endswith(".uvl")
+        assert Path(path).read_bytes() == UVL_EXAMPLE.read_bytes()
+    assert not Path(path).exists()
+
+
+def test_store_upload_follows_configuration(uvl_file, monkeypatch):
+    monkeypatch.delenv("UPLOAD_COMPRESSION", raising=False)
+    assert not store_upload(str(uvl_file))
+    assert not is_compressed(str(uvl_file))
+
+    monkeypatch.setenv("UPLOAD_COMPRESSION", "gzip")
+    assert store_upload(str(uvl_file))
+    assert is_compressed(str(uvl_file))
+
+
+def test_parsers_read_compressed_uploads(uvl_file, tmp_path):
+    gpx_file = tmp_path / "track.gpx"
+    shutil.copy(GPX_EXAMPLE, gpx_file)
+    expected_stats = GPXHandler().compute_stats(str(gpx_file))
+    expected_errors = validate_uvl_file(str(uvl_file))
+    expected_root = FeatureModelCache(cache_dir=str(tmp_path / "raw")).get(None, str(uvl_file)).root.name
+
+    compress_file(str(gpx_file))
+    compress_file(str(uvl_file))
+
+    assert GPXHandler().compute_stats(str(gpx_file)) == expected_stats
+    assert validate_uvl_file(str(uvl_file)) == expected_errors
+    assert FeatureModelCache(cache_dir=str(tmp_path / "gz")).get(None, str(uvl_file)).root.name == expected_root
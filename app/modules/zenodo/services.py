@@ -9,6 +9,7 @@ from flask_login import current_user
 
 from app.modules.dataset.models import BaseDataset
 from app.modules.featuremodel.models import FeatureModel
+from app.modules.hubfile.storage import open_upload
 from app.modules.zenodo.repositories import ZenodoRepository
 from core.configuration.configuration import uploads_folder_name
 from core.services.BaseService import BaseService
@@ -230,7 +231,7 @@ class ZenodoService(BaseService):
 
         publish_url = f"{self.ZENODO_API_URL}/{deposition_id}/files"
         try:
-            with open(file_path, "rb") as fh:
+            with open_upload(file_path) as fh:
                 files = {"file": fh}
                 response = requests.post(publish_url, params=self._params(), data=data, files=files, timeout=60)
         except FileNotFoundError:
@@ -0,0 +1,47 @@
+"""Add indexed GPX totals (distance, elevation gain) to data_set
+
+Revision ID: 3b7e52c0d914
+Revises: a4c1e9d27b35
+Create Date: 2026-01-15 11:05:48.662190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e52c0d914'
+down_revision = 'a4c1e9d27b35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('data_set', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_distance', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('total_elevation_gain', sa.Float(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_data_set_total_distance'), ['total_distance'], unique=False)
+        batch_op.create_index(batch_op.f('ix_data_set_total_elevation_gain'), ['total_elevation_gain'], unique=False)
+
+    # Rellenar con las estadísticas ya calculadas (solo filas con checksum vigente)
+    totals = """
+        SELECT COALESCE(SUM(s.{column}), 0)
+        FROM gpx_track_stats s
+        JOIN file f ON f.id = s.hubfile_id AND f.checksum = s.checksum
+        JOIN feature_model fm ON fm.id = f.feature_model_id
+        WHERE fm.data_set_id = data_set.id
+    """
+    op.execute(
+        "UPDATE data_set SET "
+        f"total_distance = ({totals.format(column='distance')}), "
+        f"total_elevation_gain = ({totals.format(column='elevation_gain')}) "
+        "WHERE dataset_kind = 'gpx'"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('data_set', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_data_set_total_elevation_gain'))
+        batch_op.drop_index(batch_op.f('ix_data_set_total_distance'))
+        batch_op.drop_column('total_elevation_gain')
+        batch_op.drop_column('total_distance')
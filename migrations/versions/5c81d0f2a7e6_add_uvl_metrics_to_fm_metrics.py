@@ -0,0 +1,34 @@
+"""Add per-file UVL metrics (features, constraints, depth, CTCR) to fm_metrics
+
+Revision ID: 5c81d0f2a7e6
+Revises: 3b7e52c0d914
+Create Date: 2026-01-16 09:42:17.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c81d0f2a7e6'
+down_revision = '3b7e52c0d914'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('fm_metrics', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('checksum', sa.String(length=120), nullable=True))
+        batch_op.add_column(sa.Column('features_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('constraints_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('tree_depth', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('cross_tree_ratio', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('fm_metrics', schema=None) as batch_op:
+        batch_op.drop_column('cross_tree_ratio')
+        batch_op.drop_column('tree_depth')
+        batch_op.drop_column('constraints_count')
+        batch_op.drop_column('features_count')
+        batch_op.drop_column('checksum')
@@ -0,0 +1,60 @@
+"""Add background SAT analysis jobs and results cached by checksum
+
+Revision ID: 8e4f2b6c1a93
+Revises: 5c81d0f2a7e6
+Create Date: 2026-01-19 11:05:43.902716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4f2b6c1a93'
+down_revision = '5c81d0f2a7e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('fm_analysis_result',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('checksum', sa.String(length=120), nullable=False),
+    sa.Column('operation', sa.String(length=40), nullable=False),
+    sa.Column('flamapy_version', sa.String(length=40), nullable=False),
+    sa.Column('result', sa.Text(), nullable=False),
+    sa.Column('duration', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('checksum', 'operation', 'flamapy_version', name='uq_fm_analysis_result_key')
+    )
+    op.create_table('fm_analysis_job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('hubfile_id', sa.Integer(), nullable=False),
+    sa.Column('checksum', sa.String(length=120), nullable=False),
+    sa.Column('operation', sa.String(length=40), nullable=False),
+    sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'DONE', 'FAILED', 'TIMEOUT', 'CANCELLED', name='analysisstatus'), nullable=False),
+    sa.Column('cancel_requested', sa.Boolean(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('result_id', sa.Integer(), nullable=True),
+    sa.Column('created_by_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['hubfile_id'], ['file.id'], ),
+    sa.ForeignKeyConstraint(['result_id'], ['fm_analysis_result.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('fm_analysis_job', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_fm_analysis_job_hubfile_id'), ['hubfile_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_fm_analysis_job_status'), ['status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('fm_analysis_job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_fm_analysis_job_status'))
+        batch_op.drop_index(batch_op.f('ix_fm_analysis_job_hubfile_id'))
+
+    op.drop_table('fm_analysis_job')
+    op.drop_table('fm_analysis_result')
@@ -0,0 +1,43 @@
+"""Add gpx_track_cell spatial index table
+
+Revision ID: a4c1e9d27b35
+Revises: f261055a9673
+Create Date: 2026-01-14 09:42:17.381025
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c1e9d27b35'
+down_revision = 'f261055a9673'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('gpx_track_cell',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('track_stats_id', sa.Integer(), nullable=False),
+    sa.Column('dataset_id', sa.Integer(), nullable=False),
+    sa.Column('level', sa.SmallInteger(), nullable=False),
+    sa.Column('cell_x', sa.Integer(), nullable=False),
+    sa.Column('cell_y', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['dataset_id'], ['data_set.id'], ),
+    sa.ForeignKeyConstraint(['track_stats_id'], ['gpx_track_stats.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('gpx_track_cell', schema=None) as batch_op:
+        batch_op.create_index('ix_gpx_track_cell_level_x_y', ['level', 'cell_x', 'cell_y'], unique=False)
+        batch_op.create_index(batch_op.f('ix_gpx_track_cell_dataset_id'), ['dataset_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_gpx_track_cell_track_stats_id'), ['track_stats_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('gpx_track_cell', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_gpx_track_cell_track_stats_id'))
+        batch_op.drop_index(batch_op.f('ix_gpx_track_cell_dataset_id'))
+        batch_op.drop_index('ix_gpx_track_cell_level_x_y')
+
+    op.drop_table('gpx_track_cell')
@@ -0,0 +1,33 @@
+"""Add uvl_validation table with grammar verdicts per checksum
+
+Revision ID: b2d9e6f41c07
+Revises: 8e4f2b6c1a93
+Create Date: 2026-01-21 16:27:09.551830
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d9e6f41c07'
+down_revision = '8e4f2b6c1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('uvl_validation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('checksum', sa.String(length=120), nullable=False),
+    sa.Column('valid', sa.Boolean(), nullable=False),
+    sa.Column('errors', sa.Text(), nullable=False),
+    sa.Column('parser_version', sa.String(length=40), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('checksum')
+    )
+
+
+def downgrade():
+    op.drop_table('uvl_validation')
@@ -0,0 +1,42 @@
+"""Add fm_feature_name inverted index of UVL feature names
+
+Revision ID: c7a3f5e90d12
+Revises: b2d9e6f41c07
+Create Date: 2026-01-23 10:14:52.204117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a3f5e90d12'
+down_revision = 'b2d9e6f41c07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('fm_feature_name',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('hubfile_id', sa.Integer(), nullable=False),
+    sa.Column('dataset_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('normalized_name', sa.String(length=255), nullable=False),
+    sa.ForeignKeyConstraint(['dataset_id'], ['data_set.id'], ),
+    sa.ForeignKeyConstraint(['hubfile_id'], ['file.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('fm_feature_name', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_fm_feature_name_dataset_id'), ['dataset_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_fm_feature_name_hubfile_id'), ['hubfile_id'], unique=False)
+        batch_op.create_index('ix_fm_feature_name_normalized_dataset', ['normalized_name', 'dataset_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('fm_feature_name', schema=None) as batch_op:
+        batch_op.drop_index('ix_fm_feature_name_normalized_dataset')
+        batch_op.drop_index(batch_op.f('ix_fm_feature_name_hubfile_id'))
+        batch_op.drop_index(batch_op.f('ix_fm_feature_name_dataset_id'))
+
+    op.drop_table('fm_feature_name')
@@ -0,0 +1,39 @@
+"""Add file_blob table and file.sha256 for the content-addressed blob store
+
+Revision ID: d4e8a1c6b572
+Revises: c7a3f5e90d12
+Create Date: 2026-01-27 09:41:18.530264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4e8a1c6b572'
+down_revision = 'c7a3f5e90d12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('file_blob',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sha256')
+    )
+    with op.batch_alter_table('file', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sha256', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_file_sha256'), ['sha256'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('file', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_file_sha256'))
+        batch_op.drop_column('sha256')
+
+    op.drop_table('file_blob')
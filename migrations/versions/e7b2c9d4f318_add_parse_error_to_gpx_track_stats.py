@@ -0,0 +1,26 @@
+"""Add gpx_track_stats.parse_error to mark GPX files that could not be parsed
+
+Revision ID: e7b2c9d4f318
+Revises: d4e8a1c6b572
+Create Date: 2026-02-03 10:12:44.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b2c9d4f318'
+down_revision = 'd4e8a1c6b572'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('gpx_track_stats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('parse_error', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('gpx_track_stats', schema=None) as batch_op:
+        batch_op.drop_column('parse_error')
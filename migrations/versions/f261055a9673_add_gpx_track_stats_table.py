@@ -0,0 +1,48 @@
+"""Add gpx_track_stats table
+
+Revision ID: f261055a9673
+Revises: dcdba7249143
+Create Date: 2026-01-12 10:14:31.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f261055a9673'
+down_revision = 'dcdba7249143'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('gpx_track_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('hubfile_id', sa.Integer(), nullable=False),
+    sa.Column('checksum', sa.String(length=120), nullable=False),
+    sa.Column('distance', sa.Float(), nullable=False),
+    sa.Column('elevation_gain', sa.Float(), nullable=False),
+    sa.Column('elevation_loss', sa.Float(), nullable=False),
+    sa.Column('points_count', sa.Integer(), nullable=False),
+    sa.Column('duration', sa.Float(), nullable=False),
+    sa.Column('min_lat', sa.Float(), nullable=True),
+    sa.Column('max_lat', sa.Float(), nullable=True),
+    sa.Column('min_lon', sa.Float(), nullable=True),
+    sa.Column('max_lon', sa.Float(), nullable=True),
+    sa.Column('start_time', sa.DateTime(), nullable=True),
+    sa.Column('end_time', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['hubfile_id'], ['file.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('hubfile_id', 'checksum', name='uq_gpx_track_stats_hubfile_checksum')
+    )
+    with op.batch_alter_table('gpx_track_stats', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_gpx_track_stats_hubfile_id'), ['hubfile_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('gpx_track_stats', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_gpx_track_stats_hubfile_id'))
+
+    op.drop_table('gpx_track_stats')
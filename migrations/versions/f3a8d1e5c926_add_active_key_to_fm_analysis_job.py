@@ -0,0 +1,28 @@
+"""Add fm_analysis_job.active_key so only one job per checksum and operation is active
+
+Revision ID: f3a8d1e5c926
+Revises: e7b2c9d4f318
+Create Date: 2026-02-05 16:27:09.114385
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8d1e5c926'
+down_revision = 'e7b2c9d4f318'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('fm_analysis_job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('active_key', sa.String(length=170), nullable=True))
+        batch_op.create_unique_constraint('uq_fm_analysis_job_active_key', ['active_key'])
+
+
+def downgrade():
+    with op.batch_alter_table('fm_analysis_job', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_fm_analysis_job_active_key', type_='unique')
+        batch_op.drop_column('active_key')
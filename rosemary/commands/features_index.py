@@ -0,0 +1,12 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("features:index", help="Indexes the feature names of UVL files that are not in the search index yet.")
+@click.option("--dataset", "dataset_id", type=int, help="Only index the files of this dataset.")
+@with_appcontext
+def features_index(dataset_id):
+    from app.modules.featuremodel.services import FMFeatureNameService
+
+    indexed = FMFeatureNameService().index_pending(dataset_id)
+    click.echo(click.style(f"Indexed feature names of {indexed} UVL file(s).", fg="green"))
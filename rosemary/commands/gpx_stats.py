@@ -0,0 +1,12 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("gpx:stats", help="Computes and stores the stats of GPX files that do not have them yet.")
+@click.option("--dataset", "dataset_id", type=int, help="Only process the files of this dataset.")
+@with_appcontext
+def gpx_stats(dataset_id):
+    from app.modules.dataset.services import GPXTrackStatsService
+
+    recorded = GPXTrackStatsService().backfill(dataset_id)
+    click.echo(click.style(f"Stored the stats of {recorded} GPX file(s).", fg="green"))
@@ -0,0 +1,12 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("uvl:metrics", help="Computes and stores the metrics of UVL files that do not have them yet.")
+@click.option("--dataset", "dataset_id", type=int, help="Only process the files of this dataset.")
+@with_appcontext
+def uvl_metrics(dataset_id):
+    from app.modules.featuremodel.services import FMMetricsService
+
+    recorded = FMMetricsService().backfill(dataset_id)
+    click.echo(click.style(f"Stored the metrics of {recorded} UVL file(s).", fg="green"))